@@ -0,0 +1,41 @@
+import os
+import shutil
+
+import pytest
+
+from conftest import NEEDLE
+from d8s_file_system import directory_copy, directory_file_paths, directory_files_containing
+
+TREES = ['small_files_tree', 'deep_tree', 'wide_tree']
+
+
+@pytest.mark.benchmark(group='directory_file_paths')
+@pytest.mark.parametrize('tree', TREES)
+def bench_directory_file_paths(benchmark, request, tree):
+    directory_path = request.getfixturevalue(tree)
+    benchmark(directory_file_paths, directory_path, recursive=True)
+
+
+@pytest.mark.benchmark(group='directory_files_containing')
+def bench_directory_files_containing(benchmark, small_files_tree):
+    matches = benchmark(directory_files_containing, small_files_tree, NEEDLE, recursive=True)
+    assert matches
+
+
+@pytest.mark.benchmark(group='directory_files_containing')
+def bench_directory_files_containing_regex(benchmark, small_files_tree):
+    matches = benchmark(directory_files_containing, small_files_tree, 'n[e]+dle', pattern_is_regex=True, recursive=True)
+    assert matches
+
+
+@pytest.mark.benchmark(group='directory_copy')
+@pytest.mark.parametrize('tree', TREES)
+def bench_directory_copy(benchmark, request, tmp_path, tree):
+    directory_path = request.getfixturevalue(tree)
+    destination_path = str(tmp_path / 'copy')
+
+    def remove_destination():
+        if os.path.exists(destination_path):
+            shutil.rmtree(destination_path)
+
+    benchmark.pedantic(directory_copy, args=(directory_path, destination_path), setup=remove_destination, rounds=5)
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from d8s_file_system import (
+    atomic_write,
+    file_append,
+    file_chunks,
+    file_details,
+    file_md5,
+    file_read,
+    file_read_bytes,
+    file_sha1,
+    file_sha256,
+    file_sha512,
+    file_ssdeep,
+    file_write,
+)
+
+
+@pytest.mark.benchmark(group='file_read')
+def bench_file_read_small(benchmark, small_file_path):
+    benchmark(file_read, small_file_path)
+
+
+@pytest.mark.benchmark(group='file_read')
+def bench_file_read_medium(benchmark, medium_file_path):
+    benchmark(file_read, medium_file_path)
+
+
+@pytest.mark.benchmark(group='file_read')
+def bench_file_read_bytes_huge(benchmark, huge_file_path):
+    benchmark(file_read_bytes, huge_file_path)
+
+
+@pytest.mark.benchmark(group='file_write')
+def bench_file_write_small(benchmark, tmp_path, small_file_path):
+    contents = file_read(small_file_path)
+    benchmark(file_write, str(tmp_path / 'a'), contents)
+
+
+@pytest.mark.benchmark(group='file_write')
+def bench_file_write_huge(benchmark, tmp_path, huge_file_path):
+    contents = file_read_bytes(huge_file_path)
+    benchmark(file_write, str(tmp_path / 'a'), contents)
+
+
+@pytest.mark.benchmark(group='file_write')
+def bench_file_write_chunks(benchmark, tmp_path, small_file_path):
+    chunks = [file_read(small_file_path)] * 1024
+    benchmark(lambda: file_write(str(tmp_path / 'a'), iter(chunks)))
+
+
+@pytest.mark.benchmark(group='file_append')
+def bench_file_append_small(benchmark, tmp_path, small_file_path):
+    contents = file_read(small_file_path)
+    file_path = str(tmp_path / 'a')
+
+    def setup():
+        file_write(file_path, '')
+        return (file_path, contents), {}
+
+    benchmark.pedantic(file_append, setup=setup, rounds=1000)
+
+
+@pytest.mark.benchmark(group='hash')
+@pytest.mark.parametrize('hash_function', [file_md5, file_sha1, file_sha256, file_sha512], ids=lambda f: f.__name__)
+def bench_file_hash_huge(benchmark, hash_function, huge_file_path):
+    benchmark(hash_function, huge_file_path)
+
+
+@pytest.mark.benchmark(group='hash')
+def bench_file_ssdeep_medium(benchmark, medium_file_path):
+    benchmark(file_ssdeep, medium_file_path)
+
+
+@pytest.mark.benchmark(group='file_chunks')
+def bench_file_chunks_medium(benchmark, medium_file_path):
+    benchmark(file_chunks, medium_file_path, average_size=8192)
+
+
+@pytest.mark.benchmark(group='file_details')
+def bench_file_details_medium(benchmark, medium_file_path):
+    benchmark(file_details, medium_file_path)
+
+
+@pytest.mark.benchmark(group='atomic_write')
+@pytest.mark.parametrize('size', [1024, 16 * 1024 * 1024], ids=['small', 'large'])
+def bench_atomic_write(benchmark, tmp_path, size):
+    contents = os.urandom(size)
+    file_path = str(tmp_path / 'a')
+
+    def write():
+        with atomic_write(file_path, mode='wb') as f:
+            f.write(contents)
+
+    benchmark(write)
@@ -0,0 +1,106 @@
+"""Synthetic directory trees for the benchmarks.
+
+The trees are generated from a fixed seed so that every run benchmarks the same data. Set the BENCHMARK_SCALE
+environment variable to scale the number and size of the files (e.g. BENCHMARK_SCALE=0.1 for a quick run).
+"""
+
+import os
+import random
+
+import pytest
+
+SCALE = float(os.environ.get('BENCHMARK_SCALE', '1'))
+SEED = 0
+# the pattern which is searched for by the directory_files_containing benchmarks (it is in every tenth small file)
+NEEDLE = 'needle'
+WORDS = ('lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do', 'eiusmod')
+
+
+def scaled(count: int) -> int:
+    """Scale the given count by the BENCHMARK_SCALE."""
+    return max(1, int(count * SCALE))
+
+
+def random_text(rng: random.Random, size: int) -> str:
+    """Generate (at least) size characters of text made of random words."""
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)[:size]
+
+
+def _write(file_path: str, contents: str):
+    with open(file_path, 'w') as f:
+        f.write(contents)
+
+
+@pytest.fixture(scope='session')
+def small_files_tree(tmp_path_factory) -> str:
+    """A tree of many small (1 KiB) text files spread over 10 subdirectories."""
+    rng = random.Random(SEED)
+    directory_path = str(tmp_path_factory.mktemp('small_files'))
+    for index in range(scaled(1000)):
+        subdirectory_path = os.path.join(directory_path, f'{index % 10}')
+        os.makedirs(subdirectory_path, exist_ok=True)
+        text = random_text(rng, 1024)
+        if index % 10 == 0:
+            text = f'{text[:512]}{NEEDLE}{text[512:]}'
+        _write(os.path.join(subdirectory_path, f'{index}.txt'), text)
+    return directory_path
+
+
+@pytest.fixture(scope='session')
+def huge_files_tree(tmp_path_factory) -> str:
+    """A directory with a few huge (32 MiB) binary files."""
+    rng = random.Random(SEED)
+    directory_path = str(tmp_path_factory.mktemp('huge_files'))
+    for index in range(3):
+        with open(os.path.join(directory_path, f'{index}.bin'), 'wb') as f:
+            f.write(rng.randbytes(scaled(32 * 1024 * 1024)))
+    return directory_path
+
+
+@pytest.fixture(scope='session')
+def deep_tree(tmp_path_factory) -> str:
+    """A chain of deeply nested directories with a small file at each level."""
+    rng = random.Random(SEED)
+    directory_path = str(tmp_path_factory.mktemp('deep'))
+    path = directory_path
+    for depth in range(scaled(64)):
+        path = os.path.join(path, f'level{depth}')
+        os.makedirs(path)
+        _write(os.path.join(path, 'file.txt'), random_text(rng, 256))
+    return directory_path
+
+
+@pytest.fixture(scope='session')
+def wide_tree(tmp_path_factory) -> str:
+    """A single directory with thousands of small files."""
+    rng = random.Random(SEED)
+    directory_path = str(tmp_path_factory.mktemp('wide'))
+    for index in range(scaled(5000)):
+        _write(os.path.join(directory_path, f'{index}.txt'), random_text(rng, 128))
+    return directory_path
+
+
+@pytest.fixture(scope='session')
+def small_file_path(small_files_tree) -> str:
+    """The path of a single small text file."""
+    return os.path.join(small_files_tree, '0', '0.txt')
+
+
+@pytest.fixture(scope='session')
+def huge_file_path(huge_files_tree) -> str:
+    """The path of a single huge binary file."""
+    return os.path.join(huge_files_tree, '0.bin')
+
+
+@pytest.fixture(scope='session')
+def medium_file_path(tmp_path_factory) -> str:
+    """The path of a single (1 MiB) text file."""
+    file_path = str(tmp_path_factory.mktemp('medium') / 'medium.txt')
+    _write(file_path, random_text(random.Random(SEED), scaled(1024 * 1024)))
+    return file_path
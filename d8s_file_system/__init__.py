@@ -2,6 +2,115 @@ __version__ = '0.10.0'
 __author__ = '''Floyd Hightower'''
 __email__ = 'floyd.hightower27@gmail.com'
 
-from .atomic_writes import atomic_write
-from .directories import *
-from .files import *
+import importlib
+
+# the public names of each submodule; the submodules are only imported when one of their names is first used
+_SUBMODULE_NAMES = {
+    'atomic_writes': ('atomic_write',),
+    'compressed_files': (
+        'file_compression',
+        'file_read_chunks_decompressed',
+        'file_read_bytes_decompressed',
+        'file_read_decompressed',
+        'file_write_compressed',
+        'file_append_compressed',
+        'directory_files_read_decompressed',
+    ),
+    'content_chunks': ('FileChunk', 'file_chunks', 'file_chunks_delta'),
+    'content_store': ('ContentAddressedStore',),
+    'directories': (
+        'is_directory',
+        'directory_exists',
+        'directory_file_names',
+        'directory_file_paths',
+        'directory_copy',
+        'directory_delete',
+        'DirectoryDeleteReport',
+        'directory_delete_parallel',
+        'directory_delete_in_background',
+        'directory_create',
+        'directory_disk_usage',
+        'directory_disk_free_space',
+        'directory_disk_used_space',
+        'directory_disk_total_space',
+        'home_directory',
+        'home_directory_join',
+        'directory_move',
+        'directory_files_details',
+        'directory_files_read',
+        'directory_subdirectory_names',
+        'directory_files_containing',
+        'directory_file_paths_matching',
+        'directory_file_names_matching',
+        'directory_read_files_with_path_matching',
+    ),
+    'directories_temp_utils': ('ScratchDirectory', 'ScratchPool', 'default_scratch_pool', 'scratch_directory'),
+    'directory_handle': ('Directory',),
+    'directory_hashes': ('MerkleNode', 'MerkleTree', 'directory_merkle_hash', 'directory_merkle_compare'),
+    'directory_sharding': ('DirectoryShard', 'directory_shards', 'ShardedDirectoryDriver'),
+    'file_batches': ('FileOperation', 'FileOperationResult', 'files_batch'),
+    'file_types': ('FileClassification', 'file_classify', 'file_is_binary', 'file_text_chunks', 'file_read_text'),
+    'files': (
+        'is_file',
+        'file_read',
+        'file_read_bytes',
+        'file_write',
+        'file_append',
+        'file_move',
+        'file_is_sparse',
+        'file_copy',
+        'file_delete',
+        'file_owner_name',
+        'file_change_owner',
+        'file_ssdeep',
+        'file_md5',
+        'file_sha1',
+        'file_sha256',
+        'file_sha512',
+        'file_name_escape',
+        'file_name',
+        'file_extension',
+        'file_name_windows',
+        'file_name_unix',
+        'file_size',
+        'file_directory',
+        'file_details',
+        'file_exists',
+        'file_is_readable',
+        'file_is_writable',
+        'file_is_executable',
+        'file_contains',
+        'file_search',
+        'file_name_matches',
+        'FileStatInfo',
+        'file_stat_info',
+        'FileStatCache',
+        'file_stat_infos',
+        'files_read_prefetched',
+    ),
+    'files_temp_utils': ('scratch_file',),
+    'metrics': ('MetricsEvent', 'OperationMetrics', 'FileMetrics'),
+    'resumable_copies': ('file_copy_resumable',),
+    'search_index': ('TrigramIndex',),
+    'throttle': ('IOThrottle',),
+}
+_NAME_SUBMODULES = {name: submodule for submodule, names in _SUBMODULE_NAMES.items() for name in names}
+
+__all__ = list(_NAME_SUBMODULES)
+
+
+def __getattr__(name):
+    """Import the submodule which defines the given name the first time the name is used."""
+    submodule = _NAME_SUBMODULES.get(name)
+    if submodule is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    module = importlib.import_module(f'.{submodule}', __name__)
+    # bind all of the submodule's names at once so that __getattr__ is only called once per submodule
+    for submodule_name in _SUBMODULE_NAMES[submodule]:
+        globals()[submodule_name] = getattr(module, submodule_name)
+    return globals()[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,33 +1,59 @@
 import contextlib
 import os
+from typing import Optional
 
 from atomicwrites import AtomicWriter
 from atomicwrites import atomic_write as atomic_write_
 
+from .metrics import _counted_writes, _measured, _metrics_active
+
+
+def _default_file_mode() -> int:
+    """Return the mode with which a new file is created (emulating what os.open() does)."""
+    mask = os.umask(0)
+    os.umask(mask)
+    return 0o664 & ~mask
+
 
 class AtomicWriterPerms(AtomicWriter):
     """This class wraps the AtomicWriter from the atomicwrites package.
 
     This class updates the file permissions after the file is created.
     This snippet was taken from/inspired by the code here: https://github.com/OCR-D/core/pull/625.
+    If preallocate is given, that many bytes are reserved for the file before it is written.
     """
 
+    def __init__(self, path, *args, preallocate: Optional[int] = None, **kwargs):
+        super().__init__(path, *args, **kwargs)
+        self._preallocate = preallocate
+
     def get_fileobject(self, **kwargs):
         f = super().get_fileobject(**kwargs)
         try:
             mode = os.stat(self._path).st_mode
         except FileNotFoundError:
-            # Creating a new file, emulate what os.open() does
-            mask = os.umask(0)
-            os.umask(mask)
-            mode = 0o664 & ~mask
+            mode = _default_file_mode()
         fd = f.fileno()
         os.fchmod(fd, mode)
+        if self._preallocate:
+            from .files import _file_preallocate  # pylint: disable=C0415
+
+            _file_preallocate(fd, self._preallocate)
         return f
 
+    def sync(self, f):
+        if self._preallocate:
+            # drop whatever part of the preallocated space was not written
+            f.truncate()
+        super().sync(f)
+
 
 @contextlib.contextmanager
 def atomic_write(fpath, *, overwrite: bool = True, **cls_kwargs):
     """Create a context manager to write atomically using the AtomicWriterPerms class to update file permissions."""
-    with atomic_write_(fpath, writer_cls=AtomicWriterPerms, overwrite=overwrite, **cls_kwargs) as f:
+    with _measured('atomic_write'), atomic_write_(
+        fpath, writer_cls=AtomicWriterPerms, overwrite=overwrite, **cls_kwargs
+    ) as f:
+        if _metrics_active():
+            _counted_writes(f)
         yield f
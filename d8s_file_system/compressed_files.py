@@ -0,0 +1,210 @@
+import bz2
+import gzip
+import io
+import lzma
+from collections import deque
+from typing import IO, Any, Callable, Deque, Dict, Iterable, Iterator, Optional, Tuple
+
+from .atomic_writes import atomic_write
+from .directories import directory_file_paths
+from .files import _file_contents_bytes_chunks, file_extension, file_read
+from .throttle import WORKER_THREAD_NAME_PREFIX, _throttled_read
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+# the bytes with which a file compressed with each codec starts
+COMPRESSION_MAGIC_BYTES = {
+    'gzip': b'\x1f\x8b',
+    'bz2': b'BZh',
+    'xz': b'\xfd7zXZ\x00',
+    'zstd': b'\x28\xb5\x2f\xfd',
+}
+COMPRESSION_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.gzip': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.zst': 'zstd',
+    '.zstd': 'zstd',
+}
+
+
+def _zstandard():
+    try:
+        import zstandard  # pylint: disable=C0415
+    except ImportError as e:
+        message = 'Reading and writing zstd files requires the zstandard package (`pip install zstandard`)'
+        raise ImportError(message) from e
+    return zstandard
+
+
+def _zstd_reader(f: IO[bytes]) -> IO[bytes]:
+    return _zstandard().ZstdDecompressor().stream_reader(f, read_across_frames=True)
+
+
+def _zstd_writer(f: IO[bytes], level: Optional[int]) -> IO[bytes]:
+    return _zstandard().ZstdCompressor(level=3 if level is None else level).stream_writer(f, closefd=False)
+
+
+def _zstd_compress(data: bytes, level: Optional[int]) -> bytes:
+    return _zstandard().ZstdCompressor(level=3 if level is None else level).compress(data)
+
+
+_READERS: Dict[str, Callable[[IO[bytes]], IO[bytes]]] = {
+    'gzip': lambda f: gzip.GzipFile(fileobj=f, mode='rb'),  # type: ignore
+    'bz2': lambda f: bz2.BZ2File(f, 'rb'),
+    'xz': lambda f: lzma.LZMAFile(f, 'rb'),
+    'zstd': _zstd_reader,
+}
+_WRITERS: Dict[str, Callable[[IO[bytes], Optional[int]], IO[bytes]]] = {
+    # an empty filename keeps the name of atomic_write's temporary file out of the gzip header
+    'gzip': lambda f, level: gzip.GzipFile('', 'wb', 9 if level is None else level, fileobj=f),  # type: ignore
+    'bz2': lambda f, level: bz2.BZ2File(f, 'wb', compresslevel=9 if level is None else level),
+    'xz': lambda f, level: lzma.LZMAFile(f, 'wb', preset=level),
+    'zstd': _zstd_writer,
+}
+# each of these produces a complete stream; all of the codecs can read a file made of several concatenated streams
+_COMPRESSORS: Dict[str, Callable[[bytes, Optional[int]], bytes]] = {
+    'gzip': lambda data, level: gzip.compress(data, compresslevel=9 if level is None else level),
+    'bz2': lambda data, level: bz2.compress(data, compresslevel=9 if level is None else level),
+    'xz': lambda data, level: lzma.compress(data, preset=level),
+    'zstd': _zstd_compress,
+}
+
+
+def file_compression(file_path: str) -> Optional[str]:
+    """Find the compression codec ('gzip', 'bz2', 'xz', or 'zstd') of the given file (or None if it is not compressed).
+
+    The codec is detected from the first bytes of the file if it exists; otherwise, it is guessed from the extension.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(max(len(magic_bytes) for magic_bytes in COMPRESSION_MAGIC_BYTES.values()))
+    except FileNotFoundError:
+        return COMPRESSION_EXTENSIONS.get(file_extension(file_path).lower())
+
+    for codec, magic_bytes in COMPRESSION_MAGIC_BYTES.items():
+        if head.startswith(magic_bytes):
+            return codec
+    return None
+
+
+def _codec_from_extension(file_path: str) -> str:
+    codec = COMPRESSION_EXTENSIONS.get(file_extension(file_path).lower())
+    if codec is None:
+        raise ValueError(f'Unable to determine the compression codec of {file_path}')
+    return codec
+
+
+def _codec(file_path: str, codec: Optional[str]) -> str:
+    return codec or file_compression(file_path) or _codec_from_extension(file_path)
+
+
+def file_read_chunks_decompressed(
+    file_path: str, *, codec: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Stream the decompressed content of the given file in chunks of (at most) chunk_size bytes."""
+    codec = _codec(file_path, codec)
+    with open(file_path, 'rb') as f, _READERS[codec](f) as reader:
+        yield from iter(lambda: _throttled_read(reader.read, chunk_size), b'')
+
+
+def file_read_bytes_decompressed(file_path: str, *, codec: Optional[str] = None) -> bytes:
+    """Read the decompressed content of the given file as bytes."""
+    return b''.join(file_read_chunks_decompressed(file_path, codec=codec))
+
+
+def file_read_decompressed(file_path: str, *, codec: Optional[str] = None, encoding: Optional[str] = None) -> str:
+    """Read the decompressed content of the given file as a string."""
+    codec = _codec(file_path, codec)
+    with open(file_path, 'rb') as f, _READERS[codec](f) as reader:
+        return _throttled_read(io.TextIOWrapper(reader, encoding=encoding).read)  # type: ignore
+
+
+def _blocks(chunks: Iterable[Any], block_size: int) -> Iterator[bytes]:
+    """Regroup the given chunks into blocks of block_size bytes (the last block may be smaller)."""
+    block = bytearray()
+    for chunk in chunks:
+        block += chunk
+        while len(block) >= block_size:
+            yield bytes(block[:block_size])
+            del block[:block_size]
+    if block:
+        yield bytes(block)
+
+
+def _compress_blocks_parallel(
+    blocks: Iterable[bytes], codec: str, level: Optional[int], max_workers: int
+) -> Iterator[bytes]:
+    """Compress the given blocks in a thread pool (in order), keeping at most 2 * max_workers blocks in memory."""
+    from concurrent.futures import Future, ThreadPoolExecutor  # pylint: disable=C0415
+
+    compressor = _COMPRESSORS[codec]
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=WORKER_THREAD_NAME_PREFIX) as executor:
+        pending: Deque[Future] = deque()
+        for block in blocks:
+            pending.append(executor.submit(compressor, block, level))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _file_compressed_write(f: IO[bytes], chunks: Iterable[Any], codec: str, level: Optional[int], **kwargs):
+    max_workers = kwargs.get('max_workers')
+    if max_workers:
+        blocks = _blocks(chunks, kwargs.get('block_size') or DEFAULT_BLOCK_SIZE)
+        for compressed_block in _compress_blocks_parallel(blocks, codec, level, max_workers):
+            f.write(compressed_block)
+    else:
+        with _WRITERS[codec](f, level) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+
+
+def file_write_compressed(
+    file_path: str,
+    file_contents: Any,
+    *,
+    codec: Optional[str] = None,
+    level: Optional[int] = None,
+    encoding: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> bool:
+    """Compress the given content and write it (atomically) to the file at the given path.
+
+    The codec defaults to the one matching the file's extension. The content is compressed as it is streamed to the
+    file, so chunked content (see file_write) is never held in memory all at once. If max_workers is given, the content
+    is split into blocks of block_size bytes which are compressed in parallel (the result is a valid file made of
+    several concatenated compressed streams).
+    """
+    codec = codec or _codec_from_extension(file_path)
+    chunks = _file_contents_bytes_chunks(file_contents, encoding)
+    with atomic_write(file_path, mode='wb') as f:
+        _file_compressed_write(f, chunks, codec, level, max_workers=max_workers, block_size=block_size)
+    return True
+
+
+def file_append_compressed(
+    file_path: str,
+    file_contents: Any,
+    *,
+    codec: Optional[str] = None,
+    level: Optional[int] = None,
+    encoding: Optional[str] = None,
+) -> bool:
+    """Compress the given content and append it (as a new compressed stream) to the file at the given path."""
+    codec = _codec(file_path, codec)
+    chunks = _file_contents_bytes_chunks(file_contents, encoding)
+    with open(file_path, 'ab') as f:
+        _file_compressed_write(f, chunks, codec, level)
+    return True
+
+
+def directory_files_read_decompressed(directory_path: str, *, recursive: bool = False) -> Iterable[Tuple[str, str]]:
+    """Read all files in the directory_path, decompressing the ones which are compressed."""
+    for path in directory_file_paths(directory_path, recursive=recursive):
+        codec = file_compression(path)
+        yield path, file_read(path) if codec is None else file_read_decompressed(path, codec=codec)
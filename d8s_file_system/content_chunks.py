@@ -0,0 +1,117 @@
+import hashlib
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
+
+from .metrics import _instrumented
+from .throttle import _throttled_read
+
+DEFAULT_AVERAGE_CHUNK_SIZE = 64 * 1024
+READ_SIZE = 1024 * 1024
+_HASH_MASK = 0xFFFFFFFFFFFFFFFF
+# the gear table maps each byte to a (fixed) pseudo-random 64-bit number, so the chunk boundaries never change
+_GEAR = tuple(int.from_bytes(hashlib.sha256(bytes([byte])).digest()[:8], 'big') for byte in range(256))
+
+
+class FileChunk(NamedTuple):
+    """A content-defined chunk of a file."""
+
+    offset: int
+    length: int
+    digest: str
+
+
+def _mask(bits: int) -> int:
+    """Return a mask of the top bits of the rolling hash (which depend on the most recent 64 bytes)."""
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+def _cut_point(data: bytearray, min_size: int, average_size: int, max_size: int) -> int:
+    """Find the length of the first chunk in the given data (using FastCDC's normalized chunking).
+
+    The boundaries within min_size of the start of the chunk are skipped. Before average_size, a boundary needs one
+    more bit of the hash to be zero than after it, which pulls the chunk sizes towards the average.
+    This loop is the bottleneck of file_chunks (it runs once for every byte after min_size).
+    """
+    end = min(len(data), max_size)
+    if end <= min_size:
+        return end
+
+    bits = average_size.bit_length() - 1
+    gear = _GEAR
+    normal_size = max(min_size, min(end, average_size))
+    rolling_hash = 0
+    for start, stop, mask in ((min_size, normal_size, _mask(bits + 1)), (normal_size, end, _mask(bits - 1))):
+        for index, byte in enumerate(memoryview(data)[start:stop], start):
+            rolling_hash = ((rolling_hash << 1) + gear[byte]) & _HASH_MASK
+            if not rolling_hash & mask:
+                return index + 1
+    return end
+
+
+def _content_defined_chunks(
+    blocks: Iterable[bytes], min_size: int, average_size: int, max_size: int
+) -> Iterator[bytearray]:
+    """Split the data in the given blocks into content-defined chunks (in a single streaming pass)."""
+    buffer = bytearray()
+    for block in blocks:
+        buffer += block
+        while len(buffer) >= max_size:
+            cut_point = _cut_point(buffer, min_size, average_size, max_size)
+            yield buffer[:cut_point]
+            # deleting from the front of a bytearray does not move the rest of it
+            del buffer[:cut_point]
+    while buffer:
+        cut_point = _cut_point(buffer, min_size, average_size, max_size)
+        yield buffer[:cut_point]
+        del buffer[:cut_point]
+
+
+@_instrumented
+def file_chunks(
+    file_path: str,
+    *,
+    average_size: int = DEFAULT_AVERAGE_CHUNK_SIZE,
+    min_size: int = 0,
+    max_size: int = 0,
+    algorithm: str = 'sha256',
+) -> List[FileChunk]:
+    """Split the given file into content-defined chunks and return the offset, length, and digest of each chunk.
+
+    The chunk boundaries are found with a rolling hash of the content (like FastCDC), so an insertion or deletion only
+    changes the chunks around it (rather than shifting every boundary after it). The average_size must be a power of
+    two; min_size and max_size default to a quarter of it and eight times it.
+
+    The rolling hash is computed byte by byte in pure Python, so chunking runs at roughly 10 MB/s (about a hundred
+    times slower than hashing the file). It suits files of up to a few hundred megabytes; for larger files, compare
+    whole-file hashes first and only chunk the files which changed.
+    """
+    if average_size & (average_size - 1) or average_size < 4:
+        raise ValueError(f'The average_size ({average_size}) must be a power of two (and at least 4)')
+    min_size = min_size or average_size // 4
+    max_size = max_size or average_size * 8
+
+    chunks = []
+    offset = 0
+    with open(file_path, 'rb') as f:
+        blocks = iter(lambda: _throttled_read(f.read, READ_SIZE), b'')
+        for chunk in _content_defined_chunks(blocks, min_size, average_size, max_size):
+            chunks.append(FileChunk(offset, len(chunk), hashlib.new(algorithm, chunk).hexdigest()))
+            offset += len(chunk)
+    return chunks
+
+
+def file_chunks_delta(old_chunks: Iterable[FileChunk], new_chunks: Iterable[FileChunk]) -> List[Tuple[int, int]]:
+    """Find the (offset, length) ranges of the new file which are not in the old file (given the chunks of each file).
+
+    Every other part of the new file is a chunk which is also in the old file (possibly at another offset), so syncing
+    the old file to the new file only requires the data in these ranges. Adjacent ranges are merged.
+    """
+    old_digests = {chunk.digest for chunk in old_chunks}
+    changed_ranges: List[Tuple[int, int]] = []
+    for chunk in new_chunks:
+        if chunk.digest in old_digests:
+            continue
+        if changed_ranges and sum(changed_ranges[-1]) == chunk.offset:
+            changed_ranges[-1] = (changed_ranges[-1][0], changed_ranges[-1][1] + chunk.length)
+        else:
+            changed_ranges.append((chunk.offset, chunk.length))
+    return changed_ranges
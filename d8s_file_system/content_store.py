@@ -0,0 +1,153 @@
+import contextlib
+import hashlib
+import os
+import string
+import tempfile
+from typing import IO, Any, Iterable, Iterator, List, Optional
+
+from atomicwrites import move_atomic
+
+from .atomic_writes import _default_file_mode, atomic_write
+from .files import _file_buffer, _file_contents_bytes_chunks
+from .throttle import _throttled_read
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+TEMPORARY_DIRECTORY_NAME = 'tmp'
+
+
+class ContentAddressedStore:
+    """A store of deduplicated blobs, each saved in a file named after the hash of its content.
+
+    Objects are sharded into fan_out levels of subdirectories (named after the first fan_out_width characters of the
+    digest at each level) so that no single directory grows too large. Objects are written atomically and never
+    overwritten, so several processes can safely write to the same store at once.
+    """
+
+    def __init__(self, directory_path: str, *, algorithm: str = 'sha256', fan_out: int = 2, fan_out_width: int = 2):
+        self.directory_path = directory_path
+        self.algorithm = algorithm
+        self.fan_out = fan_out
+        self.fan_out_width = fan_out_width
+        self._digest_length = hashlib.new(algorithm).digest_size * 2
+        self._temporary_directory_path = os.path.join(directory_path, TEMPORARY_DIRECTORY_NAME)
+        os.makedirs(self._temporary_directory_path, exist_ok=True)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.directory_path!r}, algorithm={self.algorithm!r})'
+
+    def __contains__(self, digest: str) -> bool:
+        return os.path.isfile(self.path(digest))
+
+    def __iter__(self) -> Iterator[str]:
+        return self.digests()
+
+    def path(self, digest: str) -> str:
+        """Return the path of the object with the given digest."""
+        if len(digest) <= self.fan_out * self.fan_out_width or not set(digest) <= set(string.hexdigits):
+            raise ValueError(f'{digest!r} is not a valid digest')
+
+        width = self.fan_out_width
+        shards = [digest[start:][:width] for start in range(0, self.fan_out * width, width)]
+        return os.path.join(self.directory_path, *shards, digest)
+
+    def _put_buffer(self, buffer: Any) -> str:
+        digest = hashlib.new(self.algorithm, buffer).hexdigest()
+        object_path = self.path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            try:
+                with atomic_write(object_path, mode='wb', overwrite=False) as f:
+                    f.write(buffer)
+            except FileExistsError:
+                # another writer stored the same object first
+                pass
+        return digest
+
+    def _commit(self, temporary_path: str, digest: str):
+        object_path = self.path(digest)
+        if os.path.exists(object_path):
+            return
+
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        try:
+            # this is how atomic_write(overwrite=False) commits a file: it fails if the object already exists
+            move_atomic(temporary_path, object_path)
+        except FileExistsError:
+            # another writer stored the same object first
+            pass
+
+    def _put_chunks(self, chunks: Iterable[Any]) -> str:
+        hash_object = hashlib.new(self.algorithm)
+        fd, temporary_path = tempfile.mkstemp(dir=self._temporary_directory_path)
+        try:
+            with open(fd, 'wb') as f:
+                for chunk in chunks:
+                    hash_object.update(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(fd)
+            # mkstemp creates files which only the owner can read
+            os.chmod(temporary_path, _default_file_mode())
+            digest = hash_object.hexdigest()
+            self._commit(temporary_path, digest)
+        finally:
+            # the temporary file is only left if the object already existed (or something went wrong)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temporary_path)
+        return digest
+
+    def put(self, file_contents: Any, *, encoding: Optional[str] = None) -> str:
+        """Store the given content (if it is not already stored) and return its digest.
+
+        The content may be anything file_write accepts. A buffer is hashed before it is written (so nothing is written
+        if the object already exists); chunked content is hashed while it is streamed into a temporary file.
+        """
+        buffer = _file_buffer(file_contents) if not isinstance(file_contents, str) else None
+        if buffer is not None:
+            return self._put_buffer(buffer)
+        return self._put_chunks(_file_contents_bytes_chunks(file_contents, encoding))
+
+    def put_file(self, file_path: str, *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+        """Store the content of the file at the given path and return its digest."""
+        with open(file_path, 'rb') as f:
+            return self._put_chunks(iter(lambda: _throttled_read(f.read, chunk_size), b''))
+
+    def open(self, digest: str) -> IO[bytes]:
+        """Open the object with the given digest for reading."""
+        return open(self.path(digest), 'rb')
+
+    def get(self, digest: str) -> bytes:
+        """Read the object with the given digest."""
+        with self.open(digest) as f:
+            return f.read()
+
+    def delete(self, digest: str):
+        """Delete the object with the given digest."""
+        os.remove(self.path(digest))
+
+    def _is_digest(self, name: str) -> bool:
+        return len(name) == self._digest_length and set(name) <= set(string.hexdigits)
+
+    def digests(self) -> Iterator[str]:
+        """Yield the digests of all of the objects in the store.
+
+        Other files (like the temporary files of writes which are in progress) are skipped.
+        """
+        for path, directory_names, file_names in os.walk(self.directory_path):
+            if path == self.directory_path and TEMPORARY_DIRECTORY_NAME in directory_names:
+                directory_names.remove(TEMPORARY_DIRECTORY_NAME)
+            yield from filter(self._is_digest, file_names)
+
+    def gc(self, referenced_digests: Iterable[str]) -> List[str]:
+        """Delete all of the objects which are not in the given referenced_digests and return their digests.
+
+        Objects which are stored while the gc is running may be deleted if they are not referenced, so writers which
+        depend on the objects they store should be paused (or their digests included) while collecting garbage.
+        """
+        referenced_digests = set(referenced_digests)
+        deleted_digests = []
+        for digest in list(self.digests()):
+            if digest not in referenced_digests:
+                self.delete(digest)
+                deleted_digests.append(digest)
+        return deleted_digests
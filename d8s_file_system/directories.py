@@ -1,8 +1,26 @@
+import errno
+import functools
 import os
 import shutil
-from typing import Dict, Iterable, List, Tuple, Union
-
-from .files import file_details, file_name_matches, file_read, file_search
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from .file_types import _text_decode, file_is_binary, file_read_text
+from .files import (
+    _text_search,
+    file_copy,
+    file_details,
+    file_name_matches,
+    file_read,
+    file_search,
+    files_read_prefetched,
+)
+from .metrics import _instrumented
+from .throttle import WORKER_THREAD_NAME_PREFIX
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .search_index import TrigramIndex
 
 # TODO: test and standardize what happens if these functions are given a directory which does not exist
 # TODO: may want to convert some of these functions to use this library: https://pypi.org/project/path.py/
@@ -21,6 +39,7 @@ def directory_exists(directory_path: str) -> bool:
     return os.path.isdir(directory_path) or False
 
 
+@_instrumented
 def directory_file_names(directory_path: str, *, recursive: bool = False) -> List[str]:
     """List files at the given directory_path."""
     directory_files = []
@@ -31,6 +50,7 @@ def directory_file_names(directory_path: str, *, recursive: bool = False) -> Lis
     return directory_files
 
 
+@_instrumented
 def directory_file_paths(directory_path: str, *, recursive: bool = False) -> List[str]:
     """List the file paths at the given directory_path."""
     file_paths = []
@@ -44,7 +64,7 @@ def directory_file_paths(directory_path: str, *, recursive: bool = False) -> Lis
 def directory_copy(src_path: str, dst_path: str):
     """Copy the directory from the src_path to the destination path."""
     # TODO: add option to overwrite existing directory
-    shutil.copytree(src_path, dst_path)
+    shutil.copytree(src_path, dst_path, copy_function=functools.partial(file_copy, preserve_metadata=True))
 
 
 def directory_delete(directory_path: str):
@@ -52,6 +72,148 @@ def directory_delete(directory_path: str):
     shutil.rmtree(directory_path)
 
 
+class DirectoryDeleteReport(NamedTuple):
+    """The outcome of deleting a directory with directory_delete_parallel."""
+
+    files_deleted: int
+    directories_deleted: int
+    errors: List[Tuple[str, OSError]]
+
+
+def _directory_scan(path: str) -> Tuple[List[str], List[str]]:
+    """Return the paths of the subdirectories and the names of everything else in the given directory."""
+    subdirectory_paths = []
+    names = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectory_paths.append(entry.path)
+            else:
+                names.append(entry.name)
+    return subdirectory_paths, names
+
+
+@_instrumented
+def _directory_tree_files(directory_path: str, errors: List[Tuple[str, OSError]]) -> List[Tuple[str, List[str]]]:
+    """Return each directory in the tree (parents before children) along with the names of its non-directories."""
+    subdirectory_paths, names = _directory_scan(directory_path)
+    tree = [(directory_path, names)]
+    pending = subdirectory_paths
+    while pending:
+        path = pending.pop()
+        try:
+            subdirectory_paths, names = _directory_scan(path)
+        except OSError as e:
+            errors.append((path, e))
+            subdirectory_paths, names = [], []
+        pending.extend(subdirectory_paths)
+        tree.append((path, names))
+    return tree
+
+
+def _directory_unlink_files(path: str, names: List[str]) -> Tuple[int, List[Tuple[str, OSError]]]:
+    deleted_count = 0
+    errors = []
+    for name in names:
+        file_path = os.path.join(path, name)
+        try:
+            os.unlink(file_path)
+            deleted_count += 1
+        except OSError as e:
+            errors.append((file_path, e))
+    return deleted_count, errors
+
+
+def _directory_delete_progress(on_progress: Optional[Callable[[int, int], None]], *counts: int):
+    if on_progress:
+        on_progress(*counts)
+
+
+def _directory_remove_empty(path: str, errors: List[Tuple[str, OSError]]) -> int:
+    try:
+        os.rmdir(path)
+    except OSError as e:
+        errors.append((path, e))
+        return 0
+    return 1
+
+
+def _directory_check_not_symlink(directory_path: str):
+    # like shutil.rmtree, refuse to delete through a symlink (which would delete the contents of what it points to)
+    if os.path.islink(directory_path):
+        raise OSError(f'Cannot delete a symbolic link to a directory: {directory_path!r}')
+
+
+def directory_delete_parallel(
+    directory_path: str,
+    *,
+    max_workers: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    on_error: Optional[Callable[[str, OSError], None]] = None,
+) -> DirectoryDeleteReport:
+    """Delete the given directory, unlinking the files in each subdirectory from a thread pool.
+
+    Errors do not stop the deletion; they are passed to on_error (if given) and returned in the report.
+    The on_progress callback (if given) is called with the number of files and directories deleted so far.
+    Like shutil.rmtree, an OSError is raised if the directory_path is a symlink.
+    """
+    _directory_check_not_symlink(directory_path)
+    errors: List[Tuple[str, OSError]] = []
+    tree = _directory_tree_files(directory_path, errors)
+    files_deleted = directories_deleted = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=WORKER_THREAD_NAME_PREFIX) as executor:
+        futures = [executor.submit(_directory_unlink_files, path, names) for path, names in tree if names]
+        for future in as_completed(futures):
+            deleted_count, unlink_errors = future.result()
+            files_deleted += deleted_count
+            errors.extend(unlink_errors)
+            _directory_delete_progress(on_progress, files_deleted, directories_deleted)
+
+    # the tree lists parents before their children, so walking it backwards removes the directories bottom-up
+    for path, _ in reversed(tree):
+        directories_deleted += _directory_remove_empty(path, errors)
+        _directory_delete_progress(on_progress, files_deleted, directories_deleted)
+
+    if on_error:
+        for path, error in errors:
+            on_error(path, error)
+    return DirectoryDeleteReport(files_deleted, directories_deleted, errors)
+
+
+def directory_delete_in_background(
+    directory_path: str, *, trash_directory: Optional[str] = None, **kwargs
+) -> 'Future[DirectoryDeleteReport]':
+    """Move the given directory into a trash location and delete it in a background thread.
+
+    The directory is gone from its original location as soon as this function returns. The trash location defaults to
+    the directory's parent (so that the move is a rename on the same file system). If the directory can not be renamed
+    into the trash_directory (e.g. it is on another file system), it is deleted in place in the background.
+    The kwargs are passed to directory_delete_parallel; the returned future resolves to its report.
+    Like shutil.rmtree, an OSError is raised if the directory_path is a symlink.
+    """
+    directory_path = directory_path.rstrip(os.sep) or directory_path
+    _directory_check_not_symlink(directory_path)
+    if trash_directory is None:
+        trash_directory = os.path.dirname(os.path.abspath(directory_path))
+    else:
+        os.makedirs(trash_directory, exist_ok=True)
+
+    trash_name = f'.{os.path.basename(directory_path)}.{uuid.uuid4().hex}.trash'
+    trash_path = os.path.join(trash_directory, trash_name)
+    try:
+        os.rename(directory_path, trash_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        trash_path = directory_path
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=WORKER_THREAD_NAME_PREFIX)
+    future = executor.submit(directory_delete_parallel, trash_path, **kwargs)
+    executor.shutdown(wait=False)
+    return future
+
+
 def directory_create(directory_path: str, mode=0o777):
     """Create a directory."""
     if not directory_exists(directory_path):
@@ -103,13 +265,54 @@ def directory_files_details(directory_path: str, *, recursive: bool = False) ->
     return file_details_dict
 
 
-def directory_files_read(directory_path: str, *, recursive: bool = False) -> Iterable[Tuple[str, str]]:
-    """Read all files in the directory_path."""
-    file_paths = directory_file_paths(directory_path, recursive=recursive)
-    for path in file_paths:
-        yield path, file_read(path)
+def _text_file_paths(file_paths: List[str], skip_binary: bool) -> List[str]:
+    """Drop the binary files from the given paths (if skip_binary is True)."""
+    if not skip_binary:
+        return file_paths
+    return [file_path for file_path in file_paths if not file_is_binary(file_path)]
 
 
+def _text_file_search(file_path: str, pattern: str, pattern_is_regex: bool, skip_binary: bool) -> List[str]:
+    """Search the given file (decoding it with its detected encoding if skip_binary is True)."""
+    if not skip_binary:
+        return file_search(file_path, pattern, pattern_is_regex=pattern_is_regex)
+    return _text_search(file_read_text(file_path), pattern, pattern_is_regex)
+
+
+def _directory_read_text_files(file_paths: List[str], prefetch: int) -> Iterable[Tuple[str, str]]:
+    # the files which passed the classifier are decoded with the encoding it detected
+    if prefetch > 0:
+        for path, data in files_read_prefetched(file_paths, prefetch=prefetch, binary=True):
+            yield path, _text_decode(data, path)
+    else:
+        for path in file_paths:
+            yield path, file_read_text(path)
+
+
+def _directory_read_files(file_paths: List[str], prefetch: int, skip_binary: bool) -> Iterable[Tuple[str, str]]:
+    if skip_binary:
+        yield from _directory_read_text_files(file_paths, prefetch)
+    elif prefetch > 0:
+        yield from files_read_prefetched(file_paths, prefetch=prefetch)
+    else:
+        for path in file_paths:
+            yield path, file_read(path)
+
+
+def directory_files_read(
+    directory_path: str, *, recursive: bool = False, prefetch: int = 0, skip_binary: bool = False
+) -> Iterable[Tuple[str, str]]:
+    """Read all files in the directory_path.
+
+    If prefetch is given, that many files are read ahead in background threads (see files_read_prefetched).
+    If skip_binary is True, binary files (see file_classify) are skipped and the other files are decoded with the
+    encoding which was detected for them (see file_read_text).
+    """
+    file_paths = _text_file_paths(directory_file_paths(directory_path, recursive=recursive), skip_binary)
+    yield from _directory_read_files(file_paths, prefetch, skip_binary)
+
+
+@_instrumented
 def directory_subdirectory_names(directory_path: str, *, recursive: bool = False) -> List[str]:
     """List the names of all subdirectories in the given directory."""
     subdir_names = []
@@ -122,14 +325,32 @@ def directory_subdirectory_names(directory_path: str, *, recursive: bool = False
 
 
 def directory_files_containing(
-    directory_path: str, pattern: str, *, pattern_is_regex: bool = False, recursive: bool = False
+    directory_path: str,
+    pattern: str,
+    *,
+    pattern_is_regex: bool = False,
+    recursive: bool = False,
+    index: Optional['TrigramIndex'] = None,
+    skip_binary: bool = False,
 ) -> Dict[str, List[str]]:
-    """Search for the given pattern in all files in the given directory_path."""
-    matching_files = {}
-    file_paths = directory_file_paths(directory_path, recursive=recursive)
+    """Search for the given pattern in all files in the given directory_path.
 
-    for file_path in file_paths:
-        search_results = file_search(file_path, pattern, pattern_is_regex=pattern_is_regex)
+    If an index (built over the same directory) is given, only the files which the index says could contain the
+    pattern are read. If skip_binary is True, binary files (see file_classify) are not searched and the other files
+    are decoded with the encoding which was detected for them (see file_read_text).
+    """
+    matching_files = {}
+    if index is None:
+        file_paths = directory_file_paths(directory_path, recursive=recursive)
+    else:
+        if (index.directory_path, index.recursive) != (directory_path, recursive):
+            message = f'The given index was built over {index.directory_path} (recursive={index.recursive})'
+            raise ValueError(message)
+        index.update()
+        file_paths = index.candidate_paths(pattern, pattern_is_regex=pattern_is_regex)
+
+    for file_path in _text_file_paths(file_paths, skip_binary):
+        search_results = _text_file_search(file_path, pattern, pattern_is_regex, skip_binary)
         if any(search_results):
             matching_files[file_path] = search_results
     return matching_files
@@ -156,10 +377,14 @@ def directory_file_names_matching(directory_path: str, pattern: str, *, recursiv
 
 
 def directory_read_files_with_path_matching(
-    directory_path: str, pattern: str, *, recursive: bool = False
+    directory_path: str, pattern: str, *, recursive: bool = False, prefetch: int = 0, skip_binary: bool = False
 ) -> Iterable[Tuple[str, str]]:
-    """Read all of the files in the given directory whose paths match the given pattern."""
-    matching_file_paths = directory_file_paths_matching(directory_path, pattern, recursive=recursive)
+    """Read all of the files in the given directory whose paths match the given pattern.
 
-    for file_path in matching_file_paths:
-        yield file_path, file_read(file_path)
+    If prefetch is given, that many files are read ahead in background threads (see files_read_prefetched).
+    If skip_binary is True, binary files (see file_classify) are skipped and the other files are decoded with the
+    encoding which was detected for them (see file_read_text).
+    """
+    matching_file_paths = directory_file_paths_matching(directory_path, pattern, recursive=recursive)
+    matching_file_paths = _text_file_paths(matching_file_paths, skip_binary)
+    yield from _directory_read_files(matching_file_paths, prefetch, skip_binary)
@@ -0,0 +1,248 @@
+import atexit
+import contextlib
+import itertools
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from collections import deque
+from typing import Deque, Iterator, List, Optional, Sequence
+
+# the fast (memory-backed) file systems which are preferred for scratch space (if they exist)
+TMPFS_PATHS = ('/dev/shm',)  # nosec
+# an os.pathsep-separated list of the roots (in order of preference) for the default scratch pool
+SCRATCH_ROOTS_ENVIRONMENT_VARIABLE = 'D8S_SCRATCH_ROOTS'
+DEFAULT_MIN_FREE_BYTES = 16 * 1024 * 1024
+DEFAULT_MAX_IDLE = 16
+
+_default_pool: Optional['ScratchPool'] = None
+_default_pool_lock = threading.Lock()
+
+
+def _default_scratch_roots() -> List[str]:
+    configured_roots = os.environ.get(SCRATCH_ROOTS_ENVIRONMENT_VARIABLE)
+    if configured_roots:
+        return configured_roots.split(os.pathsep)
+
+    tmpfs_roots = [path for path in TMPFS_PATHS if os.path.isdir(path) and os.access(path, os.W_OK)]
+    return tmpfs_roots + [tempfile.gettempdir()]
+
+
+def _directory_clear(directory_path: str):
+    """Delete everything in the given directory (but not the directory itself)."""
+    with os.scandir(directory_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(entry.path)
+
+
+class _ScratchRoot:
+    """The pool's directory in one of its roots along with the directories which are ready to be reused."""
+
+    def __init__(self, root_path: str, quota_bytes: Optional[int]):
+        os.makedirs(root_path, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix='d8s-scratch-', dir=root_path)
+        self.files_path = os.path.join(self.path, 'files')
+        os.mkdir(self.files_path)
+        self.quota_bytes = quota_bytes
+        self.reserved_bytes = 0
+        self.idle_paths: Deque[str] = deque()
+
+    def has_room(self, size_hint: int, min_free_bytes: int) -> bool:
+        """Return whether the root has room for size_hint more bytes."""
+        if self.quota_bytes is not None and self.reserved_bytes + size_hint > self.quota_bytes:
+            return False
+        return shutil.disk_usage(self.path).free - size_hint >= min_free_bytes
+
+
+class ScratchDirectory:
+    """A temporary directory handed out by a ScratchPool (it is emptied and recycled when it is released)."""
+
+    def __init__(self, pool: 'ScratchPool', root: _ScratchRoot, path: str, size_hint: int):
+        self.pool = pool
+        self.path = path
+        self.size_hint = size_hint
+        self._root = root
+        self._released = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    def __fspath__(self):
+        return self.path
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.path!r})'
+
+    def usage(self) -> int:
+        """Return the number of bytes used by the files in the directory."""
+        return sum(
+            os.path.getsize(os.path.join(path, file_name))
+            for path, _, file_names in os.walk(self.path)
+            for file_name in file_names
+        )
+
+    def release(self):
+        """Give the directory back to the pool (it is emptied in the pool's cleanup thread)."""
+        if not self._released:
+            self._released = True
+            self.pool._recycle(self._root, self.path, self.size_hint)  # pylint: disable=W0212
+
+
+class ScratchPool:
+    """A pool of scratch directories (and files) spread over a list of roots in order of preference.
+
+    The roots default to the writable tmpfs mounts (e.g. /dev/shm) followed by the system's temporary directory (or to
+    the roots in the D8S_SCRATCH_ROOTS environment variable). Each directory (or file) is put in the first root which
+    has room for its size_hint: the root must have at least min_free_bytes free after the size_hint, and the size_hints
+    of the directories handed out from the root must stay within quota_bytes (if given). If no root has room, the last
+    root is used (so it should be on disk). Released directories are emptied in a background thread and then kept (up
+    to max_idle per root) to be handed out again, so jobs do not pay for creating and deleting their directories.
+    """
+
+    def __init__(
+        self,
+        roots: Optional[Sequence[str]] = None,
+        *,
+        quota_bytes: Optional[int] = None,
+        min_free_bytes: int = DEFAULT_MIN_FREE_BYTES,
+        max_idle: int = DEFAULT_MAX_IDLE,
+    ):
+        self._roots = [_ScratchRoot(root_path, quota_bytes) for root_path in roots or _default_scratch_roots()]
+        self.min_free_bytes = min_free_bytes
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._names = itertools.count()
+        self._dirty: 'queue.Queue[Optional[tuple]]' = queue.Queue()
+        self._cleaner: Optional[threading.Thread] = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return f'{type(self).__name__}({[root.path for root in self._roots]!r})'
+
+    @property
+    def root_paths(self) -> List[str]:
+        """The paths of the pool's directories in each of its roots (in order of preference)."""
+        return [root.path for root in self._roots]
+
+    def _reserve(self, size_hint: int) -> _ScratchRoot:
+        if self._closed:
+            raise ValueError(f'{self!r} is closed')
+
+        with self._lock:
+            root = next(
+                (root for root in self._roots if root.has_room(size_hint, self.min_free_bytes)), self._roots[-1]
+            )
+            root.reserved_bytes += size_hint
+        return root
+
+    def _release_reservation(self, root: _ScratchRoot, size_hint: int):
+        with self._lock:
+            root.reserved_bytes -= size_hint
+
+    @contextlib.contextmanager
+    def reservation(self, size_hint: int = 0) -> Iterator[str]:
+        """Reserve size_hint bytes in the first root with room for them and yield a directory in it for scratch files.
+
+        The directory is shared by everyone using the pool (so files in it need unique names).
+        """
+        root = self._reserve(size_hint)
+        try:
+            yield root.files_path
+        finally:
+            self._release_reservation(root, size_hint)
+
+    def directory(self, size_hint: int = 0) -> ScratchDirectory:
+        """Hand out an empty scratch directory (in the first root with room for size_hint bytes)."""
+        root = self._reserve(size_hint)
+        with self._lock:
+            path = root.idle_paths.pop() if root.idle_paths else None
+        if path is None:
+            path = os.path.join(root.path, str(next(self._names)))
+            os.mkdir(path)
+        return ScratchDirectory(self, root, path, size_hint)
+
+    def _recycle(self, root: _ScratchRoot, path: str, size_hint: int):
+        with self._lock:
+            if self._closed:
+                # the directory was deleted along with the rest of the pool
+                return
+            if self._cleaner is None:
+                self._cleaner = threading.Thread(target=self._clean, name='d8s-scratch-cleaner', daemon=True)
+                self._cleaner.start()
+            self._dirty.put((root, path, size_hint))
+
+    def _clean_directory(self, root: _ScratchRoot, path: str, size_hint: int):
+        try:
+            _directory_clear(path)
+        finally:
+            self._release_reservation(root, size_hint)
+        with self._lock:
+            if len(root.idle_paths) < self.max_idle and not self._closed:
+                root.idle_paths.append(path)
+                return
+        shutil.rmtree(path, ignore_errors=True)
+
+    def _clean(self):
+        """Empty the released directories (this runs in the pool's cleanup thread)."""
+        while True:
+            item = self._dirty.get()
+            try:
+                if item is None:
+                    return
+                self._clean_directory(*item)
+            except OSError:
+                # the directory is deleted with the rest of the pool when the pool is closed
+                pass
+            finally:
+                self._dirty.task_done()
+
+    def wait_for_cleanup(self):
+        """Wait until all of the released directories have been emptied."""
+        self._dirty.join()
+
+    def idle_count(self) -> int:
+        """Return the number of emptied directories which are ready to be handed out again."""
+        with self._lock:
+            return sum(len(root.idle_paths) for root in self._roots)
+
+    def close(self):
+        """Stop the cleanup thread and delete all of the pool's directories (including any which are in use)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            cleaner = self._cleaner
+        if cleaner is not None:
+            self._dirty.put(None)
+            cleaner.join()
+        for root in self._roots:
+            shutil.rmtree(root.path, ignore_errors=True)
+
+
+def default_scratch_pool() -> ScratchPool:
+    """Return the scratch pool which is shared by the whole process (it is created the first time it is used)."""
+    global _default_pool  # pylint: disable=W0603
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ScratchPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
+
+
+def scratch_directory(*, size_hint: int = 0, pool: Optional[ScratchPool] = None) -> ScratchDirectory:
+    """Hand out an empty scratch directory from the given pool (or the default pool); use it as a context manager."""
+    return (pool or default_scratch_pool()).directory(size_hint)
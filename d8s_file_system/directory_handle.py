@@ -0,0 +1,130 @@
+import os
+import stat
+import uuid
+from typing import IO, Any, List, Optional
+
+from .files import _file_contents_chunks
+from .throttle import _throttled_read
+
+
+class Directory:
+    """A handle on an open directory which performs file operations relative to the directory's fd.
+
+    The directory's path is only resolved once (when the handle is opened); every other operation passes the fd as
+    `dir_fd` so the kernel only has to look up the file's name. This is only supported on platforms with `dir_fd`
+    support (see `os.supports_dir_fd`).
+    """
+
+    def __init__(self, directory_path: str, *, dir_fd: Optional[int] = None):
+        self.path = directory_path
+        self.fd = os.open(directory_path, os.O_RDONLY | os.O_DIRECTORY, dir_fd=dir_fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.path!r})'
+
+    def fileno(self) -> int:
+        """Return the fd of the directory."""
+        return self.fd
+
+    def close(self):
+        """Close the directory's fd."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def _opener(self, name: str, flags: int) -> int:
+        return os.open(name, flags, 0o666, dir_fd=self.fd)
+
+    def open(self, name: str, mode: str = 'r', **kwargs) -> IO[Any]:
+        """Open the file with the given name in the directory (the arguments are the same as the builtin open)."""
+        return open(name, mode, opener=self._opener, **kwargs)  # pylint: disable=W1514
+
+    def subdirectory(self, name: str) -> 'Directory':
+        """Open a handle on the subdirectory with the given name."""
+        subdirectory = type(self)(name, dir_fd=self.fd)
+        subdirectory.path = os.path.join(self.path, name)
+        return subdirectory
+
+    def read(self, name: str) -> str:
+        """Read the file with the given name as a string."""
+        with self.open(name) as f:
+            return _throttled_read(f.read)
+
+    def read_bytes(self, name: str) -> bytes:
+        """Read the file with the given name as bytes."""
+        with self.open(name, 'rb') as f:
+            return _throttled_read(f.read)
+
+    def write(self, name: str, file_contents: Any) -> bool:
+        """Atomically write the given content to the file with the given name.
+
+        Like atomic_write, the content is written to a temporary file in the directory which is then renamed over the
+        file (keeping the file's permissions if it already exists).
+        """
+        mode, chunks = _file_contents_chunks(file_contents)
+        temporary_name = f'.{name}.{uuid.uuid4().hex}.tmp'
+        with self.open(temporary_name, f'x{mode}') as f:
+            try:
+                for chunk in chunks:
+                    f.write(chunk)
+                f.flush()
+                if self.exists(name):
+                    os.fchmod(f.fileno(), stat.S_IMODE(self.stat(name).st_mode))
+                os.fsync(f.fileno())
+                os.replace(temporary_name, name, src_dir_fd=self.fd, dst_dir_fd=self.fd)
+            except BaseException:
+                self.delete(temporary_name)
+                raise
+        os.fsync(self.fd)
+        return True
+
+    def append(self, name: str, file_contents: Any) -> bool:
+        """Append the given content to the file with the given name."""
+        mode, chunks = _file_contents_chunks(file_contents)
+        with self.open(name, f'a{mode}') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        return True
+
+    def stat(self, name: str, *, follow_symlinks: bool = True) -> os.stat_result:
+        """Return the stat result for the file with the given name."""
+        return os.stat(name, dir_fd=self.fd, follow_symlinks=follow_symlinks)
+
+    def size(self, name: str) -> int:
+        """Return the size of the file with the given name."""
+        return self.stat(name).st_size
+
+    def exists(self, name: str) -> bool:
+        """Check if a file with the given name exists in the directory."""
+        return os.access(name, os.F_OK, dir_fd=self.fd)
+
+    def is_file(self, name: str) -> bool:
+        """Determine if the given name is a file in the directory."""
+        try:
+            return stat.S_ISREG(self.stat(name).st_mode)
+        except FileNotFoundError:
+            return False
+
+    def delete(self, name: str):
+        """Delete the file with the given name."""
+        os.unlink(name, dir_fd=self.fd)
+
+    def list(self) -> List[str]:
+        """List the names of all of the entries in the directory."""
+        return os.listdir(self.fd)
+
+    def file_names(self) -> List[str]:
+        """List the names of the files in the directory."""
+        with os.scandir(self.fd) as entries:
+            return [entry.name for entry in entries if entry.is_file()]
+
+    def subdirectory_names(self) -> List[str]:
+        """List the names of the subdirectories of the directory."""
+        with os.scandir(self.fd) as entries:
+            return [entry.name for entry in entries if entry.is_dir()]
@@ -0,0 +1,236 @@
+import hashlib
+import os
+import stat
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .metrics import _instrumented
+from .throttle import WORKER_THREAD_NAME_PREFIX, _throttled_read
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class MerkleNode(NamedTuple):
+    """A node of a directory's Merkle tree.
+
+    Files (including symlinks and other special files) have no children; their signature is the (size, mtime_ns, inode)
+    they had when they were hashed. A directory's digest is the hash of the names, types, and digests of its children.
+    """
+
+    digest: str
+    children: Optional[Dict[str, 'MerkleNode']] = None
+    signature: Optional[Tuple[int, int, int]] = None
+
+
+def _stat_signature(stat_result: os.stat_result) -> Tuple[int, int, int]:
+    return stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino
+
+
+@_instrumented
+def _file_node(file_path: str, stat_result: os.stat_result, algorithm: str) -> MerkleNode:
+    hash_object = hashlib.new(algorithm)
+    if stat.S_ISLNK(stat_result.st_mode):
+        # symlinks are hashed by their target (they are never followed)
+        hash_object.update(b'symlink\0' + os.fsencode(os.readlink(file_path)))
+    elif not stat.S_ISREG(stat_result.st_mode):
+        # other special files (fifos, sockets, and devices) are hashed by their type (reading them could block forever)
+        hash_object.update(b'special\0' + str(stat.S_IFMT(stat_result.st_mode)).encode())
+    else:
+        buffer = bytearray(DEFAULT_CHUNK_SIZE)
+        view = memoryview(buffer)
+        with open(file_path, 'rb') as f:
+            for size in iter(lambda: _throttled_read(f.readinto, buffer), 0):
+                hash_object.update(view[:size])
+    return MerkleNode(hash_object.hexdigest(), signature=_stat_signature(stat_result))
+
+
+def _directory_node(children: Dict[str, MerkleNode], algorithm: str) -> MerkleNode:
+    hash_object = hashlib.new(algorithm)
+    for name in sorted(children):
+        child = children[name]
+        kind = b'd' if child.children is not None else b'f'
+        hash_object.update(kind + b'\0' + os.fsencode(name) + b'\0' + child.digest.encode() + b'\0')
+    return MerkleNode(hash_object.hexdigest(), children)
+
+
+def _is_unchanged_file(node: Optional[MerkleNode], stat_result: os.stat_result) -> bool:
+    return node is not None and node.children is None and node.signature == _stat_signature(stat_result)
+
+
+def _is_real_directory(path: str) -> bool:
+    try:
+        return stat.S_ISDIR(os.lstat(path).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+class MerkleTree:
+    """A Merkle tree of the files in a directory (and all of its subdirectories).
+
+    Each file's digest is the hash of its content; each directory's digest combines the digests of its children, so
+    the root digest fingerprints the whole tree. Files are hashed in a thread pool. Calling `update` again only
+    rehashes the files whose size, modification time, or inode changed; if the paths which changed are known, passing
+    them to `update` skips the walk of the rest of the tree and only recombines the digests on the path to the root.
+    """
+
+    def __init__(self, directory_path: str, *, algorithm: str = 'sha256', max_workers: Optional[int] = None):
+        self.directory_path = directory_path
+        self.algorithm = algorithm
+        self.max_workers = max_workers
+        self.root: Optional[MerkleNode] = None
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.directory_path!r}, algorithm={self.algorithm!r})'
+
+    @property
+    def digest(self) -> str:
+        """The digest of the whole directory (the tree is hashed the first time this is used)."""
+        if self.root is None:
+            self.update()
+        return self.root.digest  # type: ignore
+
+    def node(self, path: str) -> Optional[MerkleNode]:
+        """Return the node for the given path (relative to the directory) or None if it is not in the tree."""
+        node = self.root
+        for name in self._relative_parts(path):
+            if node is None or node.children is None:
+                return None
+            node = node.children.get(name)
+        return node
+
+    @staticmethod
+    def _relative_parts(path: str) -> List[str]:
+        parts = [part for part in os.path.normpath(path).split(os.sep) if part != os.curdir]
+        if os.path.isabs(path) or os.pardir in parts:
+            raise ValueError(f'{path} is not a path inside of the directory')
+        return parts
+
+    def _scan_entry(self, entry: os.DirEntry, old_node: Optional[MerkleNode], executor: Executor) -> Any:
+        if entry.is_dir(follow_symlinks=False):
+            return self._scan_directory(entry.path, old_node, executor)
+
+        try:
+            stat_result = entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            # the entry was deleted during the walk
+            return None
+        if _is_unchanged_file(old_node, stat_result):
+            return old_node
+        return executor.submit(_file_node, entry.path, stat_result, self.algorithm)
+
+    def _scan_directory(self, path: str, old_node: Optional[MerkleNode], executor: Executor) -> Dict[str, Any]:
+        """Walk the given directory, submitting the files which need to be hashed to the executor."""
+        old_children = old_node.children if old_node is not None else None
+        entries = {}
+        with os.scandir(path) as directory_entries:
+            for entry in directory_entries:
+                old_child = old_children.get(entry.name) if old_children else None
+                scanned = self._scan_entry(entry, old_child, executor)
+                if scanned is not None:
+                    entries[entry.name] = scanned
+        return entries
+
+    def _resolve(self, scanned: Any) -> MerkleNode:
+        """Combine the results of _scan_directory into nodes (bottom-up)."""
+        if isinstance(scanned, Future):
+            return scanned.result()
+        if isinstance(scanned, dict):
+            return _directory_node({name: self._resolve(child) for name, child in scanned.items()}, self.algorithm)
+        return scanned
+
+    def _rescan(self, path: str, old_node: Optional[MerkleNode], executor: Executor) -> Optional[MerkleNode]:
+        """Hash the file or directory at the given path (or return None if it no longer exists)."""
+        try:
+            stat_result = os.lstat(path)
+        except FileNotFoundError:
+            return None
+
+        if stat.S_ISDIR(stat_result.st_mode):
+            return self._resolve(self._scan_directory(path, old_node, executor))
+        if _is_unchanged_file(old_node, stat_result):
+            return old_node
+        return _file_node(path, stat_result, self.algorithm)
+
+    def _update_path(
+        self, node: Optional[MerkleNode], path: str, parts: List[str], executor: Executor
+    ) -> Optional[MerkleNode]:
+        """Rehash the given parts of the path below the given node and recombine the digests on the way back up."""
+        if not parts or node is None or node.children is None or not _is_real_directory(path):
+            # once the path leaves the tree (or reaches the changed path), everything below it is rescanned
+            return self._rescan(path, node, executor)
+
+        name = parts[0]
+        children = dict(node.children)
+        child = self._update_path(children.get(name), os.path.join(path, name), parts[1:], executor)
+        if child is None:
+            children.pop(name, None)
+        else:
+            children[name] = child
+        return _directory_node(children, self.algorithm)
+
+    def update(self, changed_paths: Optional[List[str]] = None) -> str:
+        """Bring the tree up to date with the directory and return its digest.
+
+        If changed_paths (paths, relative to the directory, of files or directories which were added, changed, or
+        deleted) are given, only they are rehashed; otherwise, the whole directory is walked (and the files which have
+        not changed are not rehashed).
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=WORKER_THREAD_NAME_PREFIX) as executor:
+            if changed_paths is None or self.root is None:
+                self.root = self._resolve(self._scan_directory(self.directory_path, self.root, executor))
+            else:
+                for changed_path in changed_paths:
+                    parts = self._relative_parts(changed_path)
+                    root = self._update_path(self.root, self.directory_path, parts, executor)
+                    self.root = root or _directory_node({}, self.algorithm)
+        return self.root.digest
+
+
+def directory_merkle_hash(directory_path: str, *, algorithm: str = 'sha256', max_workers: Optional[int] = None) -> str:
+    """Find the Merkle hash of the given directory (a single digest of all of its files and subdirectories)."""
+    return MerkleTree(directory_path, algorithm=algorithm, max_workers=max_workers).update()
+
+
+def _merkle_differences(
+    first: Optional[MerkleNode], second: Optional[MerkleNode], path: str, differences: List[Tuple[str, str]]
+):
+    if first is None:
+        differences.append((path, 'added'))
+    elif second is None:
+        differences.append((path, 'removed'))
+    elif first.children is None or second.children is None:
+        if first.digest != second.digest:
+            differences.append((path, 'changed'))
+    elif first.digest != second.digest:
+        _merkle_children_differences(first.children, second.children, path, differences)
+
+
+def _merkle_children_differences(
+    first: Dict[str, MerkleNode], second: Dict[str, MerkleNode], path: str, differences: List[Tuple[str, str]]
+):
+    for name in sorted(first.keys() | second.keys()):
+        child_path = os.path.join(path, name) if path else name
+        _merkle_differences(first.get(name), second.get(name), child_path, differences)
+
+
+def _merkle_root(tree: Union[str, MerkleTree], **kwargs) -> MerkleNode:
+    if isinstance(tree, str):
+        tree = MerkleTree(tree, **kwargs)
+    if tree.root is None:
+        tree.update()
+    return tree.root  # type: ignore
+
+
+def directory_merkle_compare(
+    first: Union[str, MerkleTree], second: Union[str, MerkleTree], **kwargs
+) -> List[Tuple[str, str]]:
+    """Find the paths (relative to the directories) which differ between the two given directories.
+
+    Each difference is a (path, status) tuple where the status is 'added' (only in the second directory), 'removed'
+    (only in the first directory), or 'changed'. Only the subtrees whose digests differ are descended into.
+    The directories may be given as paths or as MerkleTrees (which are only hashed if they have not been already);
+    the kwargs are passed to the MerkleTrees created for paths.
+    """
+    differences: List[Tuple[str, str]] = []
+    _merkle_differences(_merkle_root(first, **kwargs), _merkle_root(second, **kwargs), '', differences)
+    return differences
@@ -0,0 +1,241 @@
+import heapq
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .atomic_writes import atomic_write
+from .directories import _text_file_paths, _text_file_search, directory_file_paths
+from .files import file_details
+
+SHARD_STRATEGIES = ('hash', 'size')
+CHECKPOINT_FILE_NAME = 'shard-{operation}-{number}-of-{count}.json'
+
+
+class DirectoryShard(NamedTuple):
+    """A part of a directory: the names of some of its top-level files and subdirectories.
+
+    The size (the bytes in the shard's files) is only measured by the 'size' strategy (it is 0 otherwise).
+    """
+
+    number: int
+    names: Tuple[str, ...]
+    size: int = 0
+
+
+def _path_size(path: str) -> int:
+    """Return the number of bytes in the given file (or in all of the files in the given directory)."""
+    if not os.path.isdir(path):
+        return os.lstat(path).st_size
+    size = 0
+    for directory_path, _, file_names in os.walk(path):
+        for file_name in file_names:
+            try:
+                size += os.lstat(os.path.join(directory_path, file_name)).st_size
+            except FileNotFoundError:
+                pass
+    return size
+
+
+def _directory_shard_names(directory_path: str, recursive: bool) -> List[str]:
+    """Return the names of the top-level entries of the directory which are split into shards (in a stable order)."""
+    names = []
+    with os.scandir(directory_path) as entries:
+        for entry in entries:
+            # like os.walk, subdirectories are only descended into if recursive is True (and never through symlinks)
+            if not entry.is_dir() or (recursive and not entry.is_symlink()):
+                names.append(entry.name)
+    return sorted(names)
+
+
+def _hash_shards(names: List[str], shard_count: int) -> List[DirectoryShard]:
+    shard_names: List[List[str]] = [[] for _ in range(shard_count)]
+    for name in names:
+        # crc32 (unlike hash) gives the same value in every process and on every machine
+        shard_names[zlib.crc32(os.fsencode(name)) % shard_count].append(name)
+    return [DirectoryShard(number, tuple(shard)) for number, shard in enumerate(shard_names)]
+
+
+def _size_shards(directory_path: str, names: List[str], shard_count: int) -> List[DirectoryShard]:
+    sizes = {name: _path_size(os.path.join(directory_path, name)) for name in names}
+    # each of the largest remaining entries goes to the smallest shard (a greedy approximation of balanced shards)
+    heap: List[Tuple[int, int, List[str]]] = [(0, number, []) for number in range(shard_count)]
+    for name in sorted(names, key=lambda name: (-sizes[name], name)):
+        size, number, shard_names = heapq.heappop(heap)
+        shard_names.append(name)
+        heapq.heappush(heap, (size + sizes[name], number, shard_names))
+    return [
+        DirectoryShard(number, tuple(sorted(shard_names)), size)
+        for size, number, shard_names in sorted(heap, key=lambda shard: shard[1])
+    ]
+
+
+def directory_shards(
+    directory_path: str, shard_count: int, *, strategy: str = 'hash', recursive: bool = False
+) -> List[DirectoryShard]:
+    """Split the top-level files (and, if recursive is True, subdirectories) of the given directory into shards.
+
+    With the 'hash' strategy, each entry's shard is picked by a stable hash of its name (so an entry is always in the
+    same shard, whatever else is in the directory). With the 'size' strategy, the directory is scanned first and the
+    entries are spread over the shards so that each shard has about the same number of bytes.
+    """
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f'The strategy must be one of {SHARD_STRATEGIES} (not {strategy!r})')
+
+    names = _directory_shard_names(directory_path, recursive)
+    if strategy == 'hash':
+        return _hash_shards(names, shard_count)
+    return _size_shards(directory_path, names, shard_count)
+
+
+def _shard_file_paths(directory_path: str, names: Tuple[str, ...]) -> List[str]:
+    """Return the paths of the files in the given shard (named the same way directory_file_paths names them)."""
+    file_paths = []
+    for name in names:
+        path = os.path.join(directory_path, name)
+        if os.path.isdir(path):
+            file_paths.extend(directory_file_paths(path, recursive=True))
+        else:
+            file_paths.append(path)
+    return file_paths
+
+
+def _shard_files_details(directory_path: str, names: Tuple[str, ...]) -> Dict[str, Any]:
+    return {file_path: file_details(file_path) for file_path in _shard_file_paths(directory_path, names)}
+
+
+def _shard_files_containing(
+    directory_path: str, names: Tuple[str, ...], pattern: str, pattern_is_regex: bool, skip_binary: bool
+) -> Dict[str, Any]:
+    matching_files = {}
+    for file_path in _text_file_paths(_shard_file_paths(directory_path, names), skip_binary):
+        search_results = _text_file_search(file_path, pattern, pattern_is_regex, skip_binary)
+        if any(search_results):
+            matching_files[file_path] = search_results
+    return matching_files
+
+
+class ShardedDirectoryDriver:
+    """Split the work of processing a large directory into shards which run in parallel (in processes or elsewhere).
+
+    The directory is split with directory_shards. The shards are submitted to the executor (a ProcessPoolExecutor with
+    one process per shard if none is given); any object whose submit method returns something with a result method
+    (like a concurrent.futures.Executor or the client of a cluster) can be used to run shards on other machines (which
+    must be able to read the directory at the same path). If a checkpoint_directory is given, each shard's result is
+    saved there as soon as the shard finishes, so if a shard fails, running the operation again only reruns the shards
+    which did not finish. The checkpoints are deleted once every shard finishes.
+    """
+
+    def __init__(
+        self,
+        directory_path: str,
+        *,
+        shard_count: Optional[int] = None,
+        strategy: str = 'hash',
+        recursive: bool = False,
+        executor: Any = None,
+        checkpoint_directory: Optional[str] = None,
+    ):
+        self.directory_path = directory_path
+        self.shard_count = shard_count or os.cpu_count() or 1
+        self.strategy = strategy
+        self.recursive = recursive
+        self.executor = executor
+        self.checkpoint_directory = checkpoint_directory
+        if checkpoint_directory is not None:
+            os.makedirs(checkpoint_directory, exist_ok=True)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.directory_path!r}, shard_count={self.shard_count})'
+
+    def shards(self) -> List[DirectoryShard]:
+        """Split the directory into shards."""
+        return directory_shards(self.directory_path, self.shard_count, strategy=self.strategy, recursive=self.recursive)
+
+    def _checkpoint_path(self, operation: str, shard: DirectoryShard) -> Optional[str]:
+        if self.checkpoint_directory is None:
+            return None
+        file_name = CHECKPOINT_FILE_NAME.format(operation=operation, number=shard.number, count=self.shard_count)
+        return os.path.join(self.checkpoint_directory, file_name)
+
+    @staticmethod
+    def _read_checkpoint(checkpoint_path: Optional[str], key: Any) -> Optional[Dict[str, Any]]:
+        """Return the result saved in the given checkpoint (or None if there is none for the given key)."""
+        if checkpoint_path is None or not os.path.isfile(checkpoint_path):
+            return None
+        with open(checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        return checkpoint['result'] if checkpoint['key'] == key else None
+
+    @staticmethod
+    def _write_checkpoint(checkpoint_path: Optional[str], key: Any, result: Dict[str, Any]):
+        if checkpoint_path is not None:
+            with atomic_write(checkpoint_path, mode='w', encoding='utf-8') as f:
+                json.dump({'key': key, 'result': result}, f)
+
+    def _submit_shards(
+        self, executor: Any, operation: str, function: Callable, args: Tuple
+    ) -> List[Tuple[DirectoryShard, Any, Any]]:
+        """Submit the shards which have no checkpoint and return each shard with its key and its result (or future)."""
+        submitted = []
+        for shard in self.shards():
+            # the key (round-tripped through json so that it compares equal to a saved key) identifies the shard's work
+            key = json.loads(json.dumps([os.path.abspath(self.directory_path), operation, shard.names, args]))
+            result = self._read_checkpoint(self._checkpoint_path(operation, shard), key)
+            if result is None:
+                result = executor.submit(function, self.directory_path, shard.names, *args)
+            submitted.append((shard, key, result))
+        return submitted
+
+    def run(self, operation: str, function: Callable, *args) -> Dict[str, Any]:
+        """Run function(directory_path, shard_names, *args) for each shard and merge the dicts which it returns.
+
+        The function must be picklable (e.g. defined at the top level of a module) to run in another process; the args
+        must be serializable as JSON. The operation names the checkpoints. If any shard fails, the first error is raised
+        after the other shards finish.
+        """
+        executor = self.executor or ProcessPoolExecutor(max_workers=self.shard_count)
+        try:
+            results, errors = self._collect_results(operation, self._submit_shards(executor, operation, function, args))
+        finally:
+            if self.executor is None:
+                executor.shutdown()
+        if errors:
+            raise errors[0]
+
+        merged_results: Dict[str, Any] = {}
+        for shard, result in results:
+            merged_results.update(result)
+            checkpoint_path = self._checkpoint_path(operation, shard)
+            if checkpoint_path is not None and os.path.isfile(checkpoint_path):
+                os.remove(checkpoint_path)
+        return merged_results
+
+    def _collect_results(
+        self, operation: str, submitted: List[Tuple[DirectoryShard, Any, Any]]
+    ) -> Tuple[List[Tuple[DirectoryShard, Dict[str, Any]]], List[Exception]]:
+        results = []
+        errors = []
+        for shard, key, result in submitted:
+            if isinstance(result, dict):
+                results.append((shard, result))
+                continue
+            try:
+                result = result.result()
+            except Exception as e:  # pylint: disable=W0703
+                errors.append(e)
+                continue
+            self._write_checkpoint(self._checkpoint_path(operation, shard), key, result)
+            results.append((shard, result))
+        return results, errors
+
+    def files_details(self) -> Dict[str, Dict[str, Any]]:
+        """Return the file details for each file in the directory (like directory_files_details)."""
+        return self.run('files_details', _shard_files_details)
+
+    def files_containing(
+        self, pattern: str, *, pattern_is_regex: bool = False, skip_binary: bool = False
+    ) -> Dict[str, List[str]]:
+        """Search for the given pattern in all of the files in the directory (like directory_files_containing)."""
+        return self.run('files_containing', _shard_files_containing, pattern, pattern_is_regex, skip_binary)
@@ -0,0 +1,174 @@
+import errno
+import os
+import shutil
+import stat
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .files import file_move, file_write
+from .throttle import WORKER_THREAD_NAME_PREFIX
+
+_DIR_FD_SUPPORTED = {os.open, os.rename, os.stat, os.unlink} <= os.supports_dir_fd
+
+
+class FileOperation(NamedTuple):
+    """A single operation for files_batch.
+
+    The action is one of 'move', 'copy', 'delete', or 'write'. The destination is used by 'move' and 'copy'
+    (and may be a directory, like file_move and file_copy); the contents are used by 'write'.
+    """
+
+    action: str
+    path: str
+    destination: Optional[str] = None
+    contents: Any = None
+
+
+class FileOperationResult(NamedTuple):
+    """The outcome of a FileOperation (the error is None if the operation succeeded)."""
+
+    operation: FileOperation
+    success: bool
+    error: Optional[Exception]
+    duration: float
+
+
+class _DirectoryFds:
+    """Open directory file descriptors which are shared by all of the operations in a group."""
+
+    def __init__(self):
+        self._fds: Dict[str, int] = {}
+
+    def resolve(self, path: str) -> Tuple[str, Optional[int]]:
+        """Return the name of the given path relative to its directory and the fd of that directory."""
+        if not _DIR_FD_SUPPORTED:  # pragma: no cover
+            return path, None
+
+        directory_path, name = os.path.split(path)
+        directory_path = directory_path or os.curdir
+        fd = self._fds.get(directory_path)
+        if fd is None:
+            fd = self._fds[directory_path] = os.open(directory_path, os.O_RDONLY | os.O_DIRECTORY)
+        return name, fd
+
+    def close(self):
+        """Close all of the directory fds."""
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+
+def _destination_path(operation: FileOperation) -> str:
+    destination = operation.destination
+    if destination is None:
+        raise ValueError(f'The {operation.action} operation on {operation.path} requires a destination')
+    if os.path.isdir(destination):
+        destination = os.path.join(destination, os.path.basename(operation.path))
+    return destination
+
+
+def _file_operation_move(operation: FileOperation, fds: _DirectoryFds):
+    destination = _destination_path(operation)
+    src_name, src_dir_fd = fds.resolve(operation.path)
+    dst_name, dst_dir_fd = fds.resolve(destination)
+    try:
+        os.rename(src_name, dst_name, src_dir_fd=src_dir_fd, dst_dir_fd=dst_dir_fd)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        # the file is moving to another file system, so it has to be copied
+        file_move(operation.path, destination)
+
+
+def _file_is_same(src_stat: os.stat_result, dst_name: str, dst_dir_fd: Optional[int]) -> bool:
+    try:
+        dst_stat = os.stat(dst_name, dir_fd=dst_dir_fd)
+    except FileNotFoundError:
+        return False
+    return (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino)
+
+
+def _file_operation_copy(operation: FileOperation, fds: _DirectoryFds):
+    destination = _destination_path(operation)
+    src_name, src_dir_fd = fds.resolve(operation.path)
+    dst_name, dst_dir_fd = fds.resolve(destination)
+    src_fd = os.open(src_name, os.O_RDONLY, dir_fd=src_dir_fd)
+    with open(src_fd, 'rb') as src_file:
+        src_stat = os.fstat(src_fd)
+        mode = stat.S_IMODE(src_stat.st_mode)
+        if _file_is_same(src_stat, dst_name, dst_dir_fd):
+            # opening the destination would empty the source (shutil.copy raises the same error)
+            raise shutil.SameFileError(f'{operation.path!r} and {destination!r} are the same file')
+        dst_fd = os.open(dst_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode, dir_fd=dst_dir_fd)
+        with open(dst_fd, 'wb') as dst_file:
+            shutil.copyfileobj(src_file, dst_file)
+            # like shutil.copy, copy the permission bits (the mode given to os.open is masked by the umask)
+            if os.chmod in os.supports_fd:
+                os.chmod(dst_fd, mode)
+    if os.chmod not in os.supports_fd:  # pragma: no cover
+        shutil.copymode(operation.path, destination)
+
+
+def _file_operation_delete(operation: FileOperation, fds: _DirectoryFds):
+    name, dir_fd = fds.resolve(operation.path)
+    os.unlink(name, dir_fd=dir_fd)
+
+
+def _file_operation_write(operation: FileOperation, _: _DirectoryFds):
+    file_write(operation.path, operation.contents)
+
+
+_FILE_OPERATIONS = {
+    'move': _file_operation_move,
+    'copy': _file_operation_copy,
+    'delete': _file_operation_delete,
+    'write': _file_operation_write,
+}
+
+
+def _file_operation_run(operation: FileOperation, fds: _DirectoryFds) -> FileOperationResult:
+    start = time.perf_counter()
+    try:
+        action = _FILE_OPERATIONS.get(operation.action)
+        if action is None:
+            raise ValueError(f'Unknown file operation: {operation.action}')
+        action(operation, fds)
+    except Exception as e:  # pylint: disable=W0703
+        return FileOperationResult(operation, False, e, time.perf_counter() - start)
+    return FileOperationResult(operation, True, None, time.perf_counter() - start)
+
+
+def _file_operations_run_group(indexed_operations: List[Tuple[int, FileOperation]]):
+    fds = _DirectoryFds()
+    try:
+        return [(index, _file_operation_run(operation, fds)) for index, operation in indexed_operations]
+    finally:
+        fds.close()
+
+
+def _file_operation_target_directory(operation: FileOperation) -> str:
+    target = operation.destination if operation.action in ('move', 'copy') and operation.destination else operation.path
+    return os.path.dirname(os.path.abspath(target))
+
+
+def files_batch(operations: Iterable[FileOperation], *, max_workers: Optional[int] = None) -> List[FileOperationResult]:
+    """Run the given file operations and return a result for each one (in the same order as the operations).
+
+    The operations are grouped by the directory they target and each group is run (in order) by a worker in a thread
+    pool. The operations in a group share open directory fds, so each directory path is only resolved once per group.
+    A failed operation does not stop the others; its error is returned in its result.
+    Operations which target different directories may run concurrently, so operations which depend on one another
+    should target the same directory (or be given in separate batches).
+    """
+    groups = defaultdict(list)
+    for index, operation in enumerate(operations):
+        operation = FileOperation(*operation)
+        groups[_file_operation_target_directory(operation)].append((index, operation))
+
+    results: Dict[int, FileOperationResult] = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=WORKER_THREAD_NAME_PREFIX) as executor:
+        for group_results in executor.map(_file_operations_run_group, groups.values()):
+            results.update(group_results)
+    return [results[index] for index in range(len(results))]
@@ -0,0 +1,124 @@
+import codecs
+import os
+import threading
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+from .throttle import _throttled_read
+
+# the number of bytes at the start of a file which are used to classify it
+SAMPLE_SIZE = 8192
+READ_SIZE = 1024 * 1024
+# text which is not valid UTF-8 is decoded as latin-1 (which can decode any bytes)
+FALLBACK_ENCODING = 'latin-1'
+# a sample with more than this fraction of control characters (other than whitespace) is binary
+MAX_CONTROL_CHARACTER_RATIO = 0.3
+MAX_CACHED_CLASSIFICATIONS = 65536
+# how text decoded with a detected encoding handles invalid bytes (the encoding is detected from a sample of the file)
+DETECTED_ENCODING_ERRORS = 'replace'
+# the bytes which may appear in text (like the heuristic used by the `file` command)
+_TEXT_BYTES = bytes({7, 8, 9, 10, 11, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7F})
+# the utf-32 boms have to be checked before the utf-16 boms (which they start with)
+_BOM_ENCODINGS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+_classifications: Dict[str, Tuple[Tuple[int, int, int], 'FileClassification']] = {}
+_classifications_lock = threading.Lock()
+
+
+class FileClassification(NamedTuple):
+    """Whether a file is binary and, if it is not, the encoding of its text."""
+
+    binary: bool
+    encoding: Optional[str]
+
+
+def _sample_classification(sample: bytes, complete: bool) -> FileClassification:
+    """Classify a file from the given sample of its first bytes (complete is True if the sample is the whole file)."""
+    for bom, encoding in _BOM_ENCODINGS:
+        if sample.startswith(bom):
+            return FileClassification(False, encoding)
+    control_characters = len(sample.translate(None, _TEXT_BYTES))
+    if b'\0' in sample or control_characters > len(sample) * MAX_CONTROL_CHARACTER_RATIO:
+        return FileClassification(True, None)
+
+    try:
+        # the sample may end in the middle of a character
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=complete)
+    except UnicodeDecodeError:
+        return FileClassification(False, FALLBACK_ENCODING)
+    return FileClassification(False, 'utf-8')
+
+
+def file_classify(file_path: str) -> FileClassification:
+    """Classify the given file as binary or text (and find the encoding of text) from the first bytes of the file.
+
+    A file is text if it starts with a byte order mark. Otherwise, it is binary if its first bytes contain a NUL byte
+    or too many control characters; if not, it is UTF-8 text if they are valid UTF-8 (or else it is latin-1 text).
+    Results are cached until the size, modification time, or inode of the file changes.
+    """
+    stat_result = os.stat(file_path)
+    signature = (stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino)
+    with _classifications_lock:
+        entry = _classifications.get(file_path)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+
+    with open(file_path, 'rb') as f:
+        sample = _throttled_read(f.read, SAMPLE_SIZE)
+    classification = _sample_classification(sample, complete=len(sample) < SAMPLE_SIZE)
+    with _classifications_lock:
+        while len(_classifications) >= MAX_CACHED_CLASSIFICATIONS:
+            # drop the oldest classifications (dicts keep their insertion order)
+            del _classifications[next(iter(_classifications))]
+        _classifications[file_path] = (signature, classification)
+    return classification
+
+
+def file_is_binary(file_path: str) -> bool:
+    """Determine if the given file is binary (see file_classify)."""
+    return file_classify(file_path).binary
+
+
+def _detected_encoding(file_path: str) -> str:
+    encoding = file_classify(file_path).encoding
+    if encoding is None:
+        raise ValueError(f'{file_path} is a binary file')
+    return encoding
+
+
+def _text_decode(data: bytes, file_path: str) -> str:
+    """Decode the given contents of a text file with the encoding detected for it (see file_text_chunks)."""
+    return data.decode(_detected_encoding(file_path), DETECTED_ENCODING_ERRORS)
+
+
+def file_text_chunks(file_path: str, *, encoding: Optional[str] = None, chunk_size: int = READ_SIZE) -> Iterator[str]:
+    """Read the given text file in chunks, decoding each chunk as it is read.
+
+    If no encoding is given, it is detected (once) with file_classify; a ValueError is raised if the file is binary.
+    The detected encoding only describes the first bytes of the file, so any bytes after them which are not valid in
+    it are replaced with U+FFFD (a given encoding is decoded strictly). Unlike file_read, newlines are not translated.
+    """
+    errors = 'strict'
+    if encoding is None:
+        encoding = _detected_encoding(file_path)
+        errors = DETECTED_ENCODING_ERRORS
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: _throttled_read(f.read, chunk_size), b''):
+            text = decoder.decode(block)
+            if text:
+                yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def file_read_text(file_path: str, *, encoding: Optional[str] = None) -> str:
+    """Read the given text file as a string, detecting its encoding if none is given (see file_text_chunks)."""
+    return ''.join(file_text_chunks(file_path, encoding=encoding))
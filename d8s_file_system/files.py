@@ -1,22 +1,101 @@
+import errno
 import fnmatch
+import functools
+import itertools
+import locale
 import ntpath
 import os
 import posixpath
-import shutil
-from typing import Any, Dict, List, Union
+import stat
+import threading
+import time
+import warnings
+from collections import deque
+from collections.abc import Iterator as IteratorABC
+from typing import Any, Deque, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from .metrics import _instrumented, _record_write
+from .throttle import WORKER_THREAD_NAME_PREFIX, _throttled_read
+
+SPARSE_COPY_CHUNK_SIZE = 1024 * 1024
+DEFAULT_PREFETCH_BYTES = 64 * 1024 * 1024
+DEFAULT_STAT_CACHE_SIZE = 65536
+# how long (in seconds) the supplementary groups of the process are cached for the permission checks
+CREDENTIALS_TTL = 1.0
+# the first chunk of an empty iterator
+_NO_CHUNK = object()
+
+
+def _file_buffer(file_contents: Any) -> Optional[Any]:
+    """Return the given contents if they can be written as bytes without being copied (or None if they can not).
+
+    Objects which support the buffer protocol (e.g. bytes, bytearray, memoryview, array.array, and mmap) are written
+    directly; the only exception is a non-contiguous buffer, which has to be copied into bytes first.
+    """
+    try:
+        view = memoryview(file_contents)
+    except TypeError:
+        return None
+    return file_contents if view.c_contiguous else view.tobytes()
+
+
+def _file_chunk_mode(chunk: Any) -> Optional[str]:
+    if isinstance(chunk, str):
+        return ''
+    elif _file_buffer(chunk) is not None:
+        return 'b'
+    return None
+
+
+def _file_chunks(mode: str, chunks: Iterable[Any]) -> Iterable[Any]:
+    return chunks if mode == '' else map(_file_buffer, chunks)
+
+
+def _file_iterator_chunks(file_contents: Iterator[Any]) -> Tuple[str, Iterable[Any]]:
+    """Return the mode and chunks of the given iterator (based on the type of its first chunk)."""
+    first_chunk = next(file_contents, _NO_CHUNK)
+    if first_chunk is _NO_CHUNK:
+        return '', ()
+
+    mode = _file_chunk_mode(first_chunk)
+    if mode is None:
+        # the iterator can not be converted to a string once it has been consumed
+        raise TypeError(f'Can not write chunks of type {type(first_chunk)} (only strings and buffers can be written)')
+    return mode, _file_chunks(mode, itertools.chain((first_chunk,), file_contents))
+
+
+def _file_contents_chunks(file_contents: Any) -> Tuple[str, Iterable[Any]]:
+    """Return the mode ('' for text or 'b' for bytes) and the chunks in which to write the given file contents.
+
+    Strings and buffers are written as a single chunk. Iterators (e.g. generators) are streamed chunk by chunk: their
+    items must all be strings or all be buffers (a TypeError is raised otherwise) and an empty iterator is written as
+    empty text. Anything else (including containers like lists, tuples, sets, and dicts) is converted to a string.
+    """
+    if isinstance(file_contents, str):
+        return '', (file_contents,)
+    buffer = _file_buffer(file_contents)
+    if buffer is not None:
+        return 'b', (buffer,)
+    if isinstance(file_contents, IteratorABC):
+        return _file_iterator_chunks(file_contents)
+
+    warnings.warn(f'Converting file contents of type {type(file_contents)} to string')
+    return '', (str(file_contents),)
 
-from .atomic_writes import atomic_write
 
+def _file_contents_bytes_chunks(file_contents: Any, encoding: Optional[str] = None) -> Iterable[Any]:
+    """Return the chunks of the given file contents as bytes (encoding strings with the given or default encoding)."""
+    mode, chunks = _file_contents_chunks(file_contents)
+    if mode == 'b':
+        return chunks
+    encoding = encoding or locale.getpreferredencoding(False)
+    return (chunk.encode(encoding) for chunk in chunks)
 
-def _file_active_action(file_path: str, base_mode: str, file_contents: Any):
+
+def _file_active_action(file_path: str, base_mode: str, file_contents: Any, **kwargs):
     """Perform an active action (write or append) with the given file contents on the given file."""
-    if isinstance(file_contents, str):
-        length_of_content = _file_action(file_path, '{}+'.format(base_mode), 'write', file_contents)
-    elif isinstance(file_contents, bytes):
-        length_of_content = _file_action(file_path, '{}b+'.format(base_mode), 'write', file_contents)
-    else:
-        print(f'Converting file contents of type {type(file_contents)} to string')
-        length_of_content = _file_active_action(file_path, base_mode, str(file_contents))
+    mode, chunks = _file_contents_chunks(file_contents)
+    length_of_content = _file_write_chunks(file_path, f'{base_mode}{mode}+', chunks, **kwargs)
 
     if length_of_content >= 0:
         result = True
@@ -27,16 +106,46 @@ def _file_active_action(file_path: str, base_mode: str, file_contents: Any):
     return result
 
 
-def _file_action(file_path, mode='r', command='read', contents=None):
+def _file_write_chunks(file_path: str, mode: str, chunks: Iterable[Any], **kwargs) -> int:
+    """Write the given chunks to the file (atomically if the file is being overwritten)."""
     if 'w' in mode:
-        with atomic_write(file_path, mode=mode) as f:  # pylint: disable=W0612  # noqa: F841
-            return eval(f'f.{command}(contents)')  # pylint: disable=W0123  # nosec
+        from .atomic_writes import atomic_write  # pylint: disable=C0415
+
+        with atomic_write(file_path, mode=mode, **kwargs) as f:
+            return sum(f.write(chunk) for chunk in chunks)
     else:
-        with open(file_path, mode) as f:  # noqa: F841
-            if contents:
-                return eval(f'f.{command}(contents)')  # pylint: disable=W0123  # nosec
-            else:
-                return eval(f'f.{command}()')  # pylint: disable=W0123  # nosec
+        with open(file_path, mode) as f:  # pylint: disable=W1514
+            length = 0
+            for chunk in chunks:
+                written = f.write(chunk)
+                _record_write(f, chunk, written)
+                length += written
+            return length
+
+
+def _file_preallocate(fd: int, size: int):
+    """Reserve size bytes of disk space for the given file (if the platform and file system support it).
+
+    This extends the file to the given size, so any unused space should be truncated once the file is written.
+    """
+    if size <= 0 or not hasattr(os, 'posix_fallocate'):
+        return
+
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError as e:
+        # not every file system supports preallocation
+        if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL, errno.ENOSYS):
+            raise
+
+
+@_instrumented
+def _file_action(file_path, mode='r', command='read', contents=None):
+    with open(file_path, mode) as f:  # noqa: F841
+        if contents:
+            return _throttled_read(eval(f'f.{command}'), contents)  # pylint: disable=W0123  # nosec
+        else:
+            return _throttled_read(eval(f'f.{command}'))  # pylint: disable=W0123  # nosec
 
 
 def is_file(path: str) -> bool:
@@ -56,12 +165,18 @@ def file_read_bytes(file_path: str) -> bytes:
     return file_text
 
 
-def file_write(file_path: str, file_contents: Any) -> bool:
-    """Write the given content to the file at the given path (including a file name)."""
-    result = _file_active_action(file_path, 'w', file_contents)
+@_instrumented
+def file_write(file_path: str, file_contents: Any, *, preallocate: Optional[int] = None) -> bool:
+    """Write the given content to the file at the given path (including a file name).
+
+    If the size of the content (in bytes) is known, passing it as preallocate reserves the space for the file before it
+    is written (reducing fragmentation on file systems which support posix_fallocate).
+    """
+    result = _file_active_action(file_path, 'w', file_contents, preallocate=preallocate)
     return result
 
 
+@_instrumented
 def file_append(file_path: str, file_contents: Any) -> bool:
     """Append the given content to the file at the given path (including a file name)."""
     result = _file_active_action(file_path, 'a', file_contents)
@@ -70,12 +185,75 @@ def file_append(file_path: str, file_contents: Any) -> bool:
 
 def file_move(starting_path: str, destination_path: str):
     """Move the file from the starting path to the destination path."""
+    import shutil  # pylint: disable=C0415
+
     shutil.move(starting_path, destination_path)
 
 
-def file_copy(starting_path: str, destination_path: str, *, preserve_metadata: bool = False):
-    """Copy the file from the starting_path to the destination path."""
-    if preserve_metadata:
+def file_is_sparse(file_path: str) -> bool:
+    """Determine if the given file is sparse (i.e. it has fewer blocks allocated than its size requires)."""
+    stat_result = os.stat(file_path)
+    # st_blocks is counted in 512-byte units (it is not available on Windows)
+    return getattr(stat_result, 'st_blocks', None) is not None and stat_result.st_blocks * 512 < stat_result.st_size
+
+
+def _file_data_segments(fd: int, size: int) -> Iterator[Tuple[int, int]]:
+    """Yield the (start, end) offsets of the data in the given file (skipping the holes)."""
+    offset = 0
+    while offset < size:
+        try:
+            start = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as e:
+            # ENXIO means that there is no more data after the offset (the rest of the file is a hole)
+            if e.errno == errno.ENXIO:
+                return
+            raise
+        offset = os.lseek(fd, start, os.SEEK_HOLE)
+        yield start, offset
+
+
+def _file_copy_range(source: Any, destination: Any, start: int, end: int):
+    """Copy the bytes from start to end of the source file to the same offsets in the destination file."""
+    source.seek(start)
+    destination.seek(start)
+    for offset in range(start, end, SPARSE_COPY_CHUNK_SIZE):
+        destination.write(_throttled_read(source.read, min(SPARSE_COPY_CHUNK_SIZE, end - offset)))
+
+
+def _file_copy_sparse(starting_path: str, destination_path: str):
+    """Copy the data in the given file, leaving holes in the destination wherever the source has them."""
+    import shutil  # pylint: disable=C0415
+
+    # opening the destination would empty the source if they are the same file (shutil.copy raises the same error)
+    if os.path.exists(destination_path) and os.path.samefile(starting_path, destination_path):
+        raise shutil.SameFileError(f'{starting_path!r} and {destination_path!r} are the same file')
+    with open(starting_path, 'rb') as source, open(destination_path, 'wb') as destination:
+        size = os.fstat(source.fileno()).st_size
+        for start, end in _file_data_segments(source.fileno(), size):
+            _file_copy_range(source, destination, start, end)
+        # this extends the file if it ends with a hole
+        destination.truncate(size)
+
+
+def file_copy(starting_path: str, destination_path: str, *, preserve_metadata: bool = False, resumable: bool = False):
+    """Copy the file from the starting_path to the destination path.
+
+    Sparse files stay sparse: only their data is copied (on platforms which support SEEK_DATA and SEEK_HOLE).
+    If resumable is True, the file is copied with file_copy_resumable (so an interrupted copy can be resumed).
+    """
+    import shutil  # pylint: disable=C0415
+
+    if resumable:
+        from .resumable_copies import file_copy_resumable  # pylint: disable=C0415
+
+        file_copy_resumable(starting_path, destination_path, preserve_metadata=preserve_metadata)
+    elif hasattr(os, 'SEEK_DATA') and file_is_sparse(starting_path):
+        if os.path.isdir(destination_path):
+            destination_path = os.path.join(destination_path, os.path.basename(starting_path))
+        _file_copy_sparse(starting_path, destination_path)
+        copy_metadata = shutil.copystat if preserve_metadata else shutil.copymode
+        copy_metadata(starting_path, destination_path)
+    elif preserve_metadata:
         shutil.copy2(starting_path, destination_path)
     else:
         shutil.copy(starting_path, destination_path)
@@ -86,12 +264,18 @@ def file_delete(file_path: str):
     os.remove(file_path)
 
 
-def file_owner_name(file_path: str) -> str:
-    """Find the owner of the file at the given path."""
+@functools.lru_cache(maxsize=None)
+def _user_name(uid: int) -> str:
+    """Find the name of the user with the given uid (the results are memoized)."""
     from pwd import getpwuid  # pylint: disable=C0415
 
+    return getpwuid(uid).pw_name
+
+
+def file_owner_name(file_path: str) -> str:
+    """Find the owner of the file at the given path."""
     file_owner_uid = os.stat(file_path).st_uid
-    owner_username = getpwuid(file_owner_uid).pw_name
+    owner_username = _user_name(file_owner_uid)
     return owner_username
 
 
@@ -99,9 +283,12 @@ def file_owner_name(file_path: str) -> str:
 # TODO: write a test for this function
 def file_change_owner(file_path: str):
     """Change the ownership of the given file."""
+    import shutil  # pylint: disable=C0415
+
     shutil.chown(file_path)
 
 
+@_instrumented
 def file_ssdeep(file_path: str) -> str:
     """Find the ssdeep fuzzy hash of the file."""
     from d8s_hashes import ssdeep  # pylint: disable=C0415
@@ -109,6 +296,7 @@ def file_ssdeep(file_path: str) -> str:
     return ssdeep(file_read_bytes(file_path))
 
 
+@_instrumented
 def file_md5(file_path: str) -> str:
     """Find the md5 hash of the given file."""
     from d8s_hashes import md5  # pylint: disable=C0415
@@ -116,6 +304,7 @@ def file_md5(file_path: str) -> str:
     return md5(file_read_bytes(file_path))
 
 
+@_instrumented
 def file_sha1(file_path: str) -> str:
     """Find the sha1 hash of the given file."""
     from d8s_hashes import sha1  # pylint: disable=C0415
@@ -123,6 +312,7 @@ def file_sha1(file_path: str) -> str:
     return sha1(file_read_bytes(file_path))
 
 
+@_instrumented
 def file_sha256(file_path: str) -> str:
     """Find the sha256 hash of the given file."""
     from d8s_hashes import sha256  # pylint: disable=C0415
@@ -130,6 +320,7 @@ def file_sha256(file_path: str) -> str:
     return sha256(file_read_bytes(file_path))
 
 
+@_instrumented
 def file_sha512(file_path: str) -> str:
     """Find the sha512 hash of the given file."""
     from d8s_hashes import sha512  # pylint: disable=C0415
@@ -176,8 +367,11 @@ def file_directory(file_path: str) -> str:
     return file_path.replace(file_name(file_path), '')
 
 
-def file_details(file_path: str) -> Dict[str, Union[str, int]]:
-    """Get file hashes and file size for the given file."""
+def file_details(file_path: str, *, chunks: bool = False) -> Dict[str, Any]:
+    """Get file hashes and file size for the given file.
+
+    If chunks is True, the details also include the file's content-defined chunks (see file_chunks).
+    """
     details = {
         'md5': file_md5(file_path),
         'sha1': file_sha1(file_path),
@@ -185,6 +379,10 @@ def file_details(file_path: str) -> Dict[str, Union[str, int]]:
         'ssdeep': file_ssdeep(file_path),
         'size': file_size(file_path),
     }
+    if chunks:
+        from .content_chunks import file_chunks  # pylint: disable=C0415
+
+        details['chunks'] = file_chunks(file_path)
     # (not sure why mypy fails here...)
     return details  # type: ignore
 
@@ -217,9 +415,12 @@ def file_contains(file_path: str, pattern: str, *, pattern_is_regex: bool = Fals
 
 def file_search(file_path: str, pattern: str, *, pattern_is_regex: bool = False) -> List[str]:
     """Search for the given pattern in the file."""
+    return _text_search(file_read(file_path), pattern, pattern_is_regex)
+
+
+def _text_search(file_text: str, pattern: str, pattern_is_regex: bool) -> List[str]:
     import re  # pylint: disable=C0415
 
-    file_text = file_read(file_path)
     if pattern_is_regex:
         return re.findall(pattern, file_text)
     else:
@@ -230,3 +431,226 @@ def file_name_matches(file_path: str, pattern: str) -> bool:
     """Return whether or not the file name contains the given pattern."""
     name = file_name(file_path)
     return fnmatch.fnmatch(name, pattern)
+
+
+@functools.lru_cache(maxsize=1)
+def _process_group_ids(gid: int, _period: int) -> FrozenSet[int]:
+    return frozenset(os.getgroups()) | {gid}
+
+
+def _process_credentials() -> Tuple[int, FrozenSet[int]]:
+    """Return the real uid and the group ids of the current process (which os.access checks against).
+
+    The supplementary groups are cached, but they are read again whenever the gid changes and at least once every
+    CREDENTIALS_TTL seconds (so the checks follow setuid, setgid, and setgroups calls).
+    """
+    return os.getuid(), _process_group_ids(os.getgid(), int(time.monotonic() // CREDENTIALS_TTL))
+
+
+class FileStatInfo:
+    """The metadata of a file, gathered from a single os.stat call.
+
+    The readable, writable, and executable checks are computed from the permission bits (the same way os.access checks
+    them for the current process) rather than with more syscalls; unlike os.access, they do not account for ACLs or
+    read-only mounts.
+    """
+
+    __slots__ = ('path', 'exists', 'is_file', 'is_directory', 'size', 'mode', 'uid', 'gid', 'mtime')
+
+    def __init__(self, path: str, stat_result: Optional[os.stat_result]):
+        self.path = path
+        self.exists = stat_result is not None
+        self.is_file = self.exists and stat.S_ISREG(stat_result.st_mode)  # type: ignore
+        self.is_directory = self.exists and stat.S_ISDIR(stat_result.st_mode)  # type: ignore
+        self.size: Optional[int] = stat_result.st_size if stat_result else None
+        self.mode: Optional[int] = stat_result.st_mode if stat_result else None
+        self.uid: Optional[int] = stat_result.st_uid if stat_result else None
+        self.gid: Optional[int] = stat_result.st_gid if stat_result else None
+        self.mtime: Optional[float] = stat_result.st_mtime if stat_result else None
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.path!r}, exists={self.exists}, size={self.size})'
+
+    def _permitted(self, access_mode: int, owner_bit: int, group_bit: int, other_bit: int) -> bool:
+        if not self.exists:
+            return False
+        if not hasattr(os, 'getuid'):  # pragma: no cover
+            # there are no posix permission bits to check (e.g. on windows)
+            return os.access(self.path, access_mode)
+
+        uid, gids = _process_credentials()
+        if uid == 0:
+            # root may read and write anything, but only execute files which have an execute bit set
+            return owner_bit != stat.S_IXUSR or self.is_directory or bool(self.mode & 0o111)  # type: ignore
+        if uid == self.uid:
+            return bool(self.mode & owner_bit)  # type: ignore
+        if self.gid in gids:
+            return bool(self.mode & group_bit)  # type: ignore
+        return bool(self.mode & other_bit)  # type: ignore
+
+    @property
+    def readable(self) -> bool:
+        """Check if the file is readable."""
+        return self._permitted(os.R_OK, stat.S_IRUSR, stat.S_IRGRP, stat.S_IROTH)
+
+    @property
+    def writable(self) -> bool:
+        """Check if the file is writable."""
+        return self._permitted(os.W_OK, stat.S_IWUSR, stat.S_IWGRP, stat.S_IWOTH)
+
+    @property
+    def executable(self) -> bool:
+        """Check if the file is executable."""
+        return self._permitted(os.X_OK, stat.S_IXUSR, stat.S_IXGRP, stat.S_IXOTH)
+
+    @property
+    def owner_name(self) -> Optional[str]:
+        """Find the name of the owner of the file."""
+        return None if self.uid is None else _user_name(self.uid)
+
+
+def file_stat_info(file_path: str) -> FileStatInfo:
+    """Get the size, type, permissions, and owner of the file at the given path with a single stat call."""
+    try:
+        stat_result: Optional[os.stat_result] = os.stat(file_path)
+    except (FileNotFoundError, NotADirectoryError):
+        stat_result = None
+    return FileStatInfo(file_path, stat_result)
+
+
+class FileStatCache:
+    """A cache of FileStatInfo records which expire after the given ttl (in seconds).
+
+    At most max_entries records are kept; the least recently used records are dropped to make room for new ones.
+    """
+
+    def __init__(self, ttl: float = 1.0, *, max_entries: int = DEFAULT_STAT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, FileStatInfo]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, file_path: str) -> FileStatInfo:
+        """Return the (possibly cached) FileStatInfo for the given path."""
+        now = time.monotonic()
+        with self._lock:
+            # the entry is moved to the end (dicts keep their insertion order, so the oldest entries come first)
+            entry = self._entries.pop(file_path, None)
+            if entry is not None and entry[0] > now:
+                self._entries[file_path] = entry
+                return entry[1]
+
+        info = file_stat_info(file_path)
+        with self._lock:
+            while len(self._entries) >= max(self.max_entries, 1):
+                del self._entries[next(iter(self._entries))]
+            self._entries[file_path] = (now + self.ttl, info)
+        return info
+
+    def invalidate(self, file_path: Optional[str] = None):
+        """Drop the cached record for the given path (or all cached records if no path is given)."""
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(file_path, None)
+
+
+def file_stat_infos(
+    file_paths: Iterable[str], *, max_workers: Optional[int] = None, cache: Optional[FileStatCache] = None
+) -> Dict[str, FileStatInfo]:
+    """Get the FileStatInfo for each of the given paths, running the stat calls in a thread pool."""
+    from concurrent.futures import ThreadPoolExecutor  # pylint: disable=C0415
+
+    file_paths = list(file_paths)
+    stat_function = file_stat_info if cache is None else cache.get
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=WORKER_THREAD_NAME_PREFIX) as executor:
+        return dict(zip(file_paths, executor.map(stat_function, file_paths)))
+
+
+def _file_read_ahead(file_path: str, binary: bool) -> Any:
+    """Read the given file after telling the kernel that all of it will be needed (so it can start reading ahead)."""
+    with open(file_path, 'rb' if binary else 'r') as f:  # pylint: disable=W1514
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        return _throttled_read(f.read)
+
+
+class _FilePrefetcher:
+    """Read files (in order) from an executor, keeping a bounded number of files and bytes read ahead."""
+
+    def __init__(self, file_paths: Iterable[str], executor: Any, prefetch: int, max_buffered_bytes: int, binary: bool):
+        self._file_paths = iter(file_paths)
+        self._executor = executor
+        self._prefetch = prefetch
+        self._max_buffered_bytes = max_buffered_bytes
+        self._binary = binary
+        self._pending: Deque[Tuple[str, int, Any]] = deque()
+        self._buffered_bytes = 0
+        self._next = self._next_path()
+
+    def _next_path(self) -> Optional[Tuple[str, int]]:
+        file_path = next(self._file_paths, None)
+        if file_path is None:
+            return None
+        try:
+            size = os.stat(file_path).st_size
+        except OSError:
+            # the error is raised when the file is read
+            size = 0
+        return file_path, size
+
+    def _can_submit(self) -> bool:
+        if self._next is None or len(self._pending) >= self._prefetch:
+            return False
+        # the next file is always read (even if it is larger than max_buffered_bytes) so that reading never stalls
+        return not self._pending or self._buffered_bytes + self._next[1] <= self._max_buffered_bytes
+
+    def _submit(self):
+        while self._can_submit():
+            file_path, size = self._next  # type: ignore
+            self._pending.append((file_path, size, self._executor.submit(_file_read_ahead, file_path, self._binary)))
+            self._buffered_bytes += size
+            self._next = self._next_path()
+
+    def __iter__(self) -> Iterator[Tuple[str, Any]]:
+        self._submit()
+        while self._pending:
+            file_path, size, future = self._pending.popleft()
+            self._buffered_bytes -= size
+            file_contents = future.result()
+            self._submit()
+            yield file_path, file_contents
+
+    def cancel(self):
+        """Cancel the reads which have not started yet (e.g. when the files are no longer needed)."""
+        for _, _, future in self._pending:
+            future.cancel()
+
+
+def files_read_prefetched(
+    file_paths: Iterable[str],
+    *,
+    prefetch: int = 4,
+    max_buffered_bytes: int = DEFAULT_PREFETCH_BYTES,
+    binary: bool = False,
+) -> Iterator[Tuple[str, Any]]:
+    """Read the given files (in order), reading up to `prefetch` files ahead in background threads.
+
+    This overlaps the time spent waiting on the disk with the time spent processing each file. The files which are read
+    ahead are limited to max_buffered_bytes (by their sizes), although the next file is always read ahead. Files are
+    read as strings (or as bytes if binary is True); errors are raised when the file which caused them is reached.
+    """
+    from concurrent.futures import ThreadPoolExecutor  # pylint: disable=C0415
+
+    executor = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix=WORKER_THREAD_NAME_PREFIX)
+    prefetcher = _FilePrefetcher(file_paths, executor, prefetch, max_buffered_bytes, binary)
+    try:
+        yield from prefetcher
+    finally:
+        # this is what shutdown(cancel_futures=True) does (which is only available in python 3.9 and later)
+        prefetcher.cancel()
+        executor.shutdown()
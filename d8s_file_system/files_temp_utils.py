@@ -0,0 +1,17 @@
+import contextlib
+import tempfile
+from typing import IO, Any, Iterator, Optional
+
+from .directories_temp_utils import ScratchPool, default_scratch_pool
+
+
+@contextlib.contextmanager
+def scratch_file(*, size_hint: int = 0, pool: Optional[ScratchPool] = None, **kwargs) -> Iterator[IO[Any]]:
+    """Create a temporary file in the given scratch pool (or the default pool) and delete it when the context exits.
+
+    The file is created in the first of the pool's roots with room for size_hint bytes. The kwargs (e.g. mode, suffix,
+    or prefix) are passed to tempfile.NamedTemporaryFile.
+    """
+    with (pool or default_scratch_pool()).reservation(size_hint) as directory_path:
+        with tempfile.NamedTemporaryFile(dir=directory_path, **kwargs) as f:
+            yield f
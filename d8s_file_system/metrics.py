@@ -0,0 +1,239 @@
+import bisect
+import contextlib
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+# the upper bounds (in seconds) of the latency histogram buckets (there is also an implicit bucket for anything slower)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_active_metrics: Optional['FileMetrics'] = None
+# the operations which are running in each thread (the io of an operation is counted for all of the operations in it)
+_thread_state = threading.local()
+
+
+class MetricsEvent(NamedTuple):
+    """A single instrumented operation (passed to the FileMetrics callback as soon as the operation finishes)."""
+
+    operation: str
+    latency: float
+    bytes_read: int
+    bytes_written: int
+    read_calls: int
+    write_calls: int
+    error: Optional[BaseException]
+
+
+class OperationMetrics:
+    """The metrics recorded for all of the calls of one operation.
+
+    The read and write calls are the number of reads and writes made on the files (a proxy for the number of syscalls).
+    """
+
+    __slots__ = (
+        'calls',
+        'errors',
+        'bytes_read',
+        'bytes_written',
+        'read_calls',
+        'write_calls',
+        'latency_sum',
+        'latency_buckets',
+        'latency_counts',
+    )
+
+    def __init__(self, latency_buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.calls = 0
+        self.errors = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.read_calls = 0
+        self.write_calls = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = tuple(latency_buckets)
+        # the number of calls in each bucket (the last count is for the calls slower than the largest bucket)
+        self.latency_counts = [0] * (len(self.latency_buckets) + 1)
+
+    def __repr__(self):
+        return f'{type(self).__name__}(calls={self.calls}, errors={self.errors}, latency_sum={self.latency_sum:.6f})'
+
+    def add(self, event: MetricsEvent):
+        """Add the given event to the metrics."""
+        self.calls += 1
+        self.errors += event.error is not None
+        self.bytes_read += event.bytes_read
+        self.bytes_written += event.bytes_written
+        self.read_calls += event.read_calls
+        self.write_calls += event.write_calls
+        self.latency_sum += event.latency
+        self.latency_counts[bisect.bisect_left(self.latency_buckets, event.latency)] += 1
+
+    def latency_histogram(self) -> Dict[float, int]:
+        """Return the number of calls which took at most each bucket's bound (cumulative, like Prometheus histograms).
+
+        The last bucket's bound is infinity (so its count is the number of calls).
+        """
+        bounds = self.latency_buckets + (float('inf'),)
+        counts = 0
+        histogram = {}
+        for bound, count in zip(bounds, self.latency_counts):
+            counts += count
+            histogram[bound] = counts
+        return histogram
+
+    def copy(self) -> 'OperationMetrics':
+        """Return a copy of the metrics."""
+        metrics = type(self)(self.latency_buckets)
+        for name in self.__slots__:
+            setattr(metrics, name, getattr(self, name))
+        metrics.latency_counts = list(self.latency_counts)
+        return metrics
+
+
+class FileMetrics:
+    """Record metrics for the file operations of this package (from any thread) while the metrics are active.
+
+    Use the metrics as a context manager to activate them. The operations which are instrumented are file reads
+    (_file_action), file_write, file_append, the file hash helpers, the directory walkers, and atomic_write. If on_event
+    is given, it is called with a MetricsEvent after each operation (e.g. to export the metrics to Prometheus). While
+    no metrics are active, the instrumented functions only check a global before calling the function they wrap.
+    """
+
+    def __init__(
+        self,
+        *,
+        on_event: Optional[Callable[[MetricsEvent], None]] = None,
+        latency_buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.on_event = on_event
+        self.latency_buckets = tuple(sorted(latency_buckets))
+        self._operations: Dict[str, OperationMetrics] = {}
+        self._lock = threading.Lock()
+        self._previous_metrics: Optional[FileMetrics] = None
+
+    def __enter__(self):
+        global _active_metrics  # pylint: disable=W0603
+        self._previous_metrics, _active_metrics = _active_metrics, self
+        return self
+
+    def __exit__(self, *args):
+        global _active_metrics  # pylint: disable=W0603
+        _active_metrics, self._previous_metrics = self._previous_metrics, None
+
+    def record(self, event: MetricsEvent):
+        """Add the given event to the metrics of its operation and pass it to the on_event callback."""
+        with self._lock:
+            operation_metrics = self._operations.get(event.operation)
+            if operation_metrics is None:
+                operation_metrics = self._operations[event.operation] = OperationMetrics(self.latency_buckets)
+            operation_metrics.add(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def snapshot(self) -> Dict[str, OperationMetrics]:
+        """Return a copy of the metrics recorded so far for each operation."""
+        with self._lock:
+            return {operation: metrics.copy() for operation, metrics in self._operations.items()}
+
+    def reset(self):
+        """Drop all of the metrics recorded so far."""
+        with self._lock:
+            self._operations.clear()
+
+
+class _Span:
+    """The io counted for a running operation."""
+
+    __slots__ = ('bytes_read', 'bytes_written', 'read_calls', 'write_calls')
+
+    def __init__(self):
+        self.bytes_read = self.bytes_written = self.read_calls = self.write_calls = 0
+
+
+def _running_spans() -> List[_Span]:
+    spans = getattr(_thread_state, 'spans', None)
+    if spans is None:
+        spans = _thread_state.spans = []
+    return spans
+
+
+@contextlib.contextmanager
+def _measured_operation(metrics: FileMetrics, operation: str) -> Iterator[_Span]:
+    spans = _running_spans()
+    span = _Span()
+    spans.append(span)
+    error = None
+    start = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        latency = time.perf_counter() - start
+        spans.pop()
+        counts = (span.bytes_read, span.bytes_written, span.read_calls, span.write_calls)
+        metrics.record(MetricsEvent(operation, latency, *counts, error))
+
+
+@contextlib.contextmanager
+def _measured(operation: str) -> Iterator[None]:
+    """Measure the code in the context as the given operation (if metrics are active)."""
+    metrics = _active_metrics
+    if metrics is None:
+        yield
+        return
+
+    with _measured_operation(metrics, operation):
+        yield
+
+
+def _instrumented(function: Callable) -> Callable:
+    """Measure each call of the given function (named after the function without any leading underscores)."""
+    operation = function.__name__.lstrip('_')
+
+    @functools.wraps(function)
+    def instrumented_function(*args, **kwargs):
+        metrics = _active_metrics
+        if metrics is None:
+            return function(*args, **kwargs)
+        with _measured_operation(metrics, operation):
+            return function(*args, **kwargs)
+
+    return instrumented_function
+
+
+def _record_io(*, bytes_read: int = 0, bytes_written: int = 0, read_calls: int = 0, write_calls: int = 0):
+    """Count the given io for all of the operations running in this thread."""
+    for span in getattr(_thread_state, 'spans', ()):
+        span.bytes_read += bytes_read
+        span.bytes_written += bytes_written
+        span.read_calls += read_calls
+        span.write_calls += write_calls
+
+
+def _record_write(f: Any, data: Any, written: int):
+    """Count a write of the given data to the given file for all of the operations running in this thread."""
+    if not getattr(_thread_state, 'spans', None):
+        return
+    if isinstance(data, str):
+        # text files return the number of characters written (rather than the number of bytes)
+        written = len(data[:written].encode(f.encoding, f.errors))
+    _record_io(bytes_written=written, write_calls=1)
+
+
+def _counted_writes(f: Any):
+    """Count each call of the given file's write method (see _record_write)."""
+    write = f.write
+
+    def counted_write(data):
+        written = write(data)
+        _record_write(f, data, written)
+        return written
+
+    f.write = counted_write
+
+
+def _metrics_active() -> bool:
+    return _active_metrics is not None
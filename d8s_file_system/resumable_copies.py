@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from atomicwrites import replace_atomic
+
+from .atomic_writes import atomic_write
+from .files import _file_preallocate
+from .metrics import _instrumented, _record_io
+from .throttle import WORKER_THREAD_NAME_PREFIX, _throttled_read
+
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+# the size of the reads and writes in which each chunk is copied
+COPY_BLOCK_SIZE = 1024 * 1024
+PARTIAL_FILE_SUFFIX = '.partial'
+CHECKPOINT_FILE_SUFFIX = '.checkpoint'
+# O_BINARY only exists (and is needed) on Windows
+_OPEN_FLAGS = getattr(os, 'O_BINARY', 0)
+
+
+def _pread(fd: int, length: int, offset: int) -> bytes:
+    if hasattr(os, 'pread'):
+        return os.pread(fd, length, offset)
+    os.lseek(fd, offset, os.SEEK_SET)  # pragma: no cover
+    return os.read(fd, length)  # pragma: no cover
+
+
+def _pwrite(fd: int, data: bytes, offset: int) -> int:
+    if hasattr(os, 'pwrite'):
+        return os.pwrite(fd, data, offset)
+    os.lseek(fd, offset, os.SEEK_SET)  # pragma: no cover
+    return os.write(fd, data)  # pragma: no cover
+
+
+def _chunk_blocks(fd: int, offset: int, length: int) -> Iterator[Tuple[int, bytes]]:
+    """Yield the (offset, data) of the blocks in the given range of the file."""
+    end = offset + length
+    while offset < end:
+        data = _throttled_read(_pread, fd, min(COPY_BLOCK_SIZE, end - offset), offset)
+        if not data:
+            return
+        yield offset, data
+        offset += len(data)
+
+
+def _chunk_digest(fd: int, offset: int, length: int, algorithm: str) -> str:
+    hash_object = hashlib.new(algorithm)
+    for _, data in _chunk_blocks(fd, offset, length):
+        hash_object.update(data)
+    return hash_object.hexdigest()
+
+
+@_instrumented
+def _chunk_copy(source_fd: int, destination_fd: int, offset: int, length: int, algorithm: str) -> str:
+    """Copy the given range of the source to the same offsets in the destination and return the digest of the range."""
+    hash_object = hashlib.new(algorithm)
+    for block_offset, data in _chunk_blocks(source_fd, offset, length):
+        hash_object.update(data)
+        written = 0
+        while written < len(data):
+            written += _pwrite(destination_fd, data[written:], block_offset + written)
+        _record_io(bytes_written=written, write_calls=1)
+    return hash_object.hexdigest()
+
+
+class _ResumableCopy:
+    """The state of one resumable copy (see file_copy_resumable)."""
+
+    def __init__(
+        self,
+        starting_path: str,
+        destination_path: str,
+        checkpoint_path: str,
+        chunk_size: int,
+        algorithm: str,
+        *,
+        preallocate: bool = False,
+    ):
+        self.starting_path = starting_path
+        self.destination_path = destination_path
+        self.partial_path = destination_path + PARTIAL_FILE_SUFFIX
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+        self.algorithm = algorithm
+        self.preallocate = preallocate
+        stat_result = os.stat(starting_path)
+        self.size = stat_result.st_size
+        self.header = {
+            'source': os.path.abspath(starting_path),
+            'size': stat_result.st_size,
+            'mtime_ns': stat_result.st_mtime_ns,
+            'chunk_size': chunk_size,
+            'algorithm': algorithm,
+        }
+
+    def chunk_range(self, index: int) -> Tuple[int, int]:
+        """Return the offset and length of the given chunk."""
+        offset = index * self.chunk_size
+        return offset, min(self.chunk_size, self.size - offset)
+
+    def read_checkpoint(self) -> Optional[Dict[int, str]]:
+        """Return the digests of the chunks which the checkpoint says were copied (or None if it can not be used).
+
+        The checkpoint can not be used if it is missing or if the source (or the chunking) changed since it was written.
+        """
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        if not lines or _json_line(lines[0]) != self.header or not os.path.isfile(self.partial_path):
+            return None
+
+        digests = {}
+        for line in lines[1:]:
+            entry = _json_line(line)
+            if entry is None:
+                # the copy was interrupted while this line was being written
+                break
+            digests[entry['chunk']] = entry['digest']
+        return digests
+
+    def open_partial_file(self, resume: bool) -> int:
+        """Open the partial file (emptying it unless the copy is being resumed) and size it like the source.
+
+        If preallocate is True, the disk space for a new partial file is reserved before it is sized (see
+        _file_preallocate).
+        """
+        fd = os.open(self.partial_path, os.O_RDWR | os.O_CREAT | _OPEN_FLAGS | (0 if resume else os.O_TRUNC), 0o600)
+        if self.preallocate and not resume:
+            _file_preallocate(fd, self.size)
+        os.ftruncate(fd, self.size)
+        return fd
+
+    def copy_chunk(
+        self, source_fd: int, destination_fd: int, index: int, digest: Optional[str]
+    ) -> Tuple[int, str, int]:
+        """Copy the given chunk (unless it was already copied) and return its index, digest, and the bytes copied."""
+        offset, length = self.chunk_range(index)
+        if digest is not None and _chunk_digest(destination_fd, offset, length, self.algorithm) == digest:
+            return index, digest, 0
+        return index, _chunk_copy(source_fd, destination_fd, offset, length, self.algorithm), length
+
+    def copy_chunks(
+        self, source_fd: int, destination_fd: int, digests: Dict[int, str], workers: int
+    ) -> Iterator[Tuple[int, str, int]]:
+        """Yield the index, digest, and bytes copied of each chunk as soon as it is copied (or verified)."""
+        chunk_count = -(-self.size // self.chunk_size)
+        if workers <= 1 or not hasattr(os, 'pwrite'):
+            for index in range(chunk_count):
+                yield self.copy_chunk(source_fd, destination_fd, index, digests.get(index))
+            return
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=WORKER_THREAD_NAME_PREFIX) as executor:
+            futures = [
+                executor.submit(self.copy_chunk, source_fd, destination_fd, index, digests.get(index))
+                for index in range(chunk_count)
+            ]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def copy(self, workers: int) -> int:
+        """Copy (or verify) every chunk into the partial file and return the number of bytes which were copied."""
+        digests = self.read_checkpoint()
+        source_fd = os.open(self.starting_path, os.O_RDONLY | _OPEN_FLAGS)
+        try:
+            destination_fd = self.open_partial_file(resume=digests is not None)
+            try:
+                copied_bytes = self._copy_with_checkpoint(source_fd, destination_fd, digests or {}, workers)
+                os.fsync(destination_fd)
+            finally:
+                os.close(destination_fd)
+        finally:
+            os.close(source_fd)
+        return copied_bytes
+
+    def _copy_with_checkpoint(self, source_fd: int, destination_fd: int, digests: Dict[int, str], workers: int) -> int:
+        # the checkpoint is rewritten with only the header; each chunk is appended once it is verified or copied again
+        with atomic_write(self.checkpoint_path, mode='w', encoding='utf-8') as f:
+            f.write(json.dumps(self.header) + '\n')
+
+        copied_bytes = 0
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+            for index, digest, length in self.copy_chunks(source_fd, destination_fd, digests, workers):
+                checkpoint.write(json.dumps({'chunk': index, 'digest': digest}) + '\n')
+                checkpoint.flush()
+                copied_bytes += length
+        return copied_bytes
+
+    def commit(self, preserve_metadata: bool):
+        """Rename the partial file to the destination and delete the checkpoint."""
+        copy_metadata = shutil.copystat if preserve_metadata else shutil.copymode
+        copy_metadata(self.starting_path, self.partial_path)
+        # this is how atomic_write commits a file which may be overwritten
+        replace_atomic(self.partial_path, self.destination_path)
+        os.remove(self.checkpoint_path)
+
+
+def _json_line(line: str) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def file_copy_resumable(
+    starting_path: str,
+    destination_path: str,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+    checkpoint_path: Optional[str] = None,
+    algorithm: str = 'sha256',
+    preserve_metadata: bool = False,
+    preallocate: bool = False,
+) -> int:
+    """Copy the file from the starting_path to the destination path so that an interrupted copy can be resumed.
+
+    The file is copied chunk by chunk into a partial file next to the destination (the destination path with a .partial
+    suffix). The digest of each chunk is appended to a checkpoint file (by default, the destination path with a
+    .checkpoint suffix) once it is copied. If the copy is interrupted, calling this function again verifies the chunks
+    which the checkpoint lists and only copies the chunks which are missing or corrupt (the copy starts over if the
+    source changed). Once every chunk is copied, the partial file is renamed to the destination atomically. If workers
+    is more than one, that many chunks are copied in parallel (with pread and pwrite). Return the number of bytes which
+    were copied (not counting the chunks which were already copied). If preallocate is True, the disk space for the
+    partial file is reserved before the copy starts (reducing fragmentation on file systems which support
+    posix_fallocate).
+    """
+    if os.path.isdir(destination_path):
+        destination_path = os.path.join(destination_path, os.path.basename(starting_path))
+    checkpoint_path = checkpoint_path or destination_path + CHECKPOINT_FILE_SUFFIX
+
+    resumable_copy = _ResumableCopy(
+        starting_path, destination_path, checkpoint_path, chunk_size, algorithm, preallocate=preallocate
+    )
+    copied_bytes = resumable_copy.copy(workers)
+    resumable_copy.commit(preserve_metadata)
+    return copied_bytes
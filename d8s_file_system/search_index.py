@@ -0,0 +1,205 @@
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .directories import directory_file_paths
+from .files import file_read
+
+try:
+    from re import _parser as sre_parse  # type: ignore
+except ImportError:  # pragma: no cover
+    import sre_parse  # type: ignore  # pylint: disable=W4901
+
+TRIGRAM_LENGTH = 3
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Return the set of all trigrams in the given text."""
+    return {text[start:end] for start, end in enumerate(range(TRIGRAM_LENGTH, len(text) + 1))}
+
+
+def _regex_literal_runs(pattern: str) -> List[str]:
+    """Return the literal strings which every match of the given regex must contain.
+
+    Only literals at the top level of the pattern are considered (anything inside of a group, branch, or repetition
+    may be skipped by a match). If the pattern is case-insensitive, no literals are returned.
+    """
+    parsed = sre_parse.parse(pattern)
+    if parsed.state.flags & re.IGNORECASE:
+        return []
+
+    runs = []
+    current_run: List[str] = []
+    for op, value in parsed:
+        if op is sre_parse.LITERAL:  # pylint: disable=E1101
+            current_run.append(chr(value))
+        else:
+            runs.append(''.join(current_run))
+            current_run = []
+    runs.append(''.join(current_run))
+    return [run for run in runs if len(run) >= TRIGRAM_LENGTH]
+
+
+class _PostingList:
+    """Sorted file ids stored as delta-encoded varints (so ids which are close together take a byte each)."""
+
+    __slots__ = ('data', 'count', 'last')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.count = 0
+        self.last = 0
+
+    def append(self, file_id: int):
+        """Add the given file id (which must be larger than all of the ids already in the list)."""
+        delta = file_id - self.last
+        # each byte holds 7 bits of the delta (lowest first); the high bit is set on every byte but the last
+        while delta >= 0x80:
+            self.data.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        self.data.append(delta)
+        self.last = file_id
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def file_ids(self) -> Iterator[int]:
+        """Decode the file ids in the list."""
+        file_id = delta = shift = 0
+        for byte in self.data:
+            delta |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+            else:
+                file_id += delta
+                yield file_id
+                delta = shift = 0
+
+
+class TrigramIndex:
+    """An inverted trigram index over the contents of the files in a directory.
+
+    The index is used to narrow down which files could contain a pattern so that only those files are read.
+    Call `update` to bring the index up to date with the directory (only files whose size or modification time
+    changed are re-read).
+    """
+
+    def __init__(self, directory_path: str, *, recursive: bool = False, compact_ratio: float = 0.5):
+        self.directory_path = directory_path
+        self.recursive = recursive
+        self.compact_ratio = compact_ratio
+        self._postings: Dict[str, _PostingList] = {}
+        # the file path for each file id (or None if the file has been changed or deleted since it was indexed)
+        self._paths: List[Optional[str]] = []
+        self._file_ids: Dict[str, int] = {}
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+        # files which could not be read as text are never filtered out by the index
+        self._unindexed: Set[str] = set()
+        self._dead_count = 0
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _remove(self, file_path: str):
+        file_id = self._file_ids.pop(file_path, None)
+        if file_id is not None:
+            self._paths[file_id] = None
+            self._dead_count += 1
+        self._unindexed.discard(file_path)
+        self._signatures.pop(file_path, None)
+
+    def _add(self, file_path: str, signature: Tuple[int, int]):
+        self._signatures[file_path] = signature
+        try:
+            text = file_read(file_path)
+        except (UnicodeDecodeError, OSError):
+            self._unindexed.add(file_path)
+            return
+
+        file_id = len(self._paths)
+        self._paths.append(file_path)
+        self._file_ids[file_path] = file_id
+        for trigram in _trigrams(text):
+            posting_list = self._postings.get(trigram)
+            if posting_list is None:
+                posting_list = self._postings[trigram] = _PostingList()
+            posting_list.append(file_id)
+
+    def _compact(self):
+        """Drop the ids of changed and deleted files from the posting lists and renumber the remaining files."""
+        live_paths = [path for path in self._paths if path is not None]
+        new_ids = {self._file_ids[path]: file_id for file_id, path in enumerate(live_paths)}
+
+        postings = {}
+        for trigram, posting_list in self._postings.items():
+            compacted = _PostingList()
+            for old_id in filter(new_ids.__contains__, posting_list.file_ids()):
+                compacted.append(new_ids[old_id])
+            if compacted:
+                postings[trigram] = compacted
+
+        self._postings = postings
+        self._paths = list(live_paths)
+        self._file_ids = {path: file_id for file_id, path in enumerate(live_paths)}
+        self._dead_count = 0
+
+    def _current_signatures(self) -> Dict[str, Tuple[int, int]]:
+        signatures = {}
+        for file_path in directory_file_paths(self.directory_path, recursive=self.recursive):
+            try:
+                stat_result = os.stat(file_path)
+            except FileNotFoundError:
+                # the file was deleted while we were walking the directory
+                continue
+            signatures[file_path] = (stat_result.st_size, stat_result.st_mtime_ns)
+        return signatures
+
+    def update(self) -> List[str]:
+        """Bring the index up to date with the directory and return the paths of the files which were (re)indexed."""
+        current_signatures = self._current_signatures()
+
+        for file_path in set(self._signatures) - set(current_signatures):
+            self._remove(file_path)
+
+        updated_paths = [
+            path for path, signature in current_signatures.items() if self._signatures.get(path) != signature
+        ]
+        for file_path in updated_paths:
+            self._remove(file_path)
+            self._add(file_path, current_signatures[file_path])
+
+        if self._paths and self._dead_count / len(self._paths) > self.compact_ratio:
+            self._compact()
+
+        return updated_paths
+
+    def _candidate_ids(self, required_trigrams: Set[str]) -> Set[int]:
+        posting_lists = []
+        for trigram in required_trigrams:
+            posting_list = self._postings.get(trigram)
+            if posting_list is None:
+                return set()
+            posting_lists.append(posting_list)
+
+        # intersect the posting lists starting with the shortest one to keep the working set small
+        posting_lists.sort(key=len)
+        candidate_ids = set(posting_lists[0].file_ids())
+        for posting_list in posting_lists[1:]:
+            if not candidate_ids:
+                break
+            candidate_ids.intersection_update(posting_list.file_ids())
+        return candidate_ids
+
+    def candidate_paths(self, pattern: str, *, pattern_is_regex: bool = False) -> List[str]:
+        """Return the paths of the indexed files which could contain the given pattern."""
+        required_literals = _regex_literal_runs(pattern) if pattern_is_regex else [pattern]
+        required_trigrams: Set[str] = set()
+        for literal in required_literals:
+            required_trigrams.update(_trigrams(literal))
+
+        if required_trigrams:
+            candidates = [self._paths[file_id] for file_id in sorted(self._candidate_ids(required_trigrams))]
+        else:
+            candidates = self._paths
+        return [path for path in candidates if path is not None] + sorted(self._unindexed)
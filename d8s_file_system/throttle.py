@@ -0,0 +1,148 @@
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional, Set
+
+from .metrics import _metrics_active, _record_io
+
+# the rates are scaled down to (at most) this fraction of the configured rates when the read latency is too high
+MIN_RATE_FACTOR = 1 / 64
+RATE_FACTOR_INCREMENT = 0.1
+# the rate factor is adjusted at most this often (in seconds) so a burst of slow reads only backs off once
+RATE_FACTOR_ADJUSTMENT_INTERVAL = 1.0
+# the name prefix of the worker threads which this package starts (only these threads are reniced by an IOThrottle)
+WORKER_THREAD_NAME_PREFIX = 'd8s_file_system'
+
+_active_throttle: Optional['IOThrottle'] = None
+
+
+class _TokenBucket:
+    """A token bucket which may go into debt (so operations can be charged after they happen)."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def charge(self, amount: float, rate_factor: float) -> float:
+        """Take the given amount of tokens and return how long to wait until the bucket is out of debt."""
+        now = time.monotonic()
+        rate = self.rate * rate_factor
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * rate) - amount
+        self.updated = now
+        return max(0.0, -self.tokens / rate)
+
+
+class IOThrottle:
+    """Limit the rate of the reads made by this package (from any thread) while the throttle is active.
+
+    Use the throttle as a context manager to activate it. Reads are limited to ops_per_second and bytes_per_second
+    (either may be None), with bursts of up to burst_seconds worth of each. If a latency_target (in seconds) is given,
+    the rates are halved whenever the (smoothed) read latency rises above it and are increased additively (back to the
+    configured rates) while it stays below it. If nice is given, the worker threads which this package starts (e.g.
+    for parallel copies and deletes) are reniced to it when they read while the throttle is active; on Linux, this also
+    lowers their I/O priority under the CFQ and BFQ I/O schedulers (which derive a thread's best-effort I/O priority
+    from its niceness). Other threads are never reniced: raising a thread's priority back requires extra privileges,
+    so their niceness could not be restored once the throttle exits (the package's workers end with their calls).
+    """
+
+    def __init__(
+        self,
+        *,
+        bytes_per_second: Optional[float] = None,
+        ops_per_second: Optional[float] = None,
+        burst_seconds: float = 1.0,
+        latency_target: Optional[float] = None,
+        latency_smoothing: float = 0.2,
+        nice: Optional[int] = None,
+    ):
+        self._bytes = _TokenBucket(bytes_per_second, bytes_per_second * burst_seconds) if bytes_per_second else None
+        self._ops = _TokenBucket(ops_per_second, ops_per_second * burst_seconds) if ops_per_second else None
+        self.latency_target = latency_target
+        self.latency_smoothing = latency_smoothing
+        self.nice = nice
+        self.latency: Optional[float] = None
+        self.rate_factor = 1.0
+        self._rate_factor_adjusted = time.monotonic()
+        self._lock = threading.Lock()
+        self._reniced_threads: Set[int] = set()
+        self._previous_throttle: Optional[IOThrottle] = None
+
+    def __enter__(self):
+        global _active_throttle  # pylint: disable=W0603
+        self._previous_throttle, _active_throttle = _active_throttle, self
+        return self
+
+    def __exit__(self, *args):
+        global _active_throttle  # pylint: disable=W0603
+        _active_throttle, self._previous_throttle = self._previous_throttle, None
+        self._reniced_threads.clear()
+
+    def _renice_current_thread(self):
+        if self.nice is None or not threading.current_thread().name.startswith(WORKER_THREAD_NAME_PREFIX):
+            return
+
+        thread_id = threading.get_native_id()
+        if thread_id in self._reniced_threads or not sys.platform.startswith('linux'):
+            return
+        self._reniced_threads.add(thread_id)
+        try:
+            # on Linux, each thread has its own niceness (which setpriority takes by thread id)
+            os.setpriority(os.PRIO_PROCESS, thread_id, self.nice)
+        except PermissionError:
+            # a thread's niceness can only be lowered with extra privileges
+            pass
+
+    def wait(self):
+        """Wait until the next read may start (this takes an op from the bucket and waits out any byte debt)."""
+        self._renice_current_thread()
+        charges = [(bucket, amount) for bucket, amount in ((self._ops, 1), (self._bytes, 0)) if bucket is not None]
+        with self._lock:
+            delay = max((bucket.charge(amount, self.rate_factor) for bucket, amount in charges), default=0.0)
+        if delay:
+            time.sleep(delay)
+
+    def _adjust_rate_factor(self, latency: float):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.latency_smoothing * (latency - self.latency)
+
+        now = time.monotonic()
+        if now - self._rate_factor_adjusted < RATE_FACTOR_ADJUSTMENT_INTERVAL:
+            return
+        self._rate_factor_adjusted = now
+        if self.latency > self.latency_target:  # type: ignore
+            self.rate_factor = max(MIN_RATE_FACTOR, self.rate_factor / 2)
+        else:
+            self.rate_factor = min(1.0, self.rate_factor + RATE_FACTOR_INCREMENT)
+
+    def record(self, byte_count: int, latency: float):
+        """Charge the bytes read by a read which took the given latency (in seconds)."""
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes.charge(byte_count, self.rate_factor)
+            if self.latency_target is not None:
+                self._adjust_rate_factor(latency)
+
+
+def _throttled_read(read_function: Callable[..., Any], *args) -> Any:
+    """Call the given read function under the active IOThrottle (if there is one), counting it in the active metrics.
+
+    The function may return the data it read or (like readinto) the number of bytes it read.
+    """
+    throttle = _active_throttle
+    if throttle is None and not _metrics_active():
+        return read_function(*args)
+
+    if throttle is not None:
+        throttle.wait()
+    start = time.monotonic()
+    result = read_function(*args)
+    byte_count = result if isinstance(result, int) else len(result)
+    _record_io(bytes_read=byte_count, read_calls=1)
+    if throttle is not None:
+        throttle.record(byte_count, time.monotonic() - start)
+    return result
@@ -0,0 +1,112 @@
+import array
+import bz2
+import gzip
+import lzma
+import os
+
+import pytest
+
+from d8s_file_system import (
+    directory_create,
+    directory_delete,
+    directory_exists,
+    directory_files_read_decompressed,
+    file_append_compressed,
+    file_compression,
+    file_read_bytes,
+    file_read_bytes_decompressed,
+    file_read_chunks_decompressed,
+    file_read_decompressed,
+    file_write,
+    file_write_compressed,
+)
+
+TEST_DIRECTORY_PATH = './test_compressed_files'
+CODEC_EXTENSIONS = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}
+DECOMPRESSORS = {'gzip': gzip.decompress, 'bz2': bz2.decompress, 'xz': lzma.decompress}
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(TEST_DIRECTORY_PATH)
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+@pytest.mark.parametrize('codec', ['gzip', 'bz2', 'xz'])
+def test_file_write_compressed_1(codec):
+    file_path = os.path.join(TEST_DIRECTORY_PATH, 'a' + CODEC_EXTENSIONS[codec])
+    assert file_write_compressed(file_path, 'foo bar')
+    assert file_compression(file_path) == codec
+    assert DECOMPRESSORS[codec](file_read_bytes(file_path)) == b'foo bar'
+    assert file_read_decompressed(file_path) == 'foo bar'
+
+    assert file_append_compressed(file_path, b' baz')
+    assert file_read_bytes_decompressed(file_path) == b'foo bar baz'
+
+    # the codec is detected from the content (not the extension)
+    other_file_path = os.path.join(TEST_DIRECTORY_PATH, 'b')
+    file_write_compressed(other_file_path, (chunk for chunk in [b'a', bytearray(b'b')]), codec=codec, level=1)
+    assert file_compression(other_file_path) == codec
+    assert list(file_read_chunks_decompressed(other_file_path, chunk_size=1)) == [b'a', b'b']
+
+
+@pytest.mark.parametrize('codec', ['gzip', 'bz2', 'xz'])
+def test_file_write_compressed__parallel(codec):
+    file_path = os.path.join(TEST_DIRECTORY_PATH, 'a' + CODEC_EXTENSIONS[codec])
+    contents = os.urandom(1000) * 10
+    file_write_compressed(file_path, iter([contents[:3000], contents[3000:]]), max_workers=2, block_size=1024)
+    assert file_read_bytes_decompressed(file_path) == contents
+    # the file is made of several concatenated streams which any decompressor can read
+    assert DECOMPRESSORS[codec](file_read_bytes(file_path)) == contents
+
+    file_write_compressed(file_path, array.array('i', [1, 2]), max_workers=2)
+    assert file_read_bytes_decompressed(file_path) == array.array('i', [1, 2]).tobytes()
+
+
+def test_file_compression_1():
+    file_path = os.path.join(TEST_DIRECTORY_PATH, 'a')
+    file_write(file_path, 'a')
+    assert file_compression(file_path) is None
+    # the codec of a file which does not exist yet is guessed from its extension
+    assert file_compression(os.path.join(TEST_DIRECTORY_PATH, 'b.ZST')) == 'zstd'
+    assert file_compression(os.path.join(TEST_DIRECTORY_PATH, 'b.txt')) is None
+
+    with pytest.raises(ValueError):
+        file_read_decompressed(file_path)
+    with pytest.raises(ValueError):
+        file_write_compressed(file_path, 'a')
+    with pytest.raises(FileNotFoundError):
+        file_read_decompressed(os.path.join(TEST_DIRECTORY_PATH, 'b.gz'))
+
+
+def test_file_write_compressed__zstd():
+    file_path = os.path.join(TEST_DIRECTORY_PATH, 'a.zst')
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        with pytest.raises(ImportError):
+            file_write_compressed(file_path, 'a')
+        pytest.skip('the zstandard package is not installed')
+
+    file_write_compressed(file_path, 'foo')
+    file_append_compressed(file_path, 'bar')
+    assert file_compression(file_path) == 'zstd'
+    assert file_read_decompressed(file_path) == 'foobar'
+    file_write_compressed(file_path, b'foo' * 1000, max_workers=2, block_size=100)
+    assert file_read_bytes_decompressed(file_path) == b'foo' * 1000
+
+
+def test_directory_files_read_decompressed_1():
+    file_write(os.path.join(TEST_DIRECTORY_PATH, 'a'), 'a')
+    file_write_compressed(os.path.join(TEST_DIRECTORY_PATH, 'b.gz'), 'b')
+    assert sorted(directory_files_read_decompressed(TEST_DIRECTORY_PATH)) == [
+        ('./test_compressed_files/a', 'a'),
+        ('./test_compressed_files/b.gz', 'b'),
+    ]
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import random
+
+import pytest
+
+from d8s_file_system import (
+    FileChunk,
+    content_chunks,
+    directory_create,
+    directory_delete,
+    directory_exists,
+    file_chunks,
+    file_chunks_delta,
+    file_write,
+)
+
+TEST_DIRECTORY_PATH = './test_content_chunks'
+OLD_FILE_PATH = os.path.join(TEST_DIRECTORY_PATH, 'old')
+NEW_FILE_PATH = os.path.join(TEST_DIRECTORY_PATH, 'new')
+CONTENTS = random.Random(0).randbytes(200_000)
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(TEST_DIRECTORY_PATH)
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+def test_file_chunks():
+    file_write(OLD_FILE_PATH, CONTENTS)
+    chunks = file_chunks(OLD_FILE_PATH, average_size=1024)
+    assert chunks[0].offset == 0
+    assert sum(chunk.length for chunk in chunks) == len(CONTENTS)
+    for chunk, next_chunk in zip(chunks, chunks[1:]):
+        assert next_chunk.offset == chunk.offset + chunk.length
+    # the chunks are between the min_size and max_size (except for the last one)
+    assert all(256 <= chunk.length <= 8192 for chunk in chunks[:-1])
+    assert 100 < len(chunks) < 400
+    offset, length, digest = chunks[1]
+    assert chunks[1] == FileChunk(offset, length, digest)
+    assert digest == hashlib.sha256(CONTENTS[offset:][:length]).hexdigest()
+
+    # the sizes can be given explicitly
+    chunks = file_chunks(OLD_FILE_PATH, average_size=1024, min_size=2000, max_size=3000, algorithm='md5')
+    assert all(2000 <= chunk.length <= 3000 for chunk in chunks[:-1])
+    assert len(chunks[0].digest) == 32
+
+
+def test_file_chunks_read_size(monkeypatch):
+    file_write(OLD_FILE_PATH, CONTENTS)
+    chunks = file_chunks(OLD_FILE_PATH, average_size=1024)
+
+    # the chunk boundaries do not depend on how the file is read
+    monkeypatch.setattr(content_chunks, 'READ_SIZE', 1000)
+    assert file_chunks(OLD_FILE_PATH, average_size=1024) == chunks
+
+
+def test_file_chunks_small_files():
+    file_write(OLD_FILE_PATH, b'')
+    assert file_chunks(OLD_FILE_PATH) == []
+
+    file_write(OLD_FILE_PATH, b'a' * 100)
+    assert [chunk.length for chunk in file_chunks(OLD_FILE_PATH, average_size=1024)] == [100]
+
+
+def test_file_chunks_invalid_average_size():
+    file_write(OLD_FILE_PATH, CONTENTS)
+    with pytest.raises(ValueError):
+        file_chunks(OLD_FILE_PATH, average_size=1000)
+    with pytest.raises(ValueError):
+        file_chunks(OLD_FILE_PATH, average_size=2)
+
+
+def test_file_chunks_delta():
+    file_write(OLD_FILE_PATH, CONTENTS)
+    old_chunks = file_chunks(OLD_FILE_PATH, average_size=1024)
+    assert file_chunks_delta(old_chunks, old_chunks) == []
+
+    # inserting a byte only changes the chunk it is inserted into (the other boundaries shift along with the content)
+    file_write(NEW_FILE_PATH, CONTENTS[:100_000] + b'x' + CONTENTS[100_000:])
+    new_chunks = file_chunks(NEW_FILE_PATH, average_size=1024)
+    delta = file_chunks_delta(old_chunks, new_chunks)
+    assert len(delta) == 1
+    offset, length = delta[0]
+    assert offset <= 100_000 < offset + length
+    assert length < 10_000
+
+    # adjacent changed chunks are merged into one range
+    file_write(NEW_FILE_PATH, CONTENTS[:50_000] + os.urandom(20_000) + CONTENTS[70_000:])
+    new_chunks = file_chunks(NEW_FILE_PATH, average_size=1024)
+    delta = file_chunks_delta(old_chunks, new_chunks)
+    assert len(delta) == 1
+    offset, length = delta[0]
+    assert offset <= 50_000 and 70_000 <= offset + length
+
+    # everything is changed compared to an empty file
+    assert file_chunks_delta([], new_chunks) == [(0, 200_000)]
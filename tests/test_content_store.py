@@ -0,0 +1,113 @@
+import hashlib
+import os
+
+import pytest
+
+from d8s_file_system import ContentAddressedStore, directory_create, directory_delete, directory_exists, file_write
+
+TEST_DIRECTORY_PATH = './test_content_store'
+STORE_PATH = os.path.join(TEST_DIRECTORY_PATH, 'store')
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(TEST_DIRECTORY_PATH)
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+def test_content_addressed_store_put_and_get():
+    store = ContentAddressedStore(STORE_PATH)
+    digest = store.put(b'foo')
+    assert digest == hashlib.sha256(b'foo').hexdigest()
+    assert digest in store
+    assert store.get(digest) == b'foo'
+    assert store.path(digest) == os.path.join(STORE_PATH, digest[:2], digest[2:4], digest)
+    with store.open(digest) as f:
+        assert f.read() == b'foo'
+
+    # strings, buffers, and chunks with the same content have the same digest
+    assert store.put('foo') == digest
+    assert store.put(memoryview(b'foo')) == digest
+    assert store.put(chunk for chunk in ['f', 'oo']) == digest
+    assert store.put(chunk for chunk in [b'fo', b'o']) == digest
+    assert list(store) == [digest]
+
+    assert store.put('bar') == hashlib.sha256(b'bar').hexdigest()
+    assert sorted(store.digests()) == sorted([digest, hashlib.sha256(b'bar').hexdigest()])
+    # no temporary files are left behind
+    assert os.listdir(os.path.join(STORE_PATH, 'tmp')) == []
+
+
+def test_content_addressed_store_options():
+    store = ContentAddressedStore(STORE_PATH, algorithm='md5', fan_out=1, fan_out_width=3)
+    digest = store.put('foo')
+    assert digest == hashlib.md5(b'foo').hexdigest()
+    assert store.path(digest) == os.path.join(STORE_PATH, digest[:3], digest)
+    assert repr(store) == f"ContentAddressedStore({STORE_PATH!r}, algorithm='md5')"
+
+    for invalid_digest in ['abc', '../../etc/passwd', 'g' * 32]:
+        with pytest.raises(ValueError):
+            store.path(invalid_digest)
+
+
+def test_content_addressed_store_put_file():
+    file_path = os.path.join(TEST_DIRECTORY_PATH, 'a')
+    file_write(file_path, 'foo' * 1000)
+    store = ContentAddressedStore(STORE_PATH)
+    digest = store.put_file(file_path, chunk_size=7)
+    assert digest == hashlib.sha256(b'foo' * 1000).hexdigest()
+    assert store.get(digest) == b'foo' * 1000
+    assert store.put_file(file_path) == digest
+    assert list(store) == [digest]
+
+
+def test_content_addressed_store_delete_and_gc():
+    store = ContentAddressedStore(STORE_PATH)
+    foo_digest = store.put('foo')
+    bar_digest = store.put('bar')
+    baz_digest = store.put('baz')
+
+    store.delete(baz_digest)
+    assert baz_digest not in store
+    with pytest.raises(FileNotFoundError):
+        store.get(baz_digest)
+
+    assert store.gc([foo_digest]) == [bar_digest]
+    assert list(store) == [foo_digest]
+    assert store.gc([foo_digest]) == []
+
+
+def test_content_addressed_store_gc__stray_files():
+    store = ContentAddressedStore(STORE_PATH)
+    foo_digest = store.put('foo')
+    # the temporary file of a write which is in progress (or was interrupted) next to an object
+    stray_path = os.path.join(os.path.dirname(store.path(foo_digest)), 'tmpa1b2c3d4')
+    file_write(stray_path, 'partial')
+    directory_delete(os.path.join(STORE_PATH, 'tmp'))
+
+    assert list(store) == [foo_digest]
+    assert store.gc([]) == [foo_digest]
+    assert list(store) == []
+    assert os.path.exists(stray_path)
+
+
+def test_content_addressed_store_concurrent_writers(monkeypatch):
+    store = ContentAddressedStore(STORE_PATH)
+    digest = hashlib.sha256(b'foo').hexdigest()
+
+    # simulate another writer storing the same object between the existence check and the rename
+    monkeypatch.setattr(os.path, 'exists', lambda path: False)
+    assert store.put(b'foo') == digest
+    assert store.put(b'foo') == digest
+    assert store.put(chunk for chunk in [b'foo']) == digest
+    monkeypatch.undo()
+
+    assert store.get(digest) == b'foo'
+    assert os.listdir(os.path.join(STORE_PATH, 'tmp')) == []
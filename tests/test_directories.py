@@ -1,12 +1,16 @@
+import errno
 import os
 
 import pytest
 from d8s_lists import iterables_have_same_items
 
 from d8s_file_system import (
+    DirectoryDeleteReport,
     directory_copy,
     directory_create,
     directory_delete,
+    directory_delete_in_background,
+    directory_delete_parallel,
     directory_disk_free_space,
     directory_disk_total_space,
     directory_disk_used_space,
@@ -174,6 +178,9 @@ def test_directory_read_files_with_path_matching_docs_1():
     result = directory_read_files_with_path_matching(NON_EXISTENT_DIRECTORY_PATH, 'a')
     assert list(result) == []
 
+    result = directory_read_files_with_path_matching(EXISTING_DIRECTORY_PATH, '*[ab]', prefetch=4)
+    assert iterables_have_same_items(tuple(result), (('./test_directories/a', 'a'), ('./test_directories/b', 'b')))
+
 
 def test_directory_disk_free_space_docs_1():
     assert isinstance(directory_disk_free_space(EXISTING_DIRECTORY_PATH), int)
@@ -273,6 +280,39 @@ def test_directory_files_read_docs_1():
     )
     assert tuple(directory_files_read(NON_EXISTENT_DIRECTORY_PATH)) == ()
 
+    assert tuple(directory_files_read(EXISTING_DIRECTORY_PATH, prefetch=2)) == tuple(
+        directory_files_read(EXISTING_DIRECTORY_PATH)
+    )
+    assert tuple(directory_files_read(NON_EXISTENT_DIRECTORY_PATH, prefetch=2)) == ()
+
+
+def test_directory_files_skip_binary():
+    binary_file_path = os.path.join(EXISTING_DIRECTORY_PATH, 'd')
+    file_write(binary_file_path, b'\x00\xff\xfe a')
+
+    files = dict(directory_files_read(EXISTING_DIRECTORY_PATH, skip_binary=True))
+    assert sorted(files.items()) == [
+        ('./test_directories/a', 'a'),
+        ('./test_directories/b', 'b'),
+        ('./test_directories/c', 'c'),
+    ]
+    assert dict(directory_files_read(EXISTING_DIRECTORY_PATH, prefetch=2, skip_binary=True)) == files
+    with pytest.raises(UnicodeDecodeError):
+        tuple(directory_files_read(EXISTING_DIRECTORY_PATH))
+
+    assert list(directory_read_files_with_path_matching(EXISTING_DIRECTORY_PATH, '*[ad]', skip_binary=True)) == [
+        ('./test_directories/a', 'a')
+    ]
+    assert directory_files_containing(EXISTING_DIRECTORY_PATH, 'a', skip_binary=True) == {'./test_directories/a': ['a']}
+
+    # text which is not valid UTF-8 is read with the encoding detected for it
+    latin_1_file_path = os.path.join(EXISTING_DIRECTORY_PATH, 'e')
+    file_write(latin_1_file_path, b'caf\xe9 bar')
+    assert directory_files_containing(EXISTING_DIRECTORY_PATH, 'bar', skip_binary=True) == {latin_1_file_path: ['bar']}
+    files = dict(directory_files_read(EXISTING_DIRECTORY_PATH, skip_binary=True))
+    assert files[latin_1_file_path] == 'café bar'
+    assert dict(directory_files_read(EXISTING_DIRECTORY_PATH, prefetch=2, skip_binary=True)) == files
+
 
 def test_directory_subdirectory_names_docs_1():
     new_directory_path = os.path.join(EXISTING_DIRECTORY_PATH, 'foo', 'subfoo')
@@ -286,3 +326,116 @@ def test_directory_subdirectory_names_docs_1():
 def test_is_directory_docs_1():
     assert is_directory(EXISTING_DIRECTORY_PATH)
     assert not is_directory(NON_EXISTENT_DIRECTORY_PATH)
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='creating symlinks requires extra privileges on windows')
+def test_directory_delete_parallel_1():
+    new_directory_path = os.path.join(EXISTING_DIRECTORY_PATH, 'foo', 'subfoo')
+    directory_create(new_directory_path)
+    file_write(os.path.join(new_directory_path, 'd'), 'd')
+    # a symlink to a directory is deleted without deleting what it points to
+    os.symlink(os.path.abspath(new_directory_path), os.path.join(EXISTING_DIRECTORY_PATH, 'link'))
+    progress = []
+
+    report = directory_delete_parallel(
+        EXISTING_DIRECTORY_PATH, max_workers=2, on_progress=lambda *args: progress.append(args)
+    )
+    assert report == DirectoryDeleteReport(files_deleted=5, directories_deleted=3, errors=[])
+    assert progress[-1] == (5, 3)
+    assert not directory_exists(EXISTING_DIRECTORY_PATH)
+
+    with pytest.raises(FileNotFoundError):
+        directory_delete_parallel(NON_EXISTENT_DIRECTORY_PATH)
+    directory_create(EXISTING_DIRECTORY_PATH)
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='creating symlinks requires extra privileges on windows')
+def test_directory_delete_parallel__symlink():
+    link_path = os.path.join(NON_EXISTENT_DIRECTORY_PATH, 'link')
+    directory_create(NON_EXISTENT_DIRECTORY_PATH)
+    os.symlink(os.path.abspath(EXISTING_DIRECTORY_PATH), link_path)
+
+    # a symlink to a directory is not followed (which would delete the contents of what it points to)
+    with pytest.raises(OSError):
+        directory_delete_parallel(link_path)
+    with pytest.raises(OSError):
+        directory_delete_in_background(link_path + '/')
+    assert os.path.islink(link_path)
+    assert directory_file_names(EXISTING_DIRECTORY_PATH) == directory_file_names(link_path)
+    assert len(directory_file_names(EXISTING_DIRECTORY_PATH)) == 3
+    directory_delete(NON_EXISTENT_DIRECTORY_PATH)
+
+
+def test_directory_delete_parallel__errors(monkeypatch):
+    new_directory_path = os.path.join(EXISTING_DIRECTORY_PATH, 'foo')
+    directory_create(new_directory_path)
+    file_write(os.path.join(new_directory_path, 'd'), 'd')
+    undeletable_path = os.path.join(new_directory_path, 'd')
+    unlink = os.unlink
+
+    def failing_unlink(path, *args, **kwargs):
+        if path == undeletable_path:
+            raise PermissionError(path)
+        return unlink(path, *args, **kwargs)
+
+    unreadable_path = os.path.join(EXISTING_DIRECTORY_PATH, 'bar')
+    directory_create(unreadable_path)
+    scandir = os.scandir
+
+    def failing_scandir(path):
+        if path == unreadable_path:
+            raise PermissionError(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'unlink', failing_unlink)
+    monkeypatch.setattr(os, 'scandir', failing_scandir)
+    errors = []
+    report = directory_delete_parallel(EXISTING_DIRECTORY_PATH, on_error=lambda *args: errors.append(args))
+
+    # the errors did not stop the deletion of the rest of the tree
+    assert report.files_deleted == 3
+    assert report.directories_deleted == 1
+    assert [path for path, _ in report.errors][0] == unreadable_path
+    assert iterables_have_same_items(
+        [path for path, _ in report.errors][1:], [undeletable_path, new_directory_path, EXISTING_DIRECTORY_PATH]
+    )
+    assert errors == report.errors
+    assert directory_file_names(EXISTING_DIRECTORY_PATH, recursive=True) == ['d']
+
+
+def test_directory_delete_in_background__other_file_system(monkeypatch):
+    def failing_rename(src, dst):
+        raise OSError(errno.EXDEV, 'Invalid cross-device link')
+
+    monkeypatch.setattr(os, 'rename', failing_rename)
+    future = directory_delete_in_background(EXISTING_DIRECTORY_PATH)
+    # the directory is deleted in place
+    assert future.result() == DirectoryDeleteReport(files_deleted=3, directories_deleted=1, errors=[])
+
+    def failing_rename(src, dst):
+        raise PermissionError(src)
+
+    monkeypatch.setattr(os, 'rename', failing_rename)
+    with pytest.raises(PermissionError):
+        directory_delete_in_background(NON_EXISTENT_DIRECTORY_PATH)
+    directory_create(EXISTING_DIRECTORY_PATH)
+
+
+def test_directory_delete_in_background_1():
+    trash_directory = os.path.join(NON_EXISTENT_DIRECTORY_PATH, 'trash')
+    future = directory_delete_in_background(EXISTING_DIRECTORY_PATH, trash_directory=trash_directory)
+    # the directory is moved out of the way right away
+    assert not directory_exists(EXISTING_DIRECTORY_PATH)
+    assert future.result() == DirectoryDeleteReport(files_deleted=3, directories_deleted=1, errors=[])
+    assert directory_subdirectory_names(trash_directory) == []
+
+    directory_create(EXISTING_DIRECTORY_PATH)
+    future = directory_delete_in_background(EXISTING_DIRECTORY_PATH + '/')
+    assert not directory_exists(EXISTING_DIRECTORY_PATH)
+    assert future.result().directories_deleted == 1
+    assert not any(name.endswith('.trash') for name in os.listdir('.'))
+
+    with pytest.raises(FileNotFoundError):
+        directory_delete_in_background(os.path.join(trash_directory, 'foo'))
+    directory_delete(NON_EXISTENT_DIRECTORY_PATH)
+    directory_create(EXISTING_DIRECTORY_PATH)
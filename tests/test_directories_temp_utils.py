@@ -0,0 +1,179 @@
+import os
+from collections import namedtuple
+
+import pytest
+
+from d8s_file_system import (
+    ScratchPool,
+    default_scratch_pool,
+    directories_temp_utils,
+    directory_create,
+    directory_delete,
+    directory_exists,
+    directory_file_paths,
+    file_write,
+    scratch_directory,
+)
+
+TEST_DIRECTORY_PATH = './test_directories_temp_utils'
+FAST_ROOT_PATH = os.path.join(TEST_DIRECTORY_PATH, 'fast')
+DISK_ROOT_PATH = os.path.join(TEST_DIRECTORY_PATH, 'disk')
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(TEST_DIRECTORY_PATH)
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+def test_scratch_pool_directory():
+    with ScratchPool([FAST_ROOT_PATH, DISK_ROOT_PATH], min_free_bytes=0) as pool:
+        fast_path, disk_path = pool.root_paths
+        assert os.path.dirname(fast_path) == FAST_ROOT_PATH
+        assert os.path.dirname(disk_path) == DISK_ROOT_PATH
+
+        with pool.directory() as directory:
+            assert os.path.dirname(directory.path) == fast_path
+            assert os.listdir(directory) == []
+            file_write(os.path.join(directory, 'a.txt'), 'foo')
+            os.mkdir(os.path.join(directory.path, 'b'))
+            file_write(os.path.join(directory.path, 'b', 'c.txt'), 'barbaz')
+            assert directory.usage() == 9
+        pool.wait_for_cleanup()
+
+        # the released directory is emptied and handed out again
+        assert pool.idle_count() == 1
+        with pool.directory() as second_directory:
+            assert second_directory.path == directory.path
+            assert os.listdir(second_directory) == []
+            assert pool.idle_count() == 0
+
+            # releasing a directory more than once has no effect
+            second_directory.release()
+        pool.wait_for_cleanup()
+        assert pool.idle_count() == 1
+
+    # closing the pool deletes all of its directories
+    assert not os.path.exists(fast_path)
+    assert not os.path.exists(disk_path)
+    assert pool.idle_count() == 1
+
+
+def test_scratch_pool_max_idle():
+    with ScratchPool([FAST_ROOT_PATH], min_free_bytes=0, max_idle=1) as pool:
+        first_directory = pool.directory()
+        second_directory = pool.directory()
+        assert first_directory.path != second_directory.path
+        first_directory.release()
+        second_directory.release()
+        pool.wait_for_cleanup()
+        assert pool.idle_count() == 1
+        assert not os.path.exists(second_directory.path)
+
+    with ScratchPool([FAST_ROOT_PATH], min_free_bytes=0, max_idle=0) as pool:
+        with pool.directory() as directory:
+            pass
+        pool.wait_for_cleanup()
+        assert pool.idle_count() == 0
+        assert not os.path.exists(directory.path)
+
+
+def test_scratch_pool_quota():
+    with ScratchPool([FAST_ROOT_PATH, DISK_ROOT_PATH], quota_bytes=100, min_free_bytes=0) as pool:
+        fast_path, disk_path = pool.root_paths
+        first_directory = pool.directory(size_hint=60)
+        assert os.path.dirname(first_directory.path) == fast_path
+
+        # the first root's quota is used up so the next directory falls back to the second root
+        second_directory = pool.directory(size_hint=60)
+        assert os.path.dirname(second_directory.path) == disk_path
+
+        # if no root has room, the last root is used
+        third_directory = pool.directory(size_hint=60)
+        assert os.path.dirname(third_directory.path) == disk_path
+
+        # the reservation is returned when the directory is released
+        first_directory.release()
+        pool.wait_for_cleanup()
+        with pool.directory(size_hint=100) as directory:
+            assert directory.path == first_directory.path
+        pool.wait_for_cleanup()
+
+        with pool.reservation(40) as files_path:
+            assert os.path.dirname(files_path) == fast_path
+
+
+def test_scratch_pool_min_free_bytes(monkeypatch):
+    with ScratchPool([FAST_ROOT_PATH, DISK_ROOT_PATH], min_free_bytes=1000) as pool:
+        fast_path, disk_path = pool.root_paths
+        usage = namedtuple('usage', ['total', 'used', 'free'])
+        free_bytes = {fast_path: 1500, disk_path: 10**9}
+        monkeypatch.setattr(directories_temp_utils.shutil, 'disk_usage', lambda path: usage(0, 0, free_bytes[path]))
+
+        with pool.directory(size_hint=400) as directory:
+            assert os.path.dirname(directory.path) == fast_path
+        with pool.directory(size_hint=600) as directory:
+            assert os.path.dirname(directory.path) == disk_path
+
+
+def test_scratch_pool_closed():
+    pool = ScratchPool([FAST_ROOT_PATH])
+    directory = pool.directory()
+    pool.close()
+    assert not os.path.exists(directory.path)
+
+    # releasing a directory after the pool is closed has no effect
+    directory.release()
+    assert pool.idle_count() == 0
+
+    with pytest.raises(ValueError):
+        pool.directory()
+    with pytest.raises(ValueError):
+        with pool.reservation():
+            pass
+
+    # closing a pool more than once has no effect
+    pool.close()
+
+
+def test_scratch_pool_default_roots(monkeypatch):
+    roots = os.pathsep.join([FAST_ROOT_PATH, DISK_ROOT_PATH])
+    monkeypatch.setenv(directories_temp_utils.SCRATCH_ROOTS_ENVIRONMENT_VARIABLE, roots)
+    with ScratchPool() as pool:
+        assert [os.path.dirname(path) for path in pool.root_paths] == [FAST_ROOT_PATH, DISK_ROOT_PATH]
+
+    monkeypatch.delenv(directories_temp_utils.SCRATCH_ROOTS_ENVIRONMENT_VARIABLE)
+    missing_root_path = os.path.join(TEST_DIRECTORY_PATH, 'missing')
+    monkeypatch.setattr(directories_temp_utils, 'TMPFS_PATHS', (FAST_ROOT_PATH, missing_root_path))
+    # only the tmpfs paths which exist are used (followed by the system's temporary directory)
+    assert directories_temp_utils._default_scratch_roots() == [
+        FAST_ROOT_PATH,
+        directories_temp_utils.tempfile.gettempdir(),
+    ]
+
+
+def test_scratch_directory(monkeypatch):
+    monkeypatch.setattr(directories_temp_utils, '_default_pool', None)
+    monkeypatch.setenv(directories_temp_utils.SCRATCH_ROOTS_ENVIRONMENT_VARIABLE, DISK_ROOT_PATH)
+    pool = default_scratch_pool()
+    try:
+        assert default_scratch_pool() is pool
+        with scratch_directory(size_hint=10) as directory:
+            assert directory.pool is pool
+            assert repr(directory) == f'ScratchDirectory({directory.path!r})'
+            file_write(os.path.join(directory, 'a.txt'), 'foo')
+            assert directory_file_paths(directory.path) == [os.path.join(directory.path, 'a.txt')]
+
+        with ScratchPool([FAST_ROOT_PATH]) as other_pool:
+            with scratch_directory(pool=other_pool) as directory:
+                assert directory.pool is other_pool
+            assert repr(other_pool) == f'ScratchPool({other_pool.root_paths!r})'
+    finally:
+        pool.close()
@@ -0,0 +1,95 @@
+import os
+import stat
+
+import pytest
+
+from d8s_file_system import Directory, directory_create, directory_delete, directory_exists, file_read, file_write
+
+TEST_DIRECTORY_PATH = './test_directory_handle'
+NON_EXISTENT_FILE_NAME = 'foo'
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason='directory fds are not supported on windows')
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(os.path.join(TEST_DIRECTORY_PATH, 'sub'))
+    file_write(os.path.join(TEST_DIRECTORY_PATH, 'a'), 'a')
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+def test_directory_read_write_1():
+    with Directory(TEST_DIRECTORY_PATH) as directory:
+        assert repr(directory) == "Directory('./test_directory_handle')"
+        assert directory.fileno() >= 0
+        assert directory.read('a') == 'a'
+        assert directory.read_bytes('a') == b'a'
+
+        os.chmod(os.path.join(TEST_DIRECTORY_PATH, 'a'), 0o600)
+        assert directory.write('a', 'foo bar')
+        assert directory.read('a') == 'foo bar'
+        # writing a file keeps its permissions
+        assert stat.S_IMODE(directory.stat('a').st_mode) == 0o600
+
+        assert directory.write('b', b'abc')
+        assert file_read(os.path.join(TEST_DIRECTORY_PATH, 'b')) == 'abc'
+        assert directory.write('c', [1, 2, 3])
+        assert directory.read('c') == '[1, 2, 3]'
+
+        assert directory.append('b', 'de')
+        assert directory.append('b', bytearray(b'f'))
+        assert directory.read('b') == 'abcdef'
+        assert directory.write('d', iter([b'a', memoryview(b'b')]))
+        assert directory.read('d') == 'ab'
+
+        with pytest.raises(FileNotFoundError):
+            directory.read(NON_EXISTENT_FILE_NAME)
+        with pytest.raises(IsADirectoryError):
+            directory.write('sub', 'a')
+        # a failed write does not leave a temporary file behind
+        assert sorted(directory.list()) == ['a', 'b', 'c', 'd', 'sub']
+
+    assert directory.fd == -1
+    # closing the directory again is a no-op
+    directory.close()
+
+
+def test_directory_metadata_1():
+    with Directory(TEST_DIRECTORY_PATH) as directory:
+        assert directory.size('a') == 1
+        assert directory.exists('a')
+        assert directory.exists('sub')
+        assert not directory.exists(NON_EXISTENT_FILE_NAME)
+        assert directory.is_file('a')
+        assert not directory.is_file('sub')
+        assert not directory.is_file(NON_EXISTENT_FILE_NAME)
+        assert directory.file_names() == ['a']
+        assert directory.subdirectory_names() == ['sub']
+
+        directory.delete('a')
+        assert directory.file_names() == []
+        with pytest.raises(FileNotFoundError):
+            directory.delete('a')
+        with pytest.raises(FileNotFoundError):
+            directory.size('a')
+
+
+def test_directory_subdirectory_1():
+    with Directory(TEST_DIRECTORY_PATH) as directory:
+        with directory.subdirectory('sub') as subdirectory:
+            assert subdirectory.path == os.path.join(TEST_DIRECTORY_PATH, 'sub')
+            subdirectory.write('b', 'b')
+        assert file_read(os.path.join(TEST_DIRECTORY_PATH, 'sub', 'b')) == 'b'
+
+        with pytest.raises(NotADirectoryError):
+            directory.subdirectory('a')
+
+    with pytest.raises(FileNotFoundError):
+        Directory(NON_EXISTENT_FILE_NAME)
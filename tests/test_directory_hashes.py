@@ -0,0 +1,226 @@
+import contextlib
+import hashlib
+import os
+import stat
+
+import pytest
+
+from d8s_file_system import (
+    MerkleTree,
+    directory_copy,
+    directory_create,
+    directory_delete,
+    directory_exists,
+    directory_merkle_compare,
+    directory_merkle_hash,
+    file_delete,
+    file_write,
+)
+
+TEST_DIRECTORY_PATH = './test_directory_hashes'
+FIRST_DIRECTORY_PATH = os.path.join(TEST_DIRECTORY_PATH, 'first')
+SECOND_DIRECTORY_PATH = os.path.join(TEST_DIRECTORY_PATH, 'second')
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(TEST_DIRECTORY_PATH)
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+def _create_tree(directory_path):
+    os.makedirs(os.path.join(directory_path, 'b', 'c'))
+    file_write(os.path.join(directory_path, 'a'), 'foo')
+    file_write(os.path.join(directory_path, 'b', 'd'), 'bar')
+    file_write(os.path.join(directory_path, 'b', 'c', 'e'), 'baz')
+
+
+def test_directory_merkle_hash():
+    _create_tree(FIRST_DIRECTORY_PATH)
+    digest = directory_merkle_hash(FIRST_DIRECTORY_PATH)
+    assert len(digest) == 64
+    assert directory_merkle_hash(FIRST_DIRECTORY_PATH, algorithm='md5', max_workers=2) != digest
+
+    # the digest only depends on the names and contents in the directory
+    directory_copy(FIRST_DIRECTORY_PATH, SECOND_DIRECTORY_PATH)
+    assert directory_merkle_hash(SECOND_DIRECTORY_PATH) == digest
+
+    file_write(os.path.join(SECOND_DIRECTORY_PATH, 'b', 'c', 'e'), 'bazz')
+    assert directory_merkle_hash(SECOND_DIRECTORY_PATH) != digest
+    file_write(os.path.join(SECOND_DIRECTORY_PATH, 'b', 'c', 'e'), 'baz')
+    assert directory_merkle_hash(SECOND_DIRECTORY_PATH) == digest
+
+    # empty directories and renames are part of the digest
+    os.makedirs(os.path.join(SECOND_DIRECTORY_PATH, 'f'))
+    assert directory_merkle_hash(SECOND_DIRECTORY_PATH) != digest
+    os.rmdir(os.path.join(SECOND_DIRECTORY_PATH, 'f'))
+    os.rename(os.path.join(SECOND_DIRECTORY_PATH, 'a'), os.path.join(SECOND_DIRECTORY_PATH, 'g'))
+    assert directory_merkle_hash(SECOND_DIRECTORY_PATH) != digest
+
+
+def test_merkle_tree():
+    _create_tree(FIRST_DIRECTORY_PATH)
+    tree = MerkleTree(FIRST_DIRECTORY_PATH)
+    assert tree.root is None
+    digest = tree.digest
+    assert tree.update() == digest
+    assert repr(tree) == f"MerkleTree({FIRST_DIRECTORY_PATH!r}, algorithm='sha256')"
+
+    assert tree.node('a').digest == hashlib.sha256(b'foo').hexdigest()
+    assert tree.node('a').children is None
+    assert sorted(tree.node('b').children) == ['c', 'd']
+    assert tree.node(os.path.join('b', 'c', 'e')).digest == hashlib.sha256(b'baz').hexdigest()
+    assert tree.node('.') is tree.root
+    assert tree.node('x') is None
+    assert tree.node(os.path.join('a', 'x')) is None
+    with pytest.raises(ValueError):
+        tree.node(os.path.join('..', 'a'))
+
+
+def test_merkle_tree_update_only_rehashes_changed_files(monkeypatch):
+    _create_tree(FIRST_DIRECTORY_PATH)
+    tree = MerkleTree(FIRST_DIRECTORY_PATH, max_workers=2)
+    tree.update()
+    a_node = tree.node('a')
+
+    hashed_paths = []
+    original_open = open
+    monkeypatch.setattr(
+        'builtins.open', lambda path, *args, **kwargs: hashed_paths.append(path) or original_open(path, *args, **kwargs)
+    )
+    tree.update()
+    assert hashed_paths == []
+
+    with original_open(os.path.join(FIRST_DIRECTORY_PATH, 'b', 'd'), 'w') as f:
+        f.write('changed')
+    tree.update()
+    assert hashed_paths == [os.path.join(FIRST_DIRECTORY_PATH, 'b', 'd')]
+    assert tree.node('a') is a_node
+
+
+def test_merkle_tree_update_changed_paths():
+    _create_tree(FIRST_DIRECTORY_PATH)
+    tree = MerkleTree(FIRST_DIRECTORY_PATH)
+
+    def assert_matches_full_hash():
+        assert tree.digest == directory_merkle_hash(FIRST_DIRECTORY_PATH)
+
+    # the first update hashes the whole tree
+    tree.update(['a'])
+    assert_matches_full_hash()
+    unchanged_node = tree.node('a')
+
+    file_write(os.path.join(FIRST_DIRECTORY_PATH, 'b', 'c', 'e'), 'changed')
+    tree.update([os.path.join('b', 'c', 'e')])
+    assert_matches_full_hash()
+    assert tree.node('a') is unchanged_node
+
+    # new files and directories
+    os.makedirs(os.path.join(FIRST_DIRECTORY_PATH, 'f', 'g'))
+    file_write(os.path.join(FIRST_DIRECTORY_PATH, 'f', 'g', 'h'), 'new')
+    tree.update([os.path.join('f', 'g', 'h')])
+    assert_matches_full_hash()
+
+    # deleted files and directories
+    file_delete(os.path.join(FIRST_DIRECTORY_PATH, 'a'))
+    directory_delete(os.path.join(FIRST_DIRECTORY_PATH, 'b'))
+    tree.update(['a', os.path.join('b', 'c')])
+    assert_matches_full_hash()
+    assert tree.node('a') is None
+
+    # a file replaced with a directory
+    file_write(os.path.join(FIRST_DIRECTORY_PATH, 'i'), 'file')
+    tree.update(['i'])
+    file_delete(os.path.join(FIRST_DIRECTORY_PATH, 'i'))
+    os.makedirs(os.path.join(FIRST_DIRECTORY_PATH, 'i'))
+    file_write(os.path.join(FIRST_DIRECTORY_PATH, 'i', 'j'), 'file')
+    tree.update([os.path.join('i', 'j')])
+    assert_matches_full_hash()
+
+    directory_delete(FIRST_DIRECTORY_PATH)
+    tree.update(['.'])
+    assert tree.root.children == {}
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='Creating symlinks requires extra privileges on Windows')
+def test_merkle_tree_symlinks():
+    _create_tree(FIRST_DIRECTORY_PATH)
+    os.symlink('b', os.path.join(FIRST_DIRECTORY_PATH, 'link'))
+    tree = MerkleTree(FIRST_DIRECTORY_PATH)
+    tree.update()
+    # symlinks are not followed
+    assert tree.node('link').children is None
+    assert tree.node('link').digest == hashlib.sha256(b'symlink\0b').hexdigest()
+
+
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='Fifos are not supported on this platform')
+def test_merkle_tree_special_files():
+    _create_tree(FIRST_DIRECTORY_PATH)
+    os.mkfifo(os.path.join(FIRST_DIRECTORY_PATH, 'fifo'))
+    tree = MerkleTree(FIRST_DIRECTORY_PATH)
+    tree.update()
+    # special files are hashed by their type (reading a fifo would block forever)
+    assert tree.node('fifo').children is None
+    assert tree.node('fifo').digest == hashlib.sha256(b'special\0' + str(stat.S_IFIFO).encode()).hexdigest()
+
+
+def test_merkle_tree_deleted_during_walk(monkeypatch):
+    _create_tree(FIRST_DIRECTORY_PATH)
+    expected_digest = directory_merkle_hash(FIRST_DIRECTORY_PATH)
+    file_write(os.path.join(FIRST_DIRECTORY_PATH, 'z'), 'z')
+    scandir = os.scandir
+
+    class DeletedEntry:
+        def __init__(self, entry):
+            self.name, self.path = entry.name, entry.path
+
+        def is_dir(self, **kwargs):
+            return False
+
+        def stat(self, **kwargs):
+            raise FileNotFoundError(self.path)
+
+    @contextlib.contextmanager
+    def scandir_with_deleted_entry(path):
+        with scandir(path) as entries:
+            yield [DeletedEntry(entry) if entry.name == 'z' else entry for entry in entries]
+
+    monkeypatch.setattr(os, 'scandir', scandir_with_deleted_entry)
+    # the entry which was deleted after it was listed is skipped
+    assert directory_merkle_hash(FIRST_DIRECTORY_PATH) == expected_digest
+
+
+def test_directory_merkle_compare():
+    _create_tree(FIRST_DIRECTORY_PATH)
+    directory_copy(FIRST_DIRECTORY_PATH, SECOND_DIRECTORY_PATH)
+    assert directory_merkle_compare(FIRST_DIRECTORY_PATH, SECOND_DIRECTORY_PATH) == []
+
+    file_write(os.path.join(SECOND_DIRECTORY_PATH, 'b', 'c', 'e'), 'changed')
+    file_write(os.path.join(SECOND_DIRECTORY_PATH, 'b', 'f'), 'added')
+    os.makedirs(os.path.join(SECOND_DIRECTORY_PATH, 'g', 'h'))
+    file_delete(os.path.join(SECOND_DIRECTORY_PATH, 'a'))
+    assert directory_merkle_compare(FIRST_DIRECTORY_PATH, SECOND_DIRECTORY_PATH, algorithm='md5') == [
+        ('a', 'removed'),
+        (os.path.join('b', 'c', 'e'), 'changed'),
+        (os.path.join('b', 'f'), 'added'),
+        ('g', 'added'),
+    ]
+
+    # trees which have already been hashed are not rehashed
+    first_tree = MerkleTree(FIRST_DIRECTORY_PATH)
+    first_tree.update()
+    directory_delete(FIRST_DIRECTORY_PATH)
+    assert directory_merkle_compare(first_tree, first_tree) == []
+    assert directory_merkle_compare(first_tree, SECOND_DIRECTORY_PATH)[0] == ('a', 'removed')
+
+    # a file replaced with a directory
+    directory_delete(os.path.join(SECOND_DIRECTORY_PATH, 'b'))
+    file_write(os.path.join(SECOND_DIRECTORY_PATH, 'b'), 'file')
+    assert ('b', 'changed') in directory_merkle_compare(first_tree, SECOND_DIRECTORY_PATH)
@@ -0,0 +1,157 @@
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from d8s_file_system import (
+    DirectoryShard,
+    ShardedDirectoryDriver,
+    directory_create,
+    directory_delete,
+    directory_exists,
+    directory_files_containing,
+    directory_files_details,
+    directory_shards,
+    file_write,
+)
+
+TEST_DIRECTORY_PATH = './test_directory_sharding'
+TREE_PATH = os.path.join(TEST_DIRECTORY_PATH, 'tree')
+CHECKPOINT_DIRECTORY_PATH = os.path.join(TEST_DIRECTORY_PATH, 'checkpoints')
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(TEST_DIRECTORY_PATH)
+    for name in ['a', 'b', 'c', 'd']:
+        directory_create(os.path.join(TREE_PATH, name, 'sub'))
+        file_write(os.path.join(TREE_PATH, name, f'{name}.txt'), f'foo {name}')
+        file_write(os.path.join(TREE_PATH, name, 'sub', f'{name}.bin'), b'\x00' * 10 * ord(name))
+    file_write(os.path.join(TREE_PATH, 'e.txt'), 'foo e' * 1000)
+    file_write(os.path.join(TREE_PATH, 'f.txt'), 'bar f')
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+def _shard_names(shards):
+    return sorted(name for shard in shards for name in shard.names)
+
+
+def test_directory_shards_hash():
+    shards = directory_shards(TREE_PATH, 3)
+    assert [shard.number for shard in shards] == [0, 1, 2]
+    # only the top-level files are included unless recursive is True
+    assert _shard_names(shards) == ['e.txt', 'f.txt']
+    shards = directory_shards(TREE_PATH, 3, recursive=True)
+    assert _shard_names(shards) == ['a', 'b', 'c', 'd', 'e.txt', 'f.txt']
+    for shard in shards:
+        assert shard.size == 0
+        assert all(zlib.crc32(name.encode()) % 3 == shard.number for name in shard.names)
+
+    # an entry stays in the same shard when other entries are added
+    file_write(os.path.join(TREE_PATH, 'g.txt'), 'g')
+    new_shards = directory_shards(TREE_PATH, 3, recursive=True)
+    for shard, new_shard in zip(shards, new_shards):
+        assert set(shard.names) <= set(new_shard.names)
+
+    with pytest.raises(ValueError):
+        directory_shards(TREE_PATH, 3, strategy='foo')
+
+
+def test_directory_shards_size():
+    shards = directory_shards(TREE_PATH, 2, strategy='size', recursive=True)
+    assert _shard_names(shards) == ['a', 'b', 'c', 'd', 'e.txt', 'f.txt']
+    # e.txt (5000 bytes) is the largest entry, so it is in a shard by itself
+    assert shards[0] == DirectoryShard(0, ('e.txt',), 5000)
+    assert shards[1].size == sum(5 + 10 * ord(name) for name in 'abcd') + 5
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='creating symlinks requires extra privileges on windows')
+def test_directory_shards_symlinks():
+    # a symlink to a directory is not descended into (like os.walk)
+    os.symlink(os.path.abspath(os.path.join(TREE_PATH, 'a')), os.path.join(TREE_PATH, 'link'))
+    assert 'link' not in _shard_names(directory_shards(TREE_PATH, 2, strategy='size', recursive=True))
+
+
+def test_sharded_directory_driver_process_pool():
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        driver = ShardedDirectoryDriver(TREE_PATH, shard_count=3, recursive=True, executor=executor)
+        assert driver.files_details() == directory_files_details(TREE_PATH, recursive=True)
+        assert driver.files_containing('foo') == directory_files_containing(TREE_PATH, 'foo', recursive=True)
+
+    driver = ShardedDirectoryDriver(
+        TREE_PATH, shard_count=2, strategy='size', checkpoint_directory=CHECKPOINT_DIRECTORY_PATH
+    )
+    assert repr(driver) == f'ShardedDirectoryDriver({TREE_PATH!r}, shard_count=2)'
+    assert driver.files_containing('r f|o e', pattern_is_regex=True) == {
+        os.path.join(TREE_PATH, 'e.txt'): ['o e'] * 1000,
+        os.path.join(TREE_PATH, 'f.txt'): ['r f'],
+    }
+    # the checkpoints are deleted once every shard finishes
+    assert os.listdir(CHECKPOINT_DIRECTORY_PATH) == []
+
+
+def test_sharded_directory_driver_threads():
+    with ThreadPoolExecutor() as executor:
+        driver = ShardedDirectoryDriver(TREE_PATH, shard_count=4, recursive=True, executor=executor)
+        assert driver.files_details() == directory_files_details(TREE_PATH, recursive=True)
+        assert driver.files_containing('foo', skip_binary=True) == directory_files_containing(
+            TREE_PATH, 'foo', recursive=True
+        )
+        assert list(driver.files_containing('\x00', skip_binary=True)) == []
+
+        # text which is not valid UTF-8 is searched with the encoding detected for it
+        file_write(os.path.join(TREE_PATH, 'h.txt'), b'caf\xe9 foo')
+        driver = ShardedDirectoryDriver(TREE_PATH, shard_count=4, recursive=True, executor=executor)
+        assert driver.files_containing('café', skip_binary=True) == {os.path.join(TREE_PATH, 'h.txt'): ['café']}
+
+
+def test_sharded_directory_driver_checkpoints():
+    calls = []
+    failing_names = {'a'}
+
+    def shard_function(directory_path, names, suffix):
+        calls.extend(names)
+        if failing_names & set(names):
+            raise OSError(f'{directory_path} failed')
+        return {name + suffix: len(name) for name in names}
+
+    executor = ThreadPoolExecutor()
+    driver = ShardedDirectoryDriver(
+        TREE_PATH, shard_count=3, recursive=True, executor=executor, checkpoint_directory=CHECKPOINT_DIRECTORY_PATH
+    )
+    failing_shard = next(shard for shard in driver.shards() if 'a' in shard.names)
+    with pytest.raises(OSError):
+        driver.run('test', shard_function, '')
+    assert sorted(calls) == ['a', 'b', 'c', 'd', 'e.txt', 'f.txt']
+    # the shards which finished were checkpointed
+    assert len(os.listdir(CHECKPOINT_DIRECTORY_PATH)) == 2
+
+    # only the failed shard is run again
+    calls.clear()
+    failing_names.clear()
+    assert driver.run('test', shard_function, '') == {'a': 1, 'b': 1, 'c': 1, 'd': 1, 'e.txt': 5, 'f.txt': 5}
+    assert calls == list(failing_shard.names)
+    assert os.listdir(CHECKPOINT_DIRECTORY_PATH) == []
+
+    # a checkpoint is only used for the same work
+    failing_names.add('a')
+    with pytest.raises(OSError):
+        driver.run('test', shard_function, '')
+    calls.clear()
+    failing_names.clear()
+    assert driver.run('test', shard_function, '!')['a!'] == 1
+    assert sorted(calls) == ['a', 'b', 'c', 'd', 'e.txt', 'f.txt']
+    executor.shutdown()
+
+
+def test_sharded_directory_driver_defaults(monkeypatch):
+    monkeypatch.setattr(os, 'cpu_count', lambda: None)
+    assert ShardedDirectoryDriver(TREE_PATH).shard_count == 1
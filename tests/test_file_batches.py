@@ -0,0 +1,106 @@
+import os
+import shutil
+import stat
+
+import pytest
+
+from d8s_file_system import (
+    FileOperation,
+    directory_create,
+    directory_delete,
+    directory_exists,
+    directory_file_names,
+    file_read,
+    file_write,
+    files_batch,
+)
+
+TEST_DIRECTORY_PATH = './test_file_batches'
+OTHER_DIRECTORY_PATH = os.path.join(TEST_DIRECTORY_PATH, 'other')
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(OTHER_DIRECTORY_PATH)
+    file_write(os.path.join(TEST_DIRECTORY_PATH, 'a'), 'a')
+    file_write(os.path.join(TEST_DIRECTORY_PATH, 'b'), 'b')
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+def test_files_batch_1():
+    a_path = os.path.join(TEST_DIRECTORY_PATH, 'a')
+    b_path = os.path.join(TEST_DIRECTORY_PATH, 'b')
+    os.chmod(a_path, 0o640)
+    file_write(os.path.join(OTHER_DIRECTORY_PATH, 'e'), 'e')
+    operations = [
+        FileOperation('copy', a_path, OTHER_DIRECTORY_PATH),
+        FileOperation('move', b_path, os.path.join(OTHER_DIRECTORY_PATH, 'c')),
+        FileOperation('write', os.path.join(OTHER_DIRECTORY_PATH, 'd'), contents='d'),
+        ('delete', os.path.join(OTHER_DIRECTORY_PATH, 'e')),
+    ]
+    results = files_batch(operations, max_workers=2)
+
+    assert [result.operation for result in results] == [FileOperation(*operation) for operation in operations]
+    assert all(result.success for result in results)
+    assert all(result.error is None for result in results)
+    assert all(result.duration >= 0 for result in results)
+    assert sorted(directory_file_names(OTHER_DIRECTORY_PATH)) == ['a', 'c', 'd']
+    assert directory_file_names(TEST_DIRECTORY_PATH) == ['a']
+    assert file_read(os.path.join(OTHER_DIRECTORY_PATH, 'a')) == 'a'
+    assert stat.S_IMODE(os.stat(os.path.join(OTHER_DIRECTORY_PATH, 'a')).st_mode) == 0o640
+    assert file_read(os.path.join(OTHER_DIRECTORY_PATH, 'c')) == 'b'
+    assert file_read(os.path.join(OTHER_DIRECTORY_PATH, 'd')) == 'd'
+
+
+def test_files_batch__errors():
+    a_path = os.path.join(TEST_DIRECTORY_PATH, 'a')
+    results = files_batch(
+        [
+            FileOperation('delete', os.path.join(TEST_DIRECTORY_PATH, 'foo')),
+            FileOperation('copy', a_path),
+            FileOperation('chmod', a_path),
+            FileOperation('move', a_path, os.path.join(TEST_DIRECTORY_PATH, 'foo', 'a')),
+            FileOperation('move', os.path.join(TEST_DIRECTORY_PATH, 'foo'), TEST_DIRECTORY_PATH),
+            FileOperation('move', a_path, os.path.join(OTHER_DIRECTORY_PATH, 'a')),
+        ]
+    )
+
+    # a failure does not stop the other operations
+    assert [result.success for result in results] == [False, False, False, False, False, True]
+    assert isinstance(results[0].error, FileNotFoundError)
+    assert isinstance(results[1].error, ValueError)
+    assert isinstance(results[2].error, ValueError)
+    assert isinstance(results[3].error, FileNotFoundError)
+    assert isinstance(results[4].error, FileNotFoundError)
+    assert directory_file_names(OTHER_DIRECTORY_PATH) == ['a']
+    assert files_batch([]) == []
+
+
+def test_files_batch__copy_onto_itself():
+    a_path = os.path.join(TEST_DIRECTORY_PATH, 'a')
+    results = files_batch([FileOperation('copy', a_path, TEST_DIRECTORY_PATH), FileOperation('copy', a_path, a_path)])
+
+    # the copies fail rather than emptying the file
+    assert [result.success for result in results] == [False, False]
+    assert all(isinstance(result.error, shutil.SameFileError) for result in results)
+    assert file_read(a_path) == 'a'
+
+
+def test_files_batch__other_file_system(monkeypatch):
+    import errno
+
+    def failing_rename(*args, **kwargs):
+        raise OSError(errno.EXDEV, 'Invalid cross-device link')
+
+    monkeypatch.setattr(os, 'rename', failing_rename)
+    b_path = os.path.join(TEST_DIRECTORY_PATH, 'b')
+    (result,) = files_batch([FileOperation('move', b_path, OTHER_DIRECTORY_PATH)])
+    assert result.success
+    assert directory_file_names(OTHER_DIRECTORY_PATH) == ['b']
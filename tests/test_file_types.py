@@ -0,0 +1,114 @@
+import codecs
+import os
+
+import pytest
+
+from d8s_file_system import (
+    FileClassification,
+    directory_create,
+    directory_delete,
+    directory_exists,
+    file_classify,
+    file_is_binary,
+    file_read_text,
+    file_text_chunks,
+    file_types,
+    file_write,
+)
+
+TEST_DIRECTORY_PATH = './test_file_types'
+TEST_FILE_PATH = os.path.join(TEST_DIRECTORY_PATH, 'file')
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(TEST_DIRECTORY_PATH)
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+@pytest.mark.parametrize(
+    'contents, classification',
+    [
+        (b'', FileClassification(False, 'utf-8')),
+        (b'foo\nbar\n', FileClassification(False, 'utf-8')),
+        ('café ☃'.encode('utf-8'), FileClassification(False, 'utf-8')),
+        (codecs.BOM_UTF8 + b'foo', FileClassification(False, 'utf-8-sig')),
+        ('foo'.encode('utf-16'), FileClassification(False, 'utf-16')),
+        ('foo'.encode('utf-32'), FileClassification(False, 'utf-32')),
+        ('café'.encode('latin-1'), FileClassification(False, 'latin-1')),
+        (b'foo\x00bar', FileClassification(True, None)),
+        (bytes(range(1, 32)) * 10, FileClassification(True, None)),
+    ],
+)
+def test_file_classify(contents, classification):
+    file_write(TEST_FILE_PATH, contents)
+    assert file_classify(TEST_FILE_PATH) == classification
+    assert file_is_binary(TEST_FILE_PATH) == classification.binary
+
+
+def test_file_classify_sample(monkeypatch):
+    monkeypatch.setattr(file_types, 'SAMPLE_SIZE', 4)
+    # the sample ends in the middle of a character (but the file is still utf-8)
+    file_write(TEST_FILE_PATH, 'foo☃'.encode('utf-8'))
+    assert file_classify(TEST_FILE_PATH) == FileClassification(False, 'utf-8')
+    # only the sample is checked
+    file_write(TEST_FILE_PATH, b'foobar\x00')
+    assert not file_is_binary(TEST_FILE_PATH)
+
+
+def test_file_classify_cache(monkeypatch):
+    file_write(TEST_FILE_PATH, b'foo')
+    assert not file_is_binary(TEST_FILE_PATH)
+
+    # the cached classification is used until the file changes
+    monkeypatch.setattr(file_types, '_sample_classification', lambda *args, **kwargs: FileClassification(True, None))
+    assert not file_is_binary(TEST_FILE_PATH)
+    file_write(TEST_FILE_PATH, b'foobar')
+    assert file_is_binary(TEST_FILE_PATH)
+
+    # the oldest classification is dropped once the cache is full
+    monkeypatch.setattr(file_types, 'MAX_CACHED_CLASSIFICATIONS', 1)
+    other_file_path = os.path.join(TEST_DIRECTORY_PATH, 'other')
+    file_write(other_file_path, b'foo')
+    file_classify(other_file_path)
+    assert list(file_types._classifications) == [other_file_path]
+
+    with pytest.raises(FileNotFoundError):
+        file_classify(os.path.join(TEST_DIRECTORY_PATH, 'missing'))
+
+
+def test_file_read_text():
+    text = 'café ☃\r\n' * 1000
+    for encoding in ['utf-8', 'utf-8-sig', 'utf-16', 'utf-32', 'latin-1']:
+        file_write(TEST_FILE_PATH, text.encode(encoding, errors='replace'))
+        assert file_read_text(TEST_FILE_PATH) == text.encode(encoding, errors='replace').decode(encoding)
+
+    # the chunks are decoded incrementally (even when a chunk ends in the middle of a character)
+    file_write(TEST_FILE_PATH, text.encode('utf-16'))
+    chunks = list(file_text_chunks(TEST_FILE_PATH, chunk_size=7))
+    assert len(chunks) > 1
+    assert ''.join(chunks) == text
+
+    file_write(TEST_FILE_PATH, text.encode('utf-8'))
+    assert file_read_text(TEST_FILE_PATH, encoding='latin-1') == text.encode('utf-8').decode('latin-1')
+
+    file_write(TEST_FILE_PATH, b'\x00\x01\x02')
+    with pytest.raises(ValueError):
+        file_read_text(TEST_FILE_PATH)
+
+    # a truncated character is decoded when the file ends
+    file_write(TEST_FILE_PATH, b'foo\xe2\x98')
+    with pytest.raises(UnicodeDecodeError):
+        file_read_text(TEST_FILE_PATH, encoding='utf-8')
+
+    # bytes after the sample which are not valid in the detected encoding are replaced (rather than raising)
+    file_write(TEST_FILE_PATH, b'a' * file_types.SAMPLE_SIZE + b'caf\xe9')
+    assert file_classify(TEST_FILE_PATH).encoding == 'utf-8'
+    assert file_read_text(TEST_FILE_PATH).endswith('caf\ufffd')
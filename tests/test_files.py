@@ -1,4 +1,8 @@
+import array
+import errno
+import mmap
 import os
+import shutil
 import stat
 from pathlib import Path
 
@@ -6,6 +10,7 @@ import pytest
 from d8s_lists import iterables_have_same_items
 
 from d8s_file_system import (
+    FileStatCache,
     directory_create,
     directory_delete,
     directory_file_names,
@@ -18,6 +23,7 @@ from d8s_file_system import (
     file_extension,
     file_is_executable,
     file_is_readable,
+    file_is_sparse,
     file_is_writable,
     file_md5,
     file_move,
@@ -35,9 +41,13 @@ from d8s_file_system import (
     file_sha512,
     file_size,
     file_ssdeep,
+    file_stat_info,
+    file_stat_infos,
     file_write,
+    files_read_prefetched,
     is_file,
 )
+from d8s_file_system import files as files_module
 
 NON_EXISTENT_FILE_PATH = './foo'
 TEST_DIRECTORY_PATH = './test_files'
@@ -134,6 +144,12 @@ def test_file_details_docs_1():
     }
 
 
+def test_file_details_chunks():
+    details = file_details(EXISTING_FILE_PATH, chunks=True)
+    assert details['sha256'] == 'ca978112ca1bbdcafac231b39a23dc4da786eff8147c4e72b9807785afee48bb'
+    assert details['chunks'] == [(0, 1, 'ca978112ca1bbdcafac231b39a23dc4da786eff8147c4e72b9807785afee48bb')]
+
+
 def test_file_details_docs__nonexistent_file():
     with pytest.raises(FileNotFoundError):
         file_details(NON_EXISTENT_FILE_PATH)
@@ -259,3 +275,304 @@ def test_file_ssdeep_docs_1():
 def test_is_file_docs_1():
     assert is_file(EXISTING_FILE_PATH)
     assert not is_file(NON_EXISTENT_FILE_PATH)
+
+
+def test_file_stat_info_1():
+    info = file_stat_info(EXISTING_FILE_PATH)
+    assert repr(info) == "FileStatInfo('./test_files/a', exists=True, size=1)"
+    assert info.exists
+    assert info.is_file
+    assert not info.is_directory
+    assert info.size == file_size(EXISTING_FILE_PATH)
+    if hasattr(os, 'getuid'):
+        assert info.owner_name == file_owner_name(EXISTING_FILE_PATH)
+    assert info.readable == file_is_readable(EXISTING_FILE_PATH)
+    assert info.writable == file_is_writable(EXISTING_FILE_PATH)
+    assert info.executable == file_is_executable(EXISTING_FILE_PATH)
+
+    f = Path(EXISTING_FILE_PATH)
+    f.chmod(f.stat().st_mode | stat.S_IEXEC)
+    assert file_stat_info(EXISTING_FILE_PATH).executable
+
+    info = file_stat_info(TEST_DIRECTORY_PATH)
+    assert info.is_directory
+    assert info.executable
+
+    info = file_stat_info(NON_EXISTENT_FILE_PATH)
+    assert not info.exists
+    assert not info.is_file
+    assert not info.readable
+    assert info.size is None
+    assert info.owner_name is None
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='permission bits are only checked on posix systems')
+def test_file_stat_info__permissions(monkeypatch):
+    os.chmod(EXISTING_FILE_PATH, 0o640)
+    info = file_stat_info(EXISTING_FILE_PATH)
+
+    # the owner of the file
+    monkeypatch.setattr('d8s_file_system.files._process_credentials', lambda: (info.uid + 1000, frozenset()))
+    assert (info.readable, info.writable, info.executable) == (False, False, False)
+    monkeypatch.setattr('d8s_file_system.files._process_credentials', lambda: (info.uid + 1000, frozenset([info.gid])))
+    assert (info.readable, info.writable, info.executable) == (True, False, False)
+    monkeypatch.setattr('d8s_file_system.files._process_credentials', lambda: (info.uid, frozenset()))
+    assert (info.readable, info.writable, info.executable) == (True, True, False)
+
+
+def test_file_stat_cache_1():
+    cache = FileStatCache(ttl=60)
+    assert cache.get(EXISTING_FILE_PATH).size == 1
+    file_write(EXISTING_FILE_PATH, 'abc')
+    # the cached record is returned until it expires or is invalidated
+    assert cache.get(EXISTING_FILE_PATH).size == 1
+    assert len(cache) == 1
+    cache.invalidate(EXISTING_FILE_PATH)
+    assert cache.get(EXISTING_FILE_PATH).size == 3
+    cache.invalidate()
+    assert len(cache) == 0
+
+    cache = FileStatCache(ttl=0)
+    assert cache.get(EXISTING_FILE_PATH).size == 3
+    file_write(EXISTING_FILE_PATH, 'a')
+    assert cache.get(EXISTING_FILE_PATH).size == 1
+
+
+def test_file_stat_cache__max_entries():
+    other_file_path = os.path.join(TEST_DIRECTORY_PATH, 'b')
+    cache = FileStatCache(ttl=60, max_entries=2)
+    cache.get(EXISTING_FILE_PATH)
+    cache.get(NON_EXISTENT_FILE_PATH)
+    # the least recently used record is dropped to make room
+    cache.get(EXISTING_FILE_PATH)
+    cache.get(other_file_path)
+    assert len(cache) == 2
+    file_write(other_file_path, 'b')
+    file_write(EXISTING_FILE_PATH, 'abc')
+    assert not cache.get(other_file_path).exists
+    assert cache.get(EXISTING_FILE_PATH).size == 1
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='permission bits are only checked on posix systems')
+def test_process_credentials(monkeypatch):
+    uid, gids = files_module._process_credentials()
+    assert (uid, gids) == (os.getuid(), frozenset(os.getgroups()) | {os.getgid()})
+
+    # the credentials follow changes to the uid and gid of the process
+    monkeypatch.setattr(os, 'getuid', lambda: uid + 1000)
+    monkeypatch.setattr(os, 'getgid', lambda: 12345)
+    assert files_module._process_credentials() == (uid + 1000, frozenset(os.getgroups()) | {12345})
+
+    # and the supplementary groups are read again once they expire
+    monkeypatch.setattr(os, 'getgroups', lambda: [54321])
+    monkeypatch.setattr(files_module, 'CREDENTIALS_TTL', 1e-9)
+    assert files_module._process_credentials() == (uid + 1000, frozenset([12345, 54321]))
+
+
+def test_file_stat_infos_1():
+    infos = file_stat_infos([EXISTING_FILE_PATH, NON_EXISTENT_FILE_PATH], max_workers=2)
+    assert list(infos) == [EXISTING_FILE_PATH, NON_EXISTENT_FILE_PATH]
+    assert infos[EXISTING_FILE_PATH].size == 1
+    assert not infos[NON_EXISTENT_FILE_PATH].exists
+
+    cache = FileStatCache()
+    infos = file_stat_infos((EXISTING_FILE_PATH,), cache=cache)
+    assert infos[EXISTING_FILE_PATH] is cache.get(EXISTING_FILE_PATH)
+
+
+def test_file_write__buffers():
+    file_write(EXISTING_FILE_PATH, bytearray(b'abc'))
+    assert file_read_bytes(EXISTING_FILE_PATH) == b'abc'
+
+    file_write(EXISTING_FILE_PATH, memoryview(b'abcdef')[1:3])
+    assert file_read_bytes(EXISTING_FILE_PATH) == b'bc'
+
+    # non-contiguous buffers are written too
+    file_write(EXISTING_FILE_PATH, memoryview(b'abcdef')[::2])
+    assert file_read_bytes(EXISTING_FILE_PATH) == b'ace'
+
+    numbers = array.array('i', [1, 2, 3])
+    file_write(EXISTING_FILE_PATH, numbers)
+    assert file_read_bytes(EXISTING_FILE_PATH) == numbers.tobytes()
+
+    with mmap.mmap(-1, 3) as m:
+        m.write(b'xyz')
+        file_write(EXISTING_FILE_PATH, m)
+    assert file_read_bytes(EXISTING_FILE_PATH) == b'xyz'
+
+    file_append(EXISTING_FILE_PATH, bytearray(b'abc'))
+    assert file_read_bytes(EXISTING_FILE_PATH) == b'xyzabc'
+
+    file_append(EXISTING_FILE_PATH, b'')
+    assert file_read_bytes(EXISTING_FILE_PATH) == b'xyzabc'
+
+
+def test_file_write__chunks():
+    file_write(EXISTING_FILE_PATH, (chunk for chunk in ['foo', ' ', 'bar']))
+    assert file_read(EXISTING_FILE_PATH) == 'foo bar'
+
+    file_write(EXISTING_FILE_PATH, iter([b'a', bytearray(b'b'), memoryview(b'c')]))
+    assert file_read(EXISTING_FILE_PATH) == 'abc'
+
+    file_append(EXISTING_FILE_PATH, iter(['d', 'e']))
+    assert file_read(EXISTING_FILE_PATH) == 'abcde'
+
+    # containers are converted to strings (whatever their items are)
+    for contents in [['a', 'b'], [b'a'], [], (), [1, 2], {'x'}, {'a': 1}]:
+        with pytest.warns(UserWarning):
+            file_write(EXISTING_FILE_PATH, contents)
+        assert file_read(EXISTING_FILE_PATH) == str(contents)
+
+    # an empty iterator is written as empty content
+    file_write(EXISTING_FILE_PATH, (chunk for chunk in []))
+    assert file_read(EXISTING_FILE_PATH) == ''
+    file_append(EXISTING_FILE_PATH, iter(()))
+    assert file_read(EXISTING_FILE_PATH) == ''
+
+    # an iterator of anything else can not be written (it is consumed, so it can not be converted to a string)
+    file_write(EXISTING_FILE_PATH, 'foo')
+    with pytest.raises(TypeError):
+        file_write(EXISTING_FILE_PATH, (number for number in [1, 2]))
+    with pytest.raises(TypeError):
+        file_append(EXISTING_FILE_PATH, iter([None]))
+    assert file_read(EXISTING_FILE_PATH) == 'foo'
+
+
+def _create_sparse_file(file_path, size):
+    with open(file_path, 'wb') as f:
+        f.seek(size // 2)
+        f.write(b'data')
+        f.truncate(size)
+
+
+@pytest.mark.skipif(not hasattr(os, 'SEEK_DATA'), reason='SEEK_DATA and SEEK_HOLE are not supported on this platform')
+def test_file_copy__sparse():
+    sparse_file_path = os.path.join(TEST_DIRECTORY_PATH, 'sparse')
+    size = 16 * 1024 * 1024
+    _create_sparse_file(sparse_file_path, size)
+    if not file_is_sparse(sparse_file_path):
+        pytest.skip('The file system does not support sparse files')
+    assert not file_is_sparse(EXISTING_FILE_PATH)
+    os.chmod(sparse_file_path, 0o640)
+
+    copy_path = os.path.join(TEST_DIRECTORY_PATH, 'copy')
+    file_copy(sparse_file_path, copy_path)
+    assert file_is_sparse(copy_path)
+    assert file_read_bytes(copy_path) == file_read_bytes(sparse_file_path)
+    assert stat.S_IMODE(os.stat(copy_path).st_mode) == 0o640
+
+    # the destination may be a directory
+    directory_path = os.path.join(TEST_DIRECTORY_PATH, 'b')
+    directory_create(directory_path)
+    file_copy(sparse_file_path, directory_path, preserve_metadata=True)
+    copy_path = os.path.join(directory_path, 'sparse')
+    assert file_is_sparse(copy_path)
+    assert os.stat(copy_path).st_mtime_ns == os.stat(sparse_file_path).st_mtime_ns
+    assert file_read_bytes(copy_path) == file_read_bytes(sparse_file_path)
+
+    # copying a file onto itself fails (rather than emptying it)
+    with pytest.raises(shutil.SameFileError):
+        file_copy(sparse_file_path, sparse_file_path)
+    with pytest.raises(shutil.SameFileError):
+        file_copy(sparse_file_path, TEST_DIRECTORY_PATH)
+    assert file_size(sparse_file_path) == size
+    assert b'data' in file_read_bytes(sparse_file_path)
+
+
+def test_file_write__preallocate():
+    file_write(EXISTING_FILE_PATH, b'abc', preallocate=3)
+    assert file_read_bytes(EXISTING_FILE_PATH) == b'abc'
+
+    # space which is preallocated but not written is dropped
+    file_write(EXISTING_FILE_PATH, (chunk for chunk in ['foo', 'bar']), preallocate=1024 * 1024)
+    assert file_read(EXISTING_FILE_PATH) == 'foobar'
+    assert file_size(EXISTING_FILE_PATH) == 6
+
+
+@pytest.mark.skipif(not hasattr(os, 'posix_fallocate'), reason='posix_fallocate is not supported on this platform')
+def test_file_write__preallocate_errors(monkeypatch):
+    def fallocate_error(error_number):
+        def posix_fallocate(*args):
+            raise OSError(error_number, os.strerror(error_number))
+
+        return posix_fallocate
+
+    # file systems which do not support preallocation are written to without it
+    monkeypatch.setattr(os, 'posix_fallocate', fallocate_error(errno.EOPNOTSUPP))
+    file_write(EXISTING_FILE_PATH, b'abc', preallocate=3)
+    assert file_read_bytes(EXISTING_FILE_PATH) == b'abc'
+
+    monkeypatch.setattr(os, 'posix_fallocate', fallocate_error(errno.ENOSPC))
+    with pytest.raises(OSError):
+        file_write(EXISTING_FILE_PATH, b'def', preallocate=3)
+    assert file_read_bytes(EXISTING_FILE_PATH) == b'abc'
+
+
+def test_files_read_prefetched():
+    file_paths = []
+    for name in 'bcdefg':
+        file_path = os.path.join(TEST_DIRECTORY_PATH, name)
+        file_write(file_path, name * 10)
+        file_paths.append(file_path)
+
+    # the files are returned in order
+    expected = [(file_path, os.path.basename(file_path) * 10) for file_path in file_paths]
+    assert list(files_read_prefetched(file_paths)) == expected
+    assert list(files_read_prefetched(iter(file_paths), prefetch=2, max_buffered_bytes=15)) == expected
+    assert list(files_read_prefetched(file_paths, prefetch=1, max_buffered_bytes=0)) == expected
+    assert list(files_read_prefetched(file_paths[:1], binary=True)) == [(file_paths[0], b'b' * 10)]
+    assert list(files_read_prefetched([])) == []
+
+    # errors are raised when the file which caused them is reached
+    results = files_read_prefetched([file_paths[0], NON_EXISTENT_FILE_PATH, file_paths[1]])
+    assert next(results) == expected[0]
+    with pytest.raises(FileNotFoundError):
+        next(results)
+
+    # the read ahead can be abandoned part way through
+    results = files_read_prefetched(file_paths, prefetch=2)
+    assert next(results) == expected[0]
+    results.close()
+
+
+def test_files_read_prefetched__close(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    file_paths = []
+    for name in 'bcdefg':
+        file_path = os.path.join(TEST_DIRECTORY_PATH, name)
+        file_write(file_path, name)
+        file_paths.append(file_path)
+
+    shutdown = ThreadPoolExecutor.shutdown
+
+    def shutdown_without_cancel_futures(self, wait=True):
+        # the signature of shutdown before python 3.9
+        return shutdown(self, wait)
+
+    monkeypatch.setattr(ThreadPoolExecutor, 'shutdown', shutdown_without_cancel_futures)
+    results = files_read_prefetched(file_paths, prefetch=2)
+    assert next(results) == (file_paths[0], 'b')
+    results.close()
+
+
+def test_files_read_prefetched__buffer_limit(monkeypatch):
+    file_paths = []
+    for name in 'bcdefg':
+        file_path = os.path.join(TEST_DIRECTORY_PATH, name)
+        file_write(file_path, name * 10)
+        file_paths.append(file_path)
+
+    stat_calls = []
+    original_stat = os.stat
+
+    def stat_function(path, *args, **kwargs):
+        stat_calls.append(path)
+        return original_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, 'stat', stat_function)
+    results = files_read_prefetched(file_paths, prefetch=4, max_buffered_bytes=25)
+    next(results)
+    # two files (20 bytes) fit in the buffer after the first file is taken; the next file is looked at, but not read
+    assert stat_calls == file_paths[:4]
+    results.close()
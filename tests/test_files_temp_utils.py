@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from d8s_file_system import (
+    ScratchPool,
+    directories_temp_utils,
+    directory_create,
+    directory_delete,
+    directory_exists,
+    scratch_file,
+)
+
+TEST_DIRECTORY_PATH = './test_files_temp_utils'
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(TEST_DIRECTORY_PATH)
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+def test_scratch_file():
+    fast_root_path = os.path.abspath(os.path.join(TEST_DIRECTORY_PATH, 'fast'))
+    disk_root_path = os.path.abspath(os.path.join(TEST_DIRECTORY_PATH, 'disk'))
+    with ScratchPool([fast_root_path, disk_root_path], quota_bytes=100, min_free_bytes=0) as pool:
+        fast_path, disk_path = pool.root_paths
+        with scratch_file(size_hint=60, pool=pool) as f:
+            assert os.path.dirname(os.path.dirname(f.name)) == fast_path
+            f.write(b'foo')
+            f.flush()
+            assert os.path.getsize(f.name) == 3
+
+            # the first root's quota is reserved by the first file
+            with scratch_file(size_hint=60, pool=pool, mode='w+', suffix='.txt') as second_f:
+                assert os.path.dirname(os.path.dirname(second_f.name)) == disk_path
+                assert second_f.name.endswith('.txt')
+        assert not os.path.exists(f.name)
+
+        # the reservation is returned when the file is deleted
+        with scratch_file(size_hint=60, pool=pool) as f:
+            assert os.path.dirname(os.path.dirname(f.name)) == fast_path
+
+
+def test_scratch_file_default_pool(monkeypatch):
+    monkeypatch.setattr(directories_temp_utils, '_default_pool', None)
+    root_path = os.path.abspath(TEST_DIRECTORY_PATH)
+    monkeypatch.setenv(directories_temp_utils.SCRATCH_ROOTS_ENVIRONMENT_VARIABLE, root_path)
+    try:
+        with scratch_file() as f:
+            assert os.path.dirname(os.path.dirname(os.path.dirname(f.name))) == root_path
+    finally:
+        directories_temp_utils.default_scratch_pool().close()
@@ -0,0 +1,55 @@
+import os
+import subprocess  # nosec
+import sys
+
+import pytest
+
+import d8s_file_system
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the cumulative time (in microseconds) which importing the package itself may take
+IMPORT_TIME_BUDGET = 50_000
+HEAVY_MODULES = ('atomicwrites', 'd8s_hashes', 'concurrent.futures', 'd8s_file_system.directories')
+
+
+def _run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(  # nosec
+        [sys.executable, *args], cwd=PACKAGE_ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def _import_times(stderr: str):
+    """Parse the output of `python -X importtime` into a dict of module name to cumulative import time."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_time_regression():
+    result = _run_python('-X', 'importtime', '-c', 'import d8s_file_system')
+    times = _import_times(result.stderr)
+    assert times['d8s_file_system'] < IMPORT_TIME_BUDGET
+    assert not any(module in times for module in HEAVY_MODULES)
+
+
+def test_lazy_imports():
+    code = (
+        'import sys\n'
+        'from d8s_file_system import file_name, file_exists\n'
+        f'print(",".join(module for module in {HEAVY_MODULES!r} if module in sys.modules))\n'
+    )
+    # using the light-weight file functions does not import any heavy dependencies
+    assert _run_python('-c', code).stdout.strip() == ''
+
+
+def test_all_names_resolve():
+    for name in d8s_file_system.__all__:
+        assert getattr(d8s_file_system, name).__name__ == name
+    assert set(d8s_file_system.__all__) <= set(dir(d8s_file_system))
+
+    with pytest.raises(AttributeError):
+        d8s_file_system.foo  # pylint: disable=W0104
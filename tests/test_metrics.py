@@ -0,0 +1,144 @@
+import locale
+import os
+
+import pytest
+
+from d8s_file_system import (
+    FileMetrics,
+    MetricsEvent,
+    OperationMetrics,
+    atomic_write,
+    directory_create,
+    directory_delete,
+    directory_exists,
+    directory_file_paths,
+    file_append,
+    file_md5,
+    file_read,
+    file_write,
+)
+from d8s_file_system import metrics as metrics_module
+
+TEST_DIRECTORY_PATH = './test_metrics'
+TEST_FILE_PATH = os.path.join(TEST_DIRECTORY_PATH, 'a')
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(TEST_DIRECTORY_PATH)
+    file_write(TEST_FILE_PATH, 'abc')
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+def test_file_metrics():
+    events = []
+    with FileMetrics(on_event=events.append) as metrics:
+        assert metrics_module._active_metrics is metrics
+        assert file_read(TEST_FILE_PATH) == 'abc'
+        file_md5(TEST_FILE_PATH)
+        directory_file_paths(TEST_DIRECTORY_PATH)
+        file_write(TEST_FILE_PATH, 'abcd')
+        file_append(TEST_FILE_PATH, iter(['e', 'f']))
+        file_append(TEST_FILE_PATH, 'é')
+        file_write(TEST_FILE_PATH, b'abcd', preallocate=1000)
+    assert metrics_module._active_metrics is None
+    # nothing is recorded once the metrics are no longer active
+    file_read(TEST_FILE_PATH)
+
+    snapshot = metrics.snapshot()
+    assert sorted(snapshot) == [
+        'atomic_write',
+        'directory_file_paths',
+        'file_action',
+        'file_append',
+        'file_md5',
+        'file_write',
+    ]
+    assert snapshot['file_action'].calls == 2
+    assert snapshot['file_action'].bytes_read == 6
+    assert snapshot['file_action'].read_calls == 2
+    # the io of the operations inside of an operation is counted for the outer operation too
+    assert snapshot['file_md5'].calls == 1
+    assert snapshot['file_md5'].bytes_read == 3
+    assert snapshot['directory_file_paths'].calls == 1
+    # the bytes which were actually written are counted (not the preallocated size)
+    assert snapshot['file_write'].calls == 2
+    assert snapshot['file_write'].bytes_written == 8
+    assert snapshot['file_write'].write_calls == 2
+    assert snapshot['atomic_write'].bytes_written == 8
+    assert snapshot['atomic_write'].write_calls == 2
+    assert snapshot['file_append'].calls == 2
+    # text is counted in bytes (in the encoding which it was written with)
+    assert snapshot['file_append'].bytes_written == 2 + len('é'.encode(locale.getpreferredencoding(False)))
+    assert snapshot['file_append'].write_calls == 3
+    assert snapshot['file_action'].latency_histogram()[float('inf')] == 2
+    assert repr(snapshot['file_md5']).startswith('OperationMetrics(calls=1, errors=0, latency_sum=')
+
+    assert [event.operation for event in events] == [
+        'file_action',
+        'file_action',
+        'file_md5',
+        'directory_file_paths',
+        'atomic_write',
+        'file_write',
+        'file_append',
+        'file_append',
+        'atomic_write',
+        'file_write',
+    ]
+    assert events[0] == MetricsEvent('file_action', events[0].latency, 3, 0, 1, 0, None)
+
+    # snapshots are copies
+    snapshot['file_action'].calls = 10
+    snapshot['file_action'].latency_counts[0] = 10
+    assert metrics.snapshot()['file_action'].calls == 2
+    assert metrics.snapshot()['file_action'].latency_histogram()[float('inf')] == 2
+
+    metrics.reset()
+    assert metrics.snapshot() == {}
+
+
+def test_file_metrics_errors():
+    with FileMetrics() as metrics:
+        with pytest.raises(FileNotFoundError):
+            file_read(os.path.join(TEST_DIRECTORY_PATH, 'b'))
+        with pytest.raises(ValueError):
+            with atomic_write(TEST_FILE_PATH) as f:
+                f.write('foo')
+                raise ValueError()
+        with atomic_write(os.path.join(TEST_DIRECTORY_PATH, 'c'), mode='wb') as f:
+            f.write(b'12345')
+    assert file_read(TEST_FILE_PATH) == 'abc'
+
+    snapshot = metrics.snapshot()
+    assert snapshot['file_action'].calls == snapshot['file_action'].errors == 1
+    assert snapshot['atomic_write'].calls == 2
+    assert snapshot['atomic_write'].errors == 1
+    # the writes of the failed atomic write are counted too
+    assert snapshot['atomic_write'].bytes_written == 8
+    assert snapshot['atomic_write'].write_calls == 2
+
+
+def test_file_metrics_nesting():
+    with FileMetrics() as outer_metrics:
+        with FileMetrics() as inner_metrics:
+            file_read(TEST_FILE_PATH)
+        assert metrics_module._active_metrics is outer_metrics
+    assert outer_metrics.snapshot() == {}
+    assert inner_metrics.snapshot()['file_action'].calls == 1
+
+
+def test_operation_metrics_latency_histogram():
+    metrics = OperationMetrics([0.1, 1.0])
+    for latency in [0.05, 0.1, 0.5, 2.0, 3.0]:
+        metrics.add(MetricsEvent('file_action', latency, 0, 0, 0, 0, None))
+    assert metrics.latency_histogram() == {0.1: 2, 1.0: 3, float('inf'): 5}
+    assert metrics.latency_sum == pytest.approx(5.65)
+    assert metrics.calls == 5
@@ -0,0 +1,184 @@
+import itertools
+import json
+import os
+import time
+
+import pytest
+
+from d8s_file_system import (
+    directory_create,
+    directory_delete,
+    directory_exists,
+    file_copy,
+    file_copy_resumable,
+    file_read_bytes,
+    file_write,
+    resumable_copies,
+)
+
+TEST_DIRECTORY_PATH = './test_resumable_copies'
+SOURCE_PATH = os.path.join(TEST_DIRECTORY_PATH, 'source')
+DESTINATION_PATH = os.path.join(TEST_DIRECTORY_PATH, 'destination')
+PARTIAL_PATH = DESTINATION_PATH + resumable_copies.PARTIAL_FILE_SUFFIX
+CHECKPOINT_PATH = DESTINATION_PATH + resumable_copies.CHECKPOINT_FILE_SUFFIX
+SOURCE_CONTENTS = os.urandom(10_000)
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(TEST_DIRECTORY_PATH)
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+def _interrupt_after(monkeypatch, chunk_count, delay=0.0):
+    """Make the copy fail (after the given delay) once the given number of chunks are copied."""
+    chunk_copy = resumable_copies._chunk_copy
+    calls = itertools.count()
+
+    def interrupted_chunk_copy(*args):
+        if next(calls) >= chunk_count:
+            time.sleep(delay)
+            raise KeyboardInterrupt
+        return chunk_copy(*args)
+
+    monkeypatch.setattr(resumable_copies, '_chunk_copy', interrupted_chunk_copy)
+
+
+def _checkpoint_chunks():
+    with open(CHECKPOINT_PATH, encoding='utf-8') as f:
+        return [json.loads(line)['chunk'] for line in f.read().splitlines()[1:]]
+
+
+def test_file_copy_resumable():
+    file_write(SOURCE_PATH, SOURCE_CONTENTS)
+    os.chmod(SOURCE_PATH, 0o640)
+    assert file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, chunk_size=1024) == len(SOURCE_CONTENTS)
+    assert file_read_bytes(DESTINATION_PATH) == SOURCE_CONTENTS
+    assert os.stat(DESTINATION_PATH).st_mode & 0o777 == 0o640
+    assert not os.path.exists(PARTIAL_PATH)
+    assert not os.path.exists(CHECKPOINT_PATH)
+
+    # the destination may be a directory
+    directory_path = os.path.join(TEST_DIRECTORY_PATH, 'directory')
+    directory_create(directory_path)
+    file_copy_resumable(SOURCE_PATH, directory_path, preserve_metadata=True)
+    copied_path = os.path.join(directory_path, 'source')
+    assert file_read_bytes(copied_path) == SOURCE_CONTENTS
+    assert os.stat(copied_path).st_mtime_ns == os.stat(SOURCE_PATH).st_mtime_ns
+
+    # empty files are copied too
+    file_write(SOURCE_PATH, b'')
+    assert file_copy_resumable(SOURCE_PATH, DESTINATION_PATH) == 0
+    assert file_read_bytes(DESTINATION_PATH) == b''
+
+
+def test_file_copy_resumable_resume(monkeypatch):
+    file_write(SOURCE_PATH, SOURCE_CONTENTS)
+    _interrupt_after(monkeypatch, 4)
+    with pytest.raises(KeyboardInterrupt):
+        file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, chunk_size=1024)
+    assert not os.path.exists(DESTINATION_PATH)
+    assert _checkpoint_chunks() == [0, 1, 2, 3]
+    assert file_read_bytes(PARTIAL_PATH)[:4096] == SOURCE_CONTENTS[:4096]
+    monkeypatch.undo()
+
+    # a crash may leave a partly written line at the end of the checkpoint
+    with open(CHECKPOINT_PATH, 'a', encoding='utf-8') as f:
+        f.write('{"chunk": 4, "dig')
+    # only the chunks which were not copied are copied when the copy is resumed
+    assert file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, chunk_size=1024) == len(SOURCE_CONTENTS) - 4096
+    assert file_read_bytes(DESTINATION_PATH) == SOURCE_CONTENTS
+    assert not os.path.exists(CHECKPOINT_PATH)
+
+
+def test_file_copy_resumable_verifies_chunks(monkeypatch):
+    file_write(SOURCE_PATH, SOURCE_CONTENTS)
+    _interrupt_after(monkeypatch, 4)
+    with pytest.raises(KeyboardInterrupt):
+        file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, chunk_size=1024)
+    monkeypatch.undo()
+
+    # a chunk which was lost (or corrupted) after it was checkpointed is copied again
+    with open(PARTIAL_PATH, 'r+b') as f:
+        f.seek(1500)
+        f.write(b'corrupted')
+    assert file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, chunk_size=1024) == len(SOURCE_CONTENTS) - 3072
+    assert file_read_bytes(DESTINATION_PATH) == SOURCE_CONTENTS
+
+
+def test_file_copy_resumable_restarts(monkeypatch):
+    file_write(SOURCE_PATH, SOURCE_CONTENTS)
+    _interrupt_after(monkeypatch, 4)
+    with pytest.raises(KeyboardInterrupt):
+        file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, chunk_size=1024)
+    monkeypatch.undo()
+
+    # the checkpoint is not used if the chunk size changes
+    _interrupt_after(monkeypatch, 2)
+    with pytest.raises(KeyboardInterrupt):
+        file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, chunk_size=2048)
+    assert _checkpoint_chunks() == [0, 1]
+    monkeypatch.undo()
+
+    # or if the source changes
+    new_contents = os.urandom(5000)
+    file_write(SOURCE_PATH, new_contents)
+    assert file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, chunk_size=2048) == len(new_contents)
+    assert file_read_bytes(DESTINATION_PATH) == new_contents
+
+    # or if the partial file is missing
+    _interrupt_after(monkeypatch, 1)
+    with pytest.raises(KeyboardInterrupt):
+        file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, chunk_size=1024)
+    monkeypatch.undo()
+    os.remove(PARTIAL_PATH)
+    assert file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, chunk_size=1024) == len(new_contents)
+
+    # or if it is empty
+    file_write(CHECKPOINT_PATH, '')
+    file_write(PARTIAL_PATH, b'')
+    assert file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, chunk_size=1024) == len(new_contents)
+    assert file_read_bytes(DESTINATION_PATH) == new_contents
+
+
+def test_file_copy_resumable_workers(monkeypatch):
+    file_write(SOURCE_PATH, SOURCE_CONTENTS)
+    checkpoint_path = os.path.join(TEST_DIRECTORY_PATH, 'checkpoint')
+    kwargs = {'chunk_size': 1000, 'workers': 4, 'checkpoint_path': checkpoint_path}
+    assert file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, **kwargs) == len(SOURCE_CONTENTS)
+    assert file_read_bytes(DESTINATION_PATH) == SOURCE_CONTENTS
+    assert not os.path.exists(checkpoint_path)
+
+    # the chunks which were copied before the copy was interrupted are checkpointed
+    _interrupt_after(monkeypatch, 3, delay=0.1)
+    with pytest.raises(KeyboardInterrupt):
+        file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, **kwargs)
+    monkeypatch.undo()
+    assert file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, **kwargs) == len(SOURCE_CONTENTS) - 3000
+    assert file_read_bytes(DESTINATION_PATH) == SOURCE_CONTENTS
+
+
+def test_file_copy_resumable_preallocate(monkeypatch):
+    file_write(SOURCE_PATH, SOURCE_CONTENTS)
+    preallocated_sizes = []
+    monkeypatch.setattr(resumable_copies, '_file_preallocate', lambda fd, size: preallocated_sizes.append(size))
+    # the space for the partial file is only reserved when it is asked for
+    file_copy_resumable(SOURCE_PATH, DESTINATION_PATH)
+    assert preallocated_sizes == []
+    assert file_copy_resumable(SOURCE_PATH, DESTINATION_PATH, preallocate=True) == len(SOURCE_CONTENTS)
+    assert preallocated_sizes == [len(SOURCE_CONTENTS)]
+    assert file_read_bytes(DESTINATION_PATH) == SOURCE_CONTENTS
+
+
+def test_file_copy_resumable_mode():
+    file_write(SOURCE_PATH, SOURCE_CONTENTS)
+    file_copy(SOURCE_PATH, DESTINATION_PATH, resumable=True)
+    assert file_read_bytes(DESTINATION_PATH) == SOURCE_CONTENTS
+    assert not os.path.exists(CHECKPOINT_PATH)
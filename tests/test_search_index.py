@@ -0,0 +1,106 @@
+import os
+import time
+
+import pytest
+
+from d8s_file_system import (
+    TrigramIndex,
+    directory_create,
+    directory_delete,
+    directory_exists,
+    directory_files_containing,
+    file_delete,
+    file_write,
+)
+from d8s_file_system import search_index as search_index_module
+
+TEST_DIRECTORY_PATH = './test_search_index'
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(os.path.join(TEST_DIRECTORY_PATH, 'sub'))
+    file_write(os.path.join(TEST_DIRECTORY_PATH, 'a'), 'foo bar baz')
+    file_write(os.path.join(TEST_DIRECTORY_PATH, 'b'), 'bar baz')
+    file_write(os.path.join(TEST_DIRECTORY_PATH, 'c'), 'abc')
+    file_write(os.path.join(TEST_DIRECTORY_PATH, 'sub', 'd'), 'foo')
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+def test_trigram_index_candidate_paths_1():
+    index = TrigramIndex(TEST_DIRECTORY_PATH)
+    assert sorted(index.update()) == ['./test_search_index/a', './test_search_index/b', './test_search_index/c']
+    assert len(index) == 3
+    # nothing has changed, so nothing is re-indexed
+    assert index.update() == []
+
+    assert index.candidate_paths('foo') == ['./test_search_index/a']
+    assert sorted(index.candidate_paths('bar baz')) == ['./test_search_index/a', './test_search_index/b']
+    assert index.candidate_paths('xyz') == []
+    # patterns shorter than a trigram can not be narrowed down
+    assert len(index.candidate_paths('a')) == 3
+
+    assert index.candidate_paths('f.o bar', pattern_is_regex=True) == ['./test_search_index/a']
+    assert sorted(index.candidate_paths('(foo|abc)', pattern_is_regex=True)) == [
+        './test_search_index/a',
+        './test_search_index/b',
+        './test_search_index/c',
+    ]
+    assert len(index.candidate_paths('(?i)FOO', pattern_is_regex=True)) == 3
+
+
+def test_trigram_index_update_1():
+    index = TrigramIndex(TEST_DIRECTORY_PATH, recursive=True, compact_ratio=0.0)
+    index.update()
+    assert sorted(index.candidate_paths('foo')) == ['./test_search_index/a', './test_search_index/sub/d']
+
+    file_delete(os.path.join(TEST_DIRECTORY_PATH, 'a'))
+    # make sure the modification time changes even on file systems with coarse timestamps
+    time.sleep(0.01)
+    file_write(os.path.join(TEST_DIRECTORY_PATH, 'c'), 'foo abc')
+    assert index.update() == ['./test_search_index/c']
+    assert sorted(index.candidate_paths('foo')) == ['./test_search_index/c', './test_search_index/sub/d']
+    assert index.candidate_paths('bar') == ['./test_search_index/b']
+
+
+def test_trigram_index_unreadable_files():
+    file_write(os.path.join(TEST_DIRECTORY_PATH, 'e'), b'\xff\xfe\xfa')
+    index = TrigramIndex(TEST_DIRECTORY_PATH)
+    index.update()
+    # files which can not be indexed are always candidates
+    assert index.candidate_paths('xyz') == ['./test_search_index/e']
+
+
+def test_directory_files_containing_index():
+    index = TrigramIndex(TEST_DIRECTORY_PATH)
+    assert directory_files_containing(TEST_DIRECTORY_PATH, 'baz', index=index) == {
+        './test_search_index/a': ['baz'],
+        './test_search_index/b': ['baz'],
+    }
+    assert directory_files_containing(TEST_DIRECTORY_PATH, 'ba[rz]', pattern_is_regex=True, index=index) == {
+        './test_search_index/a': ['bar', 'baz'],
+        './test_search_index/b': ['bar', 'baz'],
+    }
+    assert directory_files_containing(TEST_DIRECTORY_PATH, 'xyz', index=index) == {}
+
+    with pytest.raises(ValueError):
+        directory_files_containing(TEST_DIRECTORY_PATH, 'foo', recursive=True, index=index)
+
+
+def test_posting_list():
+    posting_list = search_index_module._PostingList()
+    file_ids = list(range(0, 3000, 2)) + [10 ** 6, 10 ** 12]
+    for file_id in file_ids:
+        posting_list.append(file_id)
+    assert len(posting_list) == len(file_ids)
+    assert list(posting_list.file_ids()) == file_ids
+    # the small deltas of a dense list take one byte each (rather than the four bytes of a fixed-width id)
+    assert len(posting_list.data) < len(file_ids) * 4
+    assert len(posting_list.data) == len(file_ids) - 2 + 3 + 6
@@ -0,0 +1,130 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from d8s_file_system import (
+    IOThrottle,
+    directory_create,
+    directory_delete,
+    directory_exists,
+    directory_files_read,
+    file_read,
+    file_read_bytes,
+    file_write,
+)
+from d8s_file_system import throttle as throttle_module
+
+TEST_DIRECTORY_PATH = './test_throttle'
+TEST_FILE_PATH = os.path.join(TEST_DIRECTORY_PATH, 'a')
+
+
+@pytest.fixture(autouse=True)
+def clear_testing_directory():
+    """This function is run after every test."""
+    if directory_exists(TEST_DIRECTORY_PATH):
+        directory_delete(TEST_DIRECTORY_PATH)
+    directory_create(TEST_DIRECTORY_PATH)
+    file_write(TEST_FILE_PATH, 'a' * 1000)
+
+
+def teardown_module():
+    """This function is run after all of the tests in this file are run."""
+    directory_delete(TEST_DIRECTORY_PATH)
+
+
+def test_io_throttle_ops_per_second():
+    with IOThrottle(ops_per_second=100, burst_seconds=0.01) as throttle:
+        assert throttle_module._active_throttle is throttle
+        start = time.monotonic()
+        for _ in range(6):
+            assert file_read(TEST_FILE_PATH) == 'a' * 1000
+        # the first read uses the burst; each of the others waits for a token
+        assert time.monotonic() - start >= 0.045
+    assert throttle_module._active_throttle is None
+
+
+def test_io_throttle_bytes_per_second():
+    for name in 'bcde':
+        file_write(os.path.join(TEST_DIRECTORY_PATH, name), b'b' * 1000)
+
+    with IOThrottle(bytes_per_second=40000, burst_seconds=0.001):
+        start = time.monotonic()
+        assert len(list(directory_files_read(TEST_DIRECTORY_PATH, prefetch=2))) == 5
+        # each read waits until the bytes of the previous reads (at least 3000 bytes before the last read) are paid for
+        assert time.monotonic() - start >= 0.07
+
+
+def test_io_throttle_nesting():
+    outer_throttle = IOThrottle(ops_per_second=1000)
+    with outer_throttle:
+        with IOThrottle(ops_per_second=1000) as inner_throttle:
+            assert throttle_module._active_throttle is inner_throttle
+            assert file_read_bytes(TEST_FILE_PATH) == b'a' * 1000
+        assert throttle_module._active_throttle is outer_throttle
+    assert throttle_module._active_throttle is None
+
+
+def test_io_throttle_latency_backoff(monkeypatch):
+    monkeypatch.setattr(throttle_module, 'RATE_FACTOR_ADJUSTMENT_INTERVAL', 0)
+    throttle = IOThrottle(ops_per_second=1000, latency_target=0.01, latency_smoothing=0.5)
+    assert throttle.rate_factor == 1
+
+    throttle.record(0, 0.03)
+    assert throttle.latency == 0.03
+    assert throttle.rate_factor == 0.5
+    throttle.record(0, 0.03)
+    assert throttle.rate_factor == 0.25
+    for _ in range(10):
+        throttle.record(0, 0.03)
+    assert throttle.rate_factor == throttle_module.MIN_RATE_FACTOR
+
+    # the latency is smoothed, so it takes a few fast reads for the rates to start increasing again
+    throttle.record(0, 0.0)
+    assert throttle.latency == 0.015
+    assert throttle.rate_factor == throttle_module.MIN_RATE_FACTOR
+    throttle.record(0, 0.0)
+    assert throttle.rate_factor == pytest.approx(throttle_module.MIN_RATE_FACTOR + 0.1)
+    for _ in range(20):
+        throttle.record(0, 0.0)
+    assert throttle.rate_factor == 1
+
+    # the rate factor is only adjusted once per interval
+    monkeypatch.setattr(throttle_module, 'RATE_FACTOR_ADJUSTMENT_INTERVAL', 60)
+    throttle.record(0, 1.0)
+    assert throttle.rate_factor == 1
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='Threads can only be reniced on Linux')
+def test_io_throttle_nice(monkeypatch):
+    main_thread_priority = os.getpriority(os.PRIO_PROCESS, 0)
+    thread_priorities = []
+
+    def read():
+        file_read(TEST_FILE_PATH)
+        thread_priorities.append(os.getpriority(os.PRIO_PROCESS, threading.get_native_id()))
+
+    def read_in_thread(name=None):
+        thread = threading.Thread(target=read, name=name)
+        thread.start()
+        thread.join()
+
+    worker_name = f'{throttle_module.WORKER_THREAD_NAME_PREFIX}_0'
+    with IOThrottle(nice=main_thread_priority + 1) as throttle:
+        # only the package's worker threads are reniced (not the main thread or the caller's threads)
+        read()
+        read_in_thread()
+        read_in_thread(worker_name)
+        assert len(throttle._reniced_threads) == 1
+    assert thread_priorities == [main_thread_priority, main_thread_priority, main_thread_priority + 1]
+    assert not throttle._reniced_threads
+
+    def setpriority(*args):
+        raise PermissionError()
+
+    monkeypatch.setattr(os, 'setpriority', setpriority)
+    with IOThrottle(nice=-1):
+        read_in_thread(worker_name)
+    assert thread_priorities[-1] == main_thread_priority